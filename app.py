@@ -9,20 +9,86 @@ Core Philosophy: ZERO Content Alteration - Extract text exactly as it appears.
 Author: Senior Python Developer
 """
 
-import streamlit as st
-import pandas as pd
-import pdfplumber
-from docx import Document
-from docx.table import Table as DocxTable
-import markdown
+import codecs
+import gzip
+import hashlib
 import io
+import os
 import re
-from typing import List, Tuple, Optional, Dict
-from dataclasses import dataclass
+import shutil
+import tempfile
+import threading
+import time
+import weakref
+import zlib
+from collections import Counter
+from itertools import islice
+from contextlib import contextmanager, nullcontext
+from typing import List, Tuple, Optional, Dict, Iterable, Iterator, Callable, BinaryIO, TYPE_CHECKING
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
 from datetime import datetime
-from PIL import Image
-import easyocr
-import numpy as np
+
+# Heavy dependencies (pandas, pdfplumber, python-docx, openpyxl, PIL, numpy,
+# markdown) are imported inside the extractor that needs them, so importing
+# this module stays cheap and each format only pays for its own libraries.
+# See benchmarks/bench_import.py for the import-time budget.
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+    from docx.table import Table as DocxTable
+    from PIL.Image import Image as PILImage
+
+from metrics import (
+    StageMetrics, build_snapshot, snapshot_rows, snapshot_to_json, snapshot_to_prometheus, trace_memory
+)
+from ocr_engine import OCR_WARMUP, get_ocr_engine, warm_up_on_start
+from report_store import REPORT_STORE_DIR, get_report_store
+from result_cache import all_result_caches, get_result_cache, hash_file, hash_text, make_key
+from workers import (
+    BudgetOutcome, budget_worker, extract_file, extract_pdf_pages, get_process_pool, render_html_sections,
+    resolve_workers, split_range
+)
+
+
+# Bump whenever extractor output changes, so cached results are not reused
+EXTRACTOR_VERSION = "3"
+
+# Bump whenever the HTML of a report section changes (markdown extensions, ids)
+HTML_RENDERER_VERSION = "1"
+
+# File sections rendered per batch (per worker) by write_html_report()
+HTML_SECTIONS_PER_BATCH = 8
+
+# Every extension _extract() can handle
+SUPPORTED_EXTENSIONS = ['xlsx', 'xls', 'docx', 'pdf', 'txt', 'png', 'jpg', 'jpeg', 'md']
+
+# Files handled by the shared OCR engine / whole-file in a worker process
+OCR_EXTENSIONS = ['png', 'jpg', 'jpeg']
+PROCESS_EXTENSIONS = ['xlsx', 'xls', 'docx']
+
+# Text layer engines for PDF pages without tables (ProcessingOptions.pdf_text_engine)
+PDF_TEXT_ENGINES = ['pdfplumber', 'pdfium']
+
+# .txt / .md decoding: the encoding is detected from the first TEXT_SAMPLE_BYTES,
+# then the file is decoded TEXT_CHUNK_BYTES at a time
+TEXT_SAMPLE_BYTES = 64 * 1024
+TEXT_CHUNK_BYTES = 1024 * 1024
+
+# Report preview: at most PREVIEW_PAGE_BYTES of a section are shown at once, and
+# Markdown tables are cut after PREVIEW_TABLE_ROWS rows until "show more" is used
+PREVIEW_PAGE_BYTES = 256 * 1024
+PREVIEW_TABLE_ROWS = 50
+# Lines that start a new preview page block (PDF pages, Excel sheets)
+PREVIEW_BLOCK_HEADERS = ("#### 📄 Page ".encode('utf-8'), "### 📊 Sheet: ".encode('utf-8'))
+
+
+def _latin1_fallback(error: UnicodeDecodeError) -> Tuple[str, int]:
+    """Codec error handler: decode the offending bytes as latin-1 and carry on."""
+    return error.object[error.start:error.end].decode('latin-1'), error.end
+
+
+codecs.register_error('latin-1-fallback', _latin1_fallback)
 
 
 # ============================================================================
@@ -37,6 +103,143 @@ class ProcessedFile:
     content: str
     success: bool
     error_message: Optional[str] = None
+    # Stage timings (see metrics.py): stage name -> {wall_s, cpu_s, peak_alloc_mb, calls}
+    metrics: Dict[str, Dict] = field(default_factory=dict)
+
+
+@dataclass
+class ProgressEvent:
+    """Progress update passed to the process_files() callback."""
+    filename: str
+    file_index: int                     # Position in upload order (0-based)
+    files_done: int
+    total_files: int
+    page: Optional[int] = None          # Pages finished so far (page events only)
+    total_pages: Optional[int] = None
+    result: Optional[ProcessedFile] = None  # The finished file (file events only)
+    
+    @property
+    def is_page_event(self) -> bool:
+        return self.page is not None
+
+
+@dataclass
+class ProcessingOptions:
+    """Tunable processing settings. Defaults suit the Streamlit app."""
+    # .xlsx files at least this large (MB) are read in streaming mode; None = never
+    excel_streaming_threshold_mb: Optional[float] = 10.0
+    # Rows rendered per chunk in streaming mode (bounds memory per chunk)
+    excel_stream_chunk_rows: int = 5000
+    # Worker processes for CPU-heavy extraction (1 = everything in-process, 0 = one per CPU)
+    workers: int = int(os.environ.get("WORKERS", "1"))
+    # PDFs with fewer pages than this are always extracted in-process
+    pdf_parallel_min_pages: int = 16
+    # PDF pages without a text layer (scans) are rendered at this DPI and OCR'd (0 = no OCR)
+    pdf_ocr_dpi: int = 200
+    # PDF: text layer engine for pages that cannot contain a table ('pdfplumber' or 'pdfium')
+    pdf_text_engine: str = "pdfplumber"
+    # PDF: only extract pages first..last (1-based, inclusive; last 0 = end of document)
+    pdf_first_page: int = 1
+    pdf_last_page: int = 0
+    # PDF: stop after the page where the Markdown output reaches this many characters (0 = no limit)
+    pdf_max_output_chars: int = 0
+    # In-memory uploads at least this large (MB) are spooled to a temporary file once
+    # and read from disk by every extractor (see SpooledUpload); None = never
+    upload_spool_threshold_mb: Optional[float] = 8.0
+    # .txt / .md: keep at most this many characters of each file (0 = no limit)
+    text_max_chars: int = 0
+    # Per-file budgets: a file still running after file_timeout_s seconds, or whose worker
+    # uses more than file_max_memory_mb MB, is stopped and keeps the PDF pages / Excel
+    # sheets it finished (0 = no budget). With a budget every file runs in a killable
+    # worker process (see workers.BudgetWorker)
+    file_timeout_s: float = 0
+    file_max_memory_mb: float = 0
+    # Reuse results from the on-disk result cache (see result_cache.py)
+    use_cache: bool = True
+    # OCR: downscale so the long side is at most this many pixels (0 = keep full size)
+    ocr_max_side: int = 4096
+    # OCR: downscale images whose DPI metadata exceeds this (0 = ignore DPI)
+    ocr_target_dpi: int = 300
+    # OCR: feed the model a grayscale uint8 array instead of RGB (a third of the memory)
+    ocr_grayscale: bool = True
+    # OCR: images still larger than this (px) are read in overlapping tiles (0 = never tile)
+    ocr_tile_size: int = 2560
+    ocr_tile_overlap: int = 128
+    # OCR: images (or tiles) per detector pass; all images of a run are batched together
+    ocr_batch_images: int = 4
+    # OCR: text crops per recognizer pass, and easyocr data loader workers
+    ocr_recognizer_batch_size: int = 16
+    ocr_loader_workers: int = 0
+    # Record peak allocated memory of every stage (tracemalloc; slows extraction down)
+    trace_memory: bool = False
+    
+    # Settings that change speed or memory use but never the extracted content
+    PERFORMANCE_ONLY = frozenset({
+        'excel_streaming_threshold_mb', 'excel_stream_chunk_rows',
+        'workers', 'pdf_parallel_min_pages', 'use_cache', 'upload_spool_threshold_mb',
+        'file_timeout_s', 'file_max_memory_mb',
+        'ocr_batch_images', 'ocr_recognizer_batch_size', 'ocr_loader_workers', 'trace_memory',
+    })
+    
+    def output_options(self) -> Dict:
+        """Options that affect extracted content (part of the result cache key)."""
+        return {k: v for k, v in asdict(self).items() if k not in self.PERFORMANCE_ONLY}
+
+
+# ============================================================================
+# UPLOADS
+# ============================================================================
+
+class SpooledUpload(io.BufferedReader):
+    """
+    An uploaded file copied once to a temporary file and read back from disk.
+    
+    It keeps the upload's `name` and `size`, so it can stand in for the
+    upload anywhere, and adds `path`: libraries that accept a path
+    (pdfplumber, pdfium, openpyxl, xlrd, PIL, python-docx) and worker
+    processes open the file on disk instead of reading the in-memory
+    upload, and it is never spooled again for a pool or pdfium. The
+    temporary file is deleted by close() or when the object is collected.
+    """
+    
+    def __init__(self, upload):
+        suffix = os.path.splitext(upload.name)[1]
+        fd, path = tempfile.mkstemp(prefix="upload_", suffix=suffix)
+        try:
+            with os.fdopen(fd, 'wb') as spool:
+                upload.seek(0)
+                shutil.copyfileobj(upload, spool, 1024 * 1024)
+            upload.seek(0)
+            super().__init__(io.FileIO(path, 'rb'))
+        except BaseException:
+            os.unlink(path)
+            raise
+        self.path = path
+        self.upload_name = upload.name
+        self.size = os.path.getsize(path)
+        self._finalizer = weakref.finalize(self, os.unlink, path)
+    
+    @property
+    def name(self) -> str:
+        return self.upload_name
+    
+    def close(self) -> None:
+        super().close()
+        self._finalizer()
+
+
+def open_local_file(path: str) -> BinaryIO:
+    """
+    Open a file on the server's disk (CLI input, worker input) for
+    DocumentProcessor, with `path` set so it is read by path.
+    
+    Only `path` (set here or by SpooledUpload) marks a file as being on
+    disk: an upload's `name` is chosen by the user and is never looked up
+    on the server's filesystem.
+    """
+    file = open(path, 'rb')
+    file.path = path
+    return file
 
 
 # ============================================================================
@@ -56,74 +259,532 @@ class DocumentProcessor:
     - Markdown (.md): Read and pass through (for MD to HTML conversion)
     """
     
-    def __init__(self):
+    def __init__(self, options: Optional[ProcessingOptions] = None):
+        self.options = options or ProcessingOptions()
         self.processed_files: List[ProcessedFile] = []
         self.warnings: List[str] = []
-        self._ocr_reader = None  # Lazy initialization for OCR
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # PDF page triage decisions of the last run (see _pdf_page_triage)
+        self.pdf_page_stats: Counter = Counter()
+        # Timings of the last extract_files() run (see _record_result and metrics_snapshot)
+        self.run_metrics: Dict[str, float] = {}
+        # Scanned pages of the PDF being extracted: page number -> content hash
+        self._scanned_pages: Dict[int, str] = {}
+        # Stage timings per file index of the last run, and of report generation
+        self._file_metrics: Dict[int, StageMetrics] = {}
+        self.report_metrics = StageMetrics()
+        # Collector of the file being extracted in this thread (see _stage)
+        self._local = threading.local()
+        # Receives finished parts of the file being extracted (see _emit_partial)
+        self._partial_callback: Optional[Callable[[str, str], None]] = None
     
-    def _get_ocr_reader(self):
+    def _get_ocr_engine(self):
         """
-        Lazy initialization of OCR reader.
-        This avoids loading the model until it's actually needed.
+        Return the process-wide OCR engine.
+        The easyocr model is shared by every DocumentProcessor and every
+        session, and is only loaded when OCR is actually needed.
         Supports both Vietnamese and English text.
         """
-        if self._ocr_reader is None:
-            # Initialize with Vietnamese and English support
-            # gpu=False for compatibility (change to True if GPU available)
-            self._ocr_reader = easyocr.Reader(['vi', 'en'], gpu=False)
-        return self._ocr_reader
+        return get_ocr_engine()
     
-    def process_files(self, uploaded_files: List) -> str:
+    def process_files(self, uploaded_files: List,
+                      progress_callback: Optional[Callable[[ProgressEvent], None]] = None) -> str:
         """
         Process all uploaded files and return aggregated Markdown content.
         
         Args:
             uploaded_files: List of Streamlit UploadedFile objects
+            progress_callback: See extract_files
             
         Returns:
             Aggregated Markdown string with all file contents
         """
+        self.extract_files(uploaded_files, progress_callback)
+        return self._aggregate_content()
+    
+    def extract_files(self, uploaded_files: List,
+                      progress_callback: Optional[Callable[[ProgressEvent], None]] = None) -> List[ProcessedFile]:
+        """
+        Process all uploaded files into self.processed_files without building
+        the report (stream it with write_report / write_html_report instead).
+        
+        With ProcessingOptions.workers > 1 files are processed concurrently
+        (see _process_concurrently); otherwise one after another. Either way
+        the report lists files in upload order, and every finished file is
+        passed to the callback (ProgressEvent.result) as soon as it is done,
+        so it can be shown before the others. The time spent in each stage
+        of a file is recorded in its ProcessedFile.metrics (see metrics.py).
+        With a per-file budget (file_timeout_s, file_max_memory_mb) every
+        file runs in a killable worker instead (see _process_with_budgets).
+        
+        Args:
+            uploaded_files: List of Streamlit UploadedFile objects
+            progress_callback: Called with a ProgressEvent when a file finishes
+                and as PDF pages complete. Always called from the calling thread.
+            
+        Returns:
+            Processed files in upload order
+        """
         self.processed_files.clear()
         self.warnings.clear()
         
-        for uploaded_file in uploaded_files:
+        self._results: List[Optional[ProcessedFile]] = [None] * len(uploaded_files)
+        self._cache_keys: Dict[int, str] = {}
+        self._progress_callback = progress_callback
+        self._files_done = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.pdf_page_stats = Counter()
+        self._file_metrics = {}
+        self.run_metrics = {}
+        self._run_started = time.perf_counter()
+        
+        with trace_memory(self.options.trace_memory):
+            if self.options.file_timeout_s > 0 or self.options.file_max_memory_mb > 0:
+                self._process_with_budgets(uploaded_files)
+            elif resolve_workers(self.options.workers) > 1:
+                self._process_concurrently(uploaded_files)
+            else:
+                self._process_sequentially(uploaded_files)
+        
+        self.run_metrics['extract_files_s'] = time.perf_counter() - self._run_started
+        
+        # Keep upload order regardless of completion order
+        for index, processed_file in enumerate(self._results):
+            processed_file.metrics = self._metrics_for(index).to_dict()
+            if not processed_file.success:
+                self.warnings.append(f"Error processing '{processed_file.filename}': {processed_file.error_message}")
+            elif processed_file.error_message:
+                self.warnings.append(f"Partial result for '{processed_file.filename}': {processed_file.error_message}")
+            self.processed_files.append(processed_file)
+        self._progress_callback = None
+        
+        return self.processed_files
+    
+    def _process_sequentially(self, uploaded_files: List) -> None:
+        """
+        Process files one after another in this process, smallest first, so
+        the first results arrive as early as possible; images are OCR'd
+        last, in batches.
+        """
+        ocr_indices = []
+        order = sorted(range(len(uploaded_files)), key=lambda index: self._file_size(uploaded_files[index]))
+        for index in order:
+            uploaded_file = uploaded_files[index]
+            with self._file_stage(index, 'cache'):
+                cached = self._load_cached(index, uploaded_file)
+            if cached:
+                continue
+            file_extension = self._file_extension(uploaded_file.name)
+            if file_extension in OCR_EXTENSIONS:
+                ocr_indices.append(index)  # OCR'd together below, in batches
+                continue
+            self._current_index = index
             try:
-                file_extension = uploaded_file.name.split('.')[-1].lower()
+                with self._file_stage(index, 'extract'):
+                    file = self._spool_upload(uploaded_file)
+                    try:
+                        content = self._extract(file, file_extension)
+                    finally:
+                        if file is not uploaded_file:
+                            file.close()
+                self._record_result(index, self._success(uploaded_file.name, content))
+            except Exception as e:
+                self._record_result(index, self._failure(uploaded_file.name, e))
+        
+        for batch in self._ocr_batches(ocr_indices):
+            outcomes = self._process_images_batched(
+                [uploaded_files[index] for index in batch],
+                [self._metrics_for(index) for index in batch]
+            )
+            for index, outcome in zip(batch, outcomes):
+                self._record_ocr_outcome(index, uploaded_files[index].name, outcome)
+    
+    def _extract(self, file, file_extension: str) -> str:
+        """Route a file to the extractor for its extension and return its Markdown."""
+        if file_extension in ['xlsx', 'xls']:
+            return self._process_excel(file)
+        elif file_extension == 'docx':
+            return self._process_word(file)
+        elif file_extension == 'pdf':
+            return self._process_pdf(file)
+        elif file_extension == 'txt':
+            return self._process_text(file)
+        elif file_extension in ['png', 'jpg', 'jpeg']:
+            return self._process_image(file)
+        elif file_extension == 'md':
+            return self._process_markdown(file)
+        else:
+            raise ValueError(f"Unsupported file format: .{file_extension}")
+    
+    # ========================================================================
+    # CONCURRENT PIPELINE
+    # ========================================================================
+    
+    def _process_concurrently(self, uploaded_files: List) -> None:
+        """
+        Process files concurrently with one executor per kind of work.
+        
+        SCHEDULING:
+        - PDF: split into page ranges on the process pool (page progress is
+          reported as each range completes)
+        - Excel / Word: whole file on the process pool (CPU-bound parsing)
+        - Images: a single OCR thread, since every OCR call is serialized
+          on the shared model anyway; images are OCR'd in batches
+          (see _process_images_batched)
+        - Text / Markdown: inline in the calling thread while the rest runs
+        
+        Files that cannot go to a worker process are spooled to temporary
+        files first; these are removed when the run ends.
+        """
+        pool = get_process_pool(self.options.workers)
+        workers = resolve_workers(self.options.workers)
+        options = asdict(self.options)
+        
+        temp_paths: List[str] = []
+        pending: Dict[Future, int] = {}                 # future -> file index
+        pdf_jobs: Dict[int, Dict] = {}                  # file index -> PDF page-range state
+        ocr_jobs: Dict[Future, List[int]] = {}          # future -> file indices of an OCR batch
+        ocr_indices: List[int] = []
+        inline: List[int] = []
+        
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="ocr") as ocr_executor:
+            try:
+                for index, uploaded_file in enumerate(uploaded_files):
+                    file_extension = self._file_extension(uploaded_file.name)
+                    try:
+                        with self._file_stage(index, 'cache'):
+                            cached = self._load_cached(index, uploaded_file)
+                        if cached:
+                            continue
+                        if file_extension in OCR_EXTENSIONS:
+                            ocr_indices.append(index)
+                        elif file_extension == 'pdf' or file_extension in PROCESS_EXTENSIONS:
+                            with self._file_stage(index, 'dispatch'):
+                                path, is_temp = self._spool_to_disk(uploaded_file)
+                                if is_temp:
+                                    temp_paths.append(path)
+                                if file_extension == 'pdf':
+                                    pdf_jobs[index] = self._submit_pdf(pool, path, workers, options, pending, index)
+                                else:
+                                    pending[pool.submit(extract_file, path, file_extension, options)] = index
+                        else:
+                            inline.append(index)
+                    except Exception as e:
+                        self._record_result(index, self._failure(uploaded_file.name, e))
                 
-                if file_extension in ['xlsx', 'xls']:
-                    content = self._process_excel(uploaded_file)
-                elif file_extension == 'docx':
-                    content = self._process_word(uploaded_file)
-                elif file_extension == 'pdf':
-                    content = self._process_pdf(uploaded_file)
-                elif file_extension == 'txt':
-                    content = self._process_text(uploaded_file)
-                elif file_extension in ['png', 'jpg', 'jpeg']:
-                    content = self._process_image(uploaded_file)
-                elif file_extension == 'md':
-                    content = self._process_markdown(uploaded_file)
-                else:
-                    raise ValueError(f"Unsupported file format: .{file_extension}")
+                for batch in self._ocr_batches(ocr_indices):
+                    future = ocr_executor.submit(
+                        self._process_images_batched,
+                        [uploaded_files[index] for index in batch],
+                        [self._metrics_for(index) for index in batch]
+                    )
+                    ocr_jobs[future] = batch
                 
-                self.processed_files.append(ProcessedFile(
-                    filename=uploaded_file.name,
-                    file_type=file_extension.upper(),
-                    content=content,
-                    success=True
-                ))
+                # Cheap formats run here while workers are busy
+                for index in inline:
+                    uploaded_file = uploaded_files[index]
+                    self._current_index = index
+                    try:
+                        with self._file_stage(index, 'extract'):
+                            content = self._extract(uploaded_file, self._file_extension(uploaded_file.name))
+                        self._record_result(index, self._success(uploaded_file.name, content))
+                    except Exception as e:
+                        self._record_result(index, self._failure(uploaded_file.name, e))
                 
-            except Exception as e:
-                error_msg = f"Error processing '{uploaded_file.name}': {str(e)}"
-                self.warnings.append(error_msg)
-                self.processed_files.append(ProcessedFile(
-                    filename=uploaded_file.name,
-                    file_type=uploaded_file.name.split('.')[-1].upper(),
-                    content="",
-                    success=False,
-                    error_message=str(e)
-                ))
+                for future in as_completed([*pending, *ocr_jobs]):
+                    if future in ocr_jobs:
+                        for index, outcome in zip(ocr_jobs[future], future.result()):
+                            self._record_ocr_outcome(index, uploaded_files[index].name, outcome)
+                        continue
+                    
+                    index = pending[future]
+                    filename = uploaded_files[index].name
+                    if self._results[index] is not None:
+                        continue  # Another page range of this PDF already failed
+                    
+                    try:
+                        if index not in pdf_jobs:
+                            content, stages = future.result()
+                            self._metrics_for(index).merge(stages)
+                            self._record_result(index, self._success(filename, content))
+                            continue
+                        
+                        job = pdf_jobs[index]
+                        selected = job['selected']
+                        job['pages_done'] = min(job['pages_done'] + len(future.result()[0]), len(selected))
+                        self._emit_progress(index, filename, job['pages_done'], len(selected))
+                        if all(f.done() for f in job['futures']):
+                            # Several ranges can finish before this loop sees them, so
+                            # stats and scanned pages are collected from all of them here
+                            pages, scanned = [], {}
+                            for chunk_pages, page_stats, chunk_scanned, stages in (f.result() for f in job['futures']):
+                                pages.extend(chunk_pages)
+                                scanned.update(chunk_scanned)
+                                self.pdf_page_stats.update(page_stats)
+                                self._metrics_for(index).merge(stages)
+                            with self._file_stage(index):
+                                self._fill_scanned_pages(
+                                    job['path'], pages, scanned, job['total_pages'], selected.start + 1
+                                )
+                            pages = self._pdf_range_note(selected, job['total_pages']) + pages
+                            self._record_result(index, self._success(filename, "\n".join(pages)))
+                    except Exception as e:
+                        for f in pdf_jobs.get(index, {}).get('futures', []):
+                            f.cancel()
+                        self._record_result(index, self._failure(filename, e))
+            finally:
+                for path in temp_paths:
+                    os.unlink(path)
+    
+    def _process_with_budgets(self, uploaded_files: List) -> None:
+        """
+        Process every file in a killable worker process (workers.BudgetWorker),
+        so file_timeout_s and file_max_memory_mb are enforced even when an
+        extractor never returns.
+        
+        Up to `workers` files run at once, each watched by a thread of this
+        process. A file over budget is stopped: the PDF pages or Excel
+        sheets it finished are kept as partial content, with the reason in
+        its error_message (see _partial). Results and progress are still
+        recorded in the calling thread. Images are OCR'd in the worker too,
+        which loads its own OCR model on first use.
+        """
+        options = asdict(self.options)
+        temp_paths: List[str] = []
+        pending: Dict[Future, int] = {}                 # future -> file index
         
-        return self._aggregate_content()
+        with ThreadPoolExecutor(max_workers=resolve_workers(self.options.workers),
+                                thread_name_prefix="budget") as executor:
+            try:
+                for index, uploaded_file in enumerate(uploaded_files):
+                    try:
+                        with self._file_stage(index, 'cache'):
+                            cached = self._load_cached(index, uploaded_file)
+                        if cached:
+                            continue
+                        with self._file_stage(index, 'dispatch'):
+                            path, is_temp = self._spool_to_disk(uploaded_file)
+                            if is_temp:
+                                temp_paths.append(path)
+                        future = executor.submit(
+                            self._run_budgeted, path, self._file_extension(uploaded_file.name),
+                            options, self._metrics_for(index)
+                        )
+                        pending[future] = index
+                    except Exception as e:
+                        self._record_result(index, self._failure(uploaded_file.name, e))
+                
+                for future in as_completed(pending):
+                    index = pending[future]
+                    filename = uploaded_files[index].name
+                    try:
+                        outcome = future.result()
+                        self.pdf_page_stats.update(outcome.page_stats)
+                        if outcome.content is not None:
+                            self._record_result(index, self._success(filename, outcome.content))
+                        elif outcome.budget_exceeded and outcome.partial:
+                            self._record_result(index, self._partial(filename, outcome.partial, outcome.error))
+                        else:
+                            self._record_result(index, self._failure(filename, RuntimeError(outcome.error)))
+                    except Exception as e:
+                        self._record_result(index, self._failure(filename, e))
+            finally:
+                for path in temp_paths:
+                    os.unlink(path)
+    
+    def _run_budgeted(self, path: str, file_extension: str, options: dict,
+                      file_metrics: StageMetrics) -> BudgetOutcome:
+        """Extract one file on an idle BudgetWorker within the budgets (runs in a watcher thread)."""
+        with budget_worker() as worker, self._measuring(file_metrics, 'worker'):
+            outcome = worker.run(
+                path, file_extension, options, self.options.file_timeout_s, self.options.file_max_memory_mb
+            )
+            self._merge_stages(outcome.stages)
+        return outcome
+    
+    def _submit_pdf(self, pool, path: str, workers: int, options: dict,
+                    pending: Dict[Future, int], index: int) -> Dict:
+        """Submit the page ranges of one PDF to the pool and return its tracking state."""
+        import pdfplumber
+        
+        with pdfplumber.open(path) as pdf:
+            total_pages = len(pdf.pages)
+        selected = self._pdf_page_range(total_pages)
+        
+        chunks = workers * 4 if len(selected) >= self.options.pdf_parallel_min_pages else 1
+        futures = []
+        for pages in self._pdf_chunks(selected, chunks):
+            future = pool.submit(extract_pdf_pages, path, pages.start, pages.stop, options)
+            pending[future] = index
+            futures.append(future)
+        
+        return {
+            'futures': futures, 'pages_done': 0, 'total_pages': total_pages,
+            'selected': selected, 'path': path
+        }
+    
+    # ========================================================================
+    # RESULTS & PROGRESS
+    # ========================================================================
+    
+    def _load_cached(self, index: int, uploaded_file) -> bool:
+        """
+        Look the file up in the result cache.
+        
+        On a hit the cached content is recorded as the result. On a miss the
+        key is remembered so _record_result() can store the new result.
+        
+        Returns:
+            True if the file was served from the cache
+        """
+        cache = get_result_cache() if self.options.use_cache else None
+        if cache is None:
+            return False
+        
+        key = make_key(
+            hash_file(uploaded_file),
+            self._file_extension(uploaded_file.name),
+            EXTRACTOR_VERSION,
+            self.options.output_options()
+        )
+        content = cache.get(key)
+        if content is None:
+            self.cache_misses += 1
+            self._cache_keys[index] = key
+            return False
+        
+        self.cache_hits += 1
+        self._record_result(index, self._success(uploaded_file.name, content))
+        return True
+    
+    def _record_result(self, index: int, processed_file: ProcessedFile) -> None:
+        """Store a finished file in its upload slot, cache it and report progress."""
+        self._results[index] = processed_file
+        self._files_done += 1
+        if self._files_done == 1:
+            self.run_metrics['time_to_first_result_s'] = time.perf_counter() - self._run_started
+        
+        # Only fresh, complete results are cached; errors and budget stops may be transient
+        key = self._cache_keys.pop(index, None)
+        if key is not None and processed_file.success and processed_file.error_message is None:
+            cache = get_result_cache()
+            if cache is not None:
+                cache.put(key, processed_file.filename, processed_file.content)
+        
+        self._emit_progress(index, processed_file.filename)
+    
+    def _metrics_for(self, index: int) -> StageMetrics:
+        """Stage timings of file `index` of the current run."""
+        if index not in self._file_metrics:
+            self._file_metrics[index] = StageMetrics()
+        return self._file_metrics[index]
+    
+    def _file_stage(self, index: int, name: Optional[str] = None):
+        """Measure file `index` in this thread, timing the enclosed block as stage `name` if given."""
+        return self._measuring(self._metrics_for(index), name)
+    
+    @contextmanager
+    def _measuring(self, file_metrics: StageMetrics, name: Optional[str] = None) -> Iterator[None]:
+        """
+        Make `file_metrics` the collector of this thread for the enclosed
+        block, so the stages of the extractors (_stage) are recorded in it.
+        """
+        previous = getattr(self._local, 'metrics', None)
+        self._local.metrics = file_metrics
+        try:
+            with file_metrics.stage(name) if name else nullcontext():
+                yield
+        finally:
+            self._local.metrics = previous
+    
+    def _stage(self, name: str):
+        """Time a stage of the file being measured in this thread (no-op outside of one)."""
+        file_metrics = getattr(self._local, 'metrics', None)
+        return file_metrics.stage(name) if file_metrics is not None else nullcontext()
+    
+    def _merge_stages(self, stages: Dict[str, Dict]) -> None:
+        """Add stages measured in a worker process under the stages open in this thread."""
+        file_metrics = getattr(self._local, 'metrics', None)
+        if file_metrics is not None:
+            file_metrics.merge(stages, prefix=file_metrics.open_prefix())
+    
+    def _record_ocr_outcome(self, index: int, filename: str, outcome) -> None:
+        """Record one entry of _process_images_batched(): Markdown, or the Exception it failed with."""
+        if isinstance(outcome, Exception):
+            self._record_result(index, self._failure(filename, outcome))
+        else:
+            self._record_result(index, self._success(filename, outcome))
+    
+    def _ocr_batches(self, indices: List[int]) -> List[List[int]]:
+        """Split image file indices into OCR batches of ocr_batch_images files."""
+        size = max(1, self.options.ocr_batch_images)
+        return [indices[start:start + size] for start in range(0, len(indices), size)]
+    
+    def _emit_progress(self, index: int, filename: str, page: Optional[int] = None,
+                       total_pages: Optional[int] = None) -> None:
+        """Send a ProgressEvent to the callback of the current run, if any."""
+        callback = getattr(self, '_progress_callback', None)
+        if callback is None:
+            return
+        callback(ProgressEvent(
+            filename=filename,
+            file_index=index,
+            files_done=self._files_done,
+            total_files=len(self._results),
+            page=page,
+            total_pages=total_pages,
+            result=self._results[index] if page is None else None
+        ))
+    
+    def _emit_page_progress(self, file, page_num: int, total_pages: int) -> None:
+        """Report a finished page of the file currently processed in this thread."""
+        if getattr(self, '_progress_callback', None) is not None:
+            self._emit_progress(self._current_index, file.name, page_num, total_pages)
+    
+    @staticmethod
+    def _success(filename: str, content: str) -> ProcessedFile:
+        return ProcessedFile(
+            filename=filename,
+            file_type=filename.split('.')[-1].upper(),
+            content=content,
+            success=True
+        )
+    
+    @staticmethod
+    def _failure(filename: str, error: Exception) -> ProcessedFile:
+        return ProcessedFile(
+            filename=filename,
+            file_type=filename.split('.')[-1].upper(),
+            content="",
+            success=False,
+            error_message=str(error)
+        )
+    
+    @staticmethod
+    def _partial(filename: str, content: str, reason: str) -> ProcessedFile:
+        """A file stopped before it finished: the content extracted so far, with the reason as error."""
+        return ProcessedFile(
+            filename=filename,
+            file_type=filename.split('.')[-1].upper(),
+            content=content,
+            success=True,
+            error_message=f"{reason}; only the content extracted before that is included"
+        )
+    
+    def _emit_partial(self, content: str, separator: str = "\n") -> None:
+        """
+        Report a finished part of the file being extracted (a PDF page, an
+        Excel sheet) to the BudgetWorker watching it, so it survives if the
+        file is stopped later. Joined with `separator` after the previous part.
+        """
+        if self._partial_callback is not None and content:
+            self._partial_callback(content, separator)
+    
+    @staticmethod
+    def _file_extension(filename: str) -> str:
+        return filename.split('.')[-1].lower()
     
     # ========================================================================
     # EXCEL PROCESSING
@@ -143,42 +804,187 @@ class DocumentProcessor:
            - Preserve all data types as strings to avoid data loss
         4. Combine all sheets with proper formatting
         
+        Large .xlsx files (see ProcessingOptions.excel_streaming_threshold_mb)
+        are read in streaming mode instead, see _stream_excel().
+        
         Args:
             file: Streamlit UploadedFile object
             
         Returns:
             Markdown string containing all sheets as tables
         """
+        import pandas as pd
+        
         content_parts = []
         
         # Read Excel file - use openpyxl for .xlsx, xlrd for .xls
         file_ext = file.name.split('.')[-1].lower()
+        
+        threshold_mb = self.options.excel_streaming_threshold_mb
+        if file_ext == 'xlsx' and threshold_mb is not None and self._file_size(file) >= threshold_mb * 1024 * 1024:
+            with self._stage('excel_stream'):
+                chunks = []
+                for chunk in self._stream_excel(file):
+                    chunks.append(chunk)
+                    self._emit_partial(chunk, "")
+                return "".join(chunks)
+        
         engine = 'openpyxl' if file_ext == 'xlsx' else 'xlrd'
         
-        # Read all sheets into a dictionary
-        excel_file = pd.ExcelFile(file, engine=engine)
-        sheet_names = excel_file.sheet_names
-        
-        for sheet_name in sheet_names:
-            # Read each sheet, keeping all data as strings to preserve original format
-            df = pd.read_excel(
-                excel_file, 
-                sheet_name=sheet_name,
-                dtype=str,  # Read all as string to preserve data
-                na_filter=False  # Don't convert empty cells to NaN
-            )
-            
-            if df.empty:
-                content_parts.append(f"### 📊 Sheet: {sheet_name}\n\n*Empty sheet*\n")
-                continue
-            
-            # Convert DataFrame to Markdown table
-            markdown_table = self._dataframe_to_markdown(df)
-            content_parts.append(f"### 📊 Sheet: {sheet_name}\n\n{markdown_table}\n")
+        # Read all sheets into a dictionary (from disk when possible: xlrd memory-maps paths)
+        with pd.ExcelFile(self._file_source(file), engine=engine) as excel_file:
+            for sheet_name in excel_file.sheet_names:
+                # Read each sheet, keeping all data as strings to preserve original format
+                with self._stage('excel_read'):
+                    df = pd.read_excel(
+                        excel_file, 
+                        sheet_name=sheet_name,
+                        dtype=str,  # Read all as string to preserve data
+                        na_filter=False  # Don't convert empty cells to NaN
+                    )
+                
+                if df.empty:
+                    content_parts.append(f"### 📊 Sheet: {sheet_name}\n\n*Empty sheet*\n")
+                else:
+                    # Convert DataFrame to Markdown table
+                    with self._stage('excel_render'):
+                        markdown_table = self._dataframe_to_markdown(df)
+                    content_parts.append(f"### 📊 Sheet: {sheet_name}\n\n{markdown_table}\n")
+                self._emit_partial(content_parts[-1])
         
         return "\n".join(content_parts)
     
-    def _dataframe_to_markdown(self, df: pd.DataFrame) -> str:
+    def _stream_excel(self, file) -> Iterator[str]:
+        """
+        Stream an .xlsx workbook as Markdown chunks with bounded memory.
+        
+        STREAMING LOGIC:
+        1. Open the workbook with openpyxl in read-only mode (rows are parsed
+           lazily from the XML instead of building every cell object)
+        2. For each sheet, take the first row as header
+        3. Render rows in chunks of `excel_stream_chunk_rows` through the
+           shared table kernel and yield each chunk immediately
+        4. Trailing empty rows are dropped (as pandas does); only a counter
+           of pending empty rows is kept
+        
+        Peak memory depends on the chunk size, not on the sheet size.
+        Output matches the pandas path for regular sheets.
+        
+        Args:
+            file: Streamlit UploadedFile object (or any binary file object)
+            
+        Yields:
+            Markdown text chunks; joined they form the same layout as _process_excel()
+        """
+        import openpyxl
+        import pandas as pd
+        
+        file.seek(0)
+        workbook = openpyxl.load_workbook(self._file_source(file), read_only=True, data_only=True)
+        chunk_rows = max(1, self.options.excel_stream_chunk_rows)
+        
+        try:
+            for sheet_idx, worksheet in enumerate(workbook.worksheets):
+                if sheet_idx:
+                    yield "\n"
+                yield f"### 📊 Sheet: {worksheet.title}\n\n"
+                
+                rows = worksheet.iter_rows(values_only=True)
+                header_row = next(rows, None)
+                if header_row is None:
+                    yield "*Empty sheet*\n"
+                    continue
+                
+                width = max(len(header_row), worksheet.max_column or 0)
+                headers = self._excel_headers(header_row, width)
+                
+                chunk: List[List[str]] = []
+                pending_empty = 0  # Empty rows held back until a non-empty row follows
+                header_written = False
+                
+                for row in rows:
+                    cells = [self._excel_cell_to_str(value) for value in row]
+                    if not any(cells):
+                        pending_empty += 1
+                        continue
+                    
+                    chunk.extend([[""] * width] * pending_empty)
+                    pending_empty = 0
+                    cells.extend([""] * (width - len(cells)))
+                    chunk.append(cells)
+                    
+                    if len(chunk) >= chunk_rows:
+                        if not header_written:
+                            yield self._render_markdown_header(headers)
+                            header_written = True
+                        yield self._render_markdown_rows(pd.DataFrame(chunk, dtype=object))
+                        chunk = []
+                
+                if chunk:
+                    if not header_written:
+                        yield self._render_markdown_header(headers)
+                        header_written = True
+                    yield self._render_markdown_rows(pd.DataFrame(chunk, dtype=object))
+                
+                yield "\n" if header_written else "*Empty sheet*\n"
+        finally:
+            workbook.close()
+    
+    def _excel_headers(self, header_row: tuple, width: int) -> List[str]:
+        """
+        Build column names the way pandas does: blanks -> 'Unnamed: i',
+        duplicates -> 'name.n' with the first n not used by any column.
+        
+        Port of the deduplication loop of pandas' Python parser (used by
+        read_excel). Raw values are compared, not their text, so 1.0 and
+        True count as the same name; named columns are handled before
+        unnamed ones.
+        """
+        columns = []
+        unnamed = []
+        for idx in range(width):
+            value = header_row[idx] if idx < len(header_row) else None
+            if isinstance(value, float) and value.is_integer():
+                value = int(value)  # As pandas' openpyxl reader converts cells
+            if value is None or value == "":
+                value = f"Unnamed: {idx}"
+                unnamed.append(idx)
+            columns.append(value)
+        
+        counts: Dict = {}
+        for idx in [idx for idx in range(width) if idx not in unnamed] + unnamed:
+            column = original = columns[idx]
+            count = counts.get(column, 0)
+            while count > 0:
+                counts[original] = count + 1
+                column = f"{original}.{count}"
+                count = count + 1 if column in columns else counts.get(column, 0)
+            columns[idx] = column
+            counts[column] = count + 1
+        return [str(column) for column in columns]
+    
+    @staticmethod
+    def _excel_cell_to_str(value) -> str:
+        """Convert an openpyxl cell value to text like pandas dtype=str does."""
+        if value is None:
+            return ""
+        if isinstance(value, float) and value.is_integer():
+            return str(int(value))
+        return str(value)
+    
+    @staticmethod
+    def _file_size(file) -> int:
+        """Size of an uploaded file in bytes without reading it."""
+        size = getattr(file, 'size', None)
+        if size is not None:
+            return size
+        position = file.tell()
+        file.seek(0, io.SEEK_END)
+        size = file.tell()
+        file.seek(position)
+        return size
+    
+    def _dataframe_to_markdown(self, df: 'pd.DataFrame') -> str:
         """
         Convert a pandas DataFrame to a Markdown table.
         
@@ -191,22 +997,73 @@ class DocumentProcessor:
         if df.empty:
             return "*No data*"
         
-        # Create header row
-        headers = " | ".join(str(col) for col in df.columns)
-        separator = " | ".join(["---"] * len(df.columns))
+        return self._render_markdown_table([str(col) for col in df.columns], df)
+    
+    # ========================================================================
+    # TABLE RENDERING (shared by Excel, Word and PDF)
+    # ========================================================================
+    
+    def _render_markdown_table(self, headers: List[str], data: 'pd.DataFrame',
+                               strip: bool = False) -> str:
+        """
+        Render a header row and a DataFrame of cells as a Markdown table.
         
-        # Create data rows
-        rows = []
-        for _, row in df.iterrows():
-            row_str = " | ".join(str(val).replace("|", "\\|").replace("\n", " ") for val in row)
-            rows.append(row_str)
+        This is the single table kernel used by every extractor. Cells are
+        escaped column by column with vectorized string operations and the
+        table is assembled with one join, so cost is linear in cell count.
         
-        # Combine into table
-        table = f"| {headers} |\n| {separator} |\n"
-        for row in rows:
-            table += f"| {row} |\n"
+        Args:
+            headers: Header cell values (one per column of `data`)
+            data: Table body, one DataFrame column per table column
+            strip: Strip surrounding whitespace from every cell
+            
+        Returns:
+            Markdown formatted table string
+        """
+        return self._render_markdown_header(headers, strip) + self._render_markdown_rows(data, strip)
+    
+    def _render_markdown_header(self, headers: List[str], strip: bool = False) -> str:
+        """Render the header and separator lines of a Markdown table."""
+        import pandas as pd
+        
+        header_cells = self._escape_cells(pd.Series(headers, dtype=object), strip)
+        return (
+            f"| {' | '.join(header_cells)} |\n"
+            f"| {' | '.join(['---'] * len(header_cells))} |\n"
+        )
+    
+    def _render_markdown_rows(self, data: 'pd.DataFrame', strip: bool = False) -> str:
+        """Render table body rows only (no header), one line per DataFrame row."""
+        columns = [self._escape_cells(data.iloc[:, idx], strip) for idx in range(data.shape[1])]
+        lines = list(map("| {} |".format, map(" | ".join, zip(*columns))))
+        lines.append("")  # Trailing newline
+        return "\n".join(lines) if len(lines) > 1 else ""
+    
+    def _rows_to_markdown(self, rows: List[List]) -> str:
+        """
+        Render a list of rows (first row = header) as a Markdown table.
+        
+        Ragged rows are padded with empty cells to the widest row, and
+        None cells become empty strings.
+        """
+        import pandas as pd
         
-        return table
+        table = pd.DataFrame(rows, dtype=object).fillna("")
+        headers = table.iloc[0].tolist()
+        return self._render_markdown_table(headers, table.iloc[1:], strip=True)
+    
+    @staticmethod
+    def _escape_cells(values: 'pd.Series', strip: bool = False) -> List[str]:
+        """Escape a column of cells for Markdown: `|` -> `\\|`, newlines -> spaces."""
+        values = values.fillna("").astype(str)
+        if strip:
+            values = values.str.strip()
+        return (
+            values
+            .str.replace("|", "\\|", regex=False)
+            .str.replace("\n", " ", regex=False)
+            .tolist()
+        )
     
     # ========================================================================
     # WORD DOCUMENT PROCESSING
@@ -218,7 +1075,8 @@ class DocumentProcessor:
         
         EXTRACTION LOGIC:
         1. Load the document using python-docx
-        2. Iterate through document body elements in order
+        2. Iterate through document body elements in order (single pass,
+           each element wrapped directly as a Paragraph or Table)
         3. For paragraphs:
            - Detect heading styles and convert to Markdown headers
            - Preserve paragraph text exactly as written
@@ -233,31 +1091,42 @@ class DocumentProcessor:
         Returns:
             Markdown string with document content
         """
-        doc = Document(file)
+        from docx import Document
+        from docx.oxml.table import CT_Tbl
+        from docx.oxml.text.paragraph import CT_P
+        from docx.table import Table as DocxTable
+        from docx.text.paragraph import Paragraph
+        
+        with self._stage('word_parse'):
+            doc = Document(self._file_source(file))
         content_parts = []
+        body = doc._body
+        style_names: Dict[Optional[str], Optional[str]] = {}  # style id -> style name
         
-        for element in doc.element.body:
+        # Single pass over the body: wrap each element directly instead of
+        # searching doc.paragraphs / doc.tables (rebuilt on every access)
+        for element in doc.element.body.iterchildren():
             # Check if element is a paragraph
-            if element.tag.endswith('p'):
-                for para in doc.paragraphs:
-                    if para._element == element:
-                        text = para.text.strip()
-                        if text:
-                            # Check for heading styles
-                            if para.style and para.style.name.startswith('Heading'):
-                                level = self._get_heading_level(para.style.name)
-                                content_parts.append(f"{'#' * level} {text}\n")
-                            else:
-                                content_parts.append(f"{text}\n")
-                        break
+            if isinstance(element, CT_P):
+                para = Paragraph(element, body)
+                text = para.text.strip()
+                if text:
+                    # Check for heading styles (resolve each style id only once)
+                    style_id = element.style
+                    if style_id not in style_names:
+                        style_names[style_id] = para.style.name if para.style else None
+                    style_name = style_names[style_id]
+                    
+                    if style_name and style_name.startswith('Heading'):
+                        level = self._get_heading_level(style_name)
+                        content_parts.append(f"{'#' * level} {text}\n")
+                    else:
+                        content_parts.append(f"{text}\n")
             
             # Check if element is a table
-            elif element.tag.endswith('tbl'):
-                for table in doc.tables:
-                    if table._element == element:
-                        markdown_table = self._word_table_to_markdown(table)
-                        content_parts.append(f"\n{markdown_table}\n")
-                        break
+            elif isinstance(element, CT_Tbl):
+                markdown_table = self._word_table_to_markdown(DocxTable(element, body))
+                content_parts.append(f"\n{markdown_table}\n")
         
         return "\n".join(content_parts)
     
@@ -268,28 +1137,15 @@ class DocumentProcessor:
             return min(int(match.group()), 6)  # Max heading level is 6
         return 2  # Default to H2
     
-    def _word_table_to_markdown(self, table: DocxTable) -> str:
+    def _word_table_to_markdown(self, table: 'DocxTable') -> str:
         """Convert Word table to Markdown format."""
-        rows = []
-        for row in table.rows:
-            cells = [cell.text.strip().replace("|", "\\|").replace("\n", " ") for cell in row.cells]
-            rows.append(cells)
+        rows = [[cell.text for cell in row.cells] for row in table.rows]
         
         if not rows:
             return "*Empty table*"
         
         # Use first row as header
-        headers = " | ".join(rows[0])
-        separator = " | ".join(["---"] * len(rows[0]))
-        
-        table_md = f"| {headers} |\n| {separator} |\n"
-        for row in rows[1:]:
-            # Pad row if necessary
-            while len(row) < len(rows[0]):
-                row.append("")
-            table_md += f"| {' | '.join(row)} |\n"
-        
-        return table_md
+        return self._rows_to_markdown(rows)
     
     # ========================================================================
     # PDF PROCESSING
@@ -302,14 +1158,24 @@ class DocumentProcessor:
         EXTRACTION LOGIC using pdfplumber:
         1. Open PDF with pdfplumber (better table detection than PyPDF2)
         2. Iterate through each page:
+           - Triage: skip table detection on pages that cannot contain a
+             ruled table (see _pdf_page_triage)
            - Extract tables first using pdfplumber's table detection
            - Tables are detected based on cell boundaries and lines
-           - For non-table content, extract text using extract_text()
+           - For non-table content, extract text outside the table areas
         3. Table extraction strategy:
            - pdfplumber uses cell boundary detection
            - Tables are converted to Markdown format
            - Each table is separated from text content
         4. Page numbers are added for reference
+        5. With ProcessingOptions.workers > 1, PDFs of at least
+           pdf_parallel_min_pages pages are split across worker processes
+        6. Pages without a text layer (scans) are rendered and OCR'd
+           afterwards, in batches on the shared engine (_fill_scanned_pages)
+        7. Only pages pdf_first_page..pdf_last_page are extracted, one page
+           at a time, stopping early at pdf_max_output_chars (_extract_pdf_range)
+        8. With pdf_text_engine='pdfium', pages without any ruling line are
+           read through pdfium's text layer instead (_extract_pdfium_page)
         
         Why pdfplumber?
         - Better table detection algorithm
@@ -323,44 +1189,497 @@ class DocumentProcessor:
         Returns:
             Markdown string with extracted content
         """
-        content_parts = []
+        import pdfplumber
+        
+        workers = resolve_workers(self.options.workers)
         
-        with pdfplumber.open(file) as pdf:
+        self._scanned_pages = {}
+        with pdfplumber.open(self._file_source(file)) as pdf:
             total_pages = len(pdf.pages)
+            selected = self._pdf_page_range(total_pages)
             
-            for page_num, page in enumerate(pdf.pages, 1):
-                page_content = []
-                page_content.append(f"#### 📄 Page {page_num}/{total_pages}\n")
-                
-                # Extract tables from the page
-                # pdfplumber detects tables based on:
-                # - Explicit line boundaries
-                # - Cell spacing patterns
-                # - Text alignment
-                tables = page.extract_tables()
-                
-                if tables:
-                    # Process each detected table
-                    for table_idx, table in enumerate(tables, 1):
-                        if table and len(table) > 0:
-                            markdown_table = self._pdf_table_to_markdown(table)
-                            page_content.append(f"**Table {table_idx}:**\n\n{markdown_table}\n")
+            sequential = workers <= 1 or len(selected) < self.options.pdf_parallel_min_pages
+            if sequential:
+                # pdfium reads the file itself, never through pdfplumber's stream
+                path, is_temp = (
+                    self._spool_to_disk(file) if self.options.pdf_text_engine == 'pdfium' else (None, False)
+                )
+                try:
+                    content_parts = self._extract_pdf_range(
+                        pdf, selected,
+                        on_page=lambda done: self._emit_page_progress(file, done, len(selected)),
+                        path=path
+                    )
+                finally:
+                    if is_temp:
+                        os.unlink(path)
+        
+        if sequential:
+            # Scans are rendered by pdfium, so only once pdfplumber is done with the stream
+            self._fill_scanned_pages(
+                self._file_source(file), content_parts, self._scanned_pages, total_pages, selected.start + 1
+            )
+        else:
+            # Large PDF: extract page ranges in worker processes
+            content_parts = self._extract_pdf_pages_parallel(file, selected, total_pages, workers)
+        return "\n".join(self._pdf_range_note(selected, total_pages) + content_parts)
+    
+    def _pdf_page_range(self, total_pages: int) -> range:
+        """0-based indices of the pages selected by pdf_first_page / pdf_last_page."""
+        first = max(1, self.options.pdf_first_page)
+        last = min(self.options.pdf_last_page or total_pages, total_pages)
+        return range(first - 1, max(first - 1, last))
+    
+    @staticmethod
+    def _pdf_range_note(selected: range, total_pages: int) -> List[str]:
+        """Note at the top of the output when only part of the document is extracted."""
+        if len(selected) == total_pages:
+            return []
+        if not selected:
+            return [f"*No pages selected: the document has {total_pages} page(s)*\n"]
+        return [f"*Extracted pages {selected.start + 1}-{selected.stop} of {total_pages}*\n"]
+    
+    def _pdf_chunks(self, selected: range, chunks: int) -> List[range]:
+        """
+        Split the selected pages into page-index ranges for worker processes.
+        With an output budget the pages stay in one range, so extraction can
+        stop early in page order.
+        """
+        if self.options.pdf_max_output_chars > 0:
+            chunks = 1
+        return [
+            range(selected.start + chunk.start, selected.start + chunk.stop)
+            for chunk in split_range(len(selected), chunks)
+        ]
+    
+    def _extract_pdf_range(self, pdf, pages: range,
+                           on_page: Optional[Callable[[int], None]] = None,
+                           path: Optional[str] = None) -> List[str]:
+        """
+        Extract pages of an open pdfplumber PDF in order with bounded memory.
+        
+        pdfplumber caches parsed layout objects on every page, so each page
+        is closed (caches released) as soon as it is done. Once the output
+        reaches pdf_max_output_chars, the remaining pages are skipped and a
+        note is added.
+        
+        Args:
+            pdf: Open pdfplumber PDF
+            pages: 0-based page indices to extract
+            on_page: Called with the number of pages done after each page
+            path: Path of the PDF on disk, opened with pdfium when
+                pdf_text_engine is 'pdfium'
+            
+        Returns:
+            Markdown for each extracted page, in page order
+        """
+        total_pages = len(pdf.pages)
+        budget = self.options.pdf_max_output_chars
+        content_parts = []
+        output_chars = 0
+        
+        document = None
+        if path is not None and self.options.pdf_text_engine == 'pdfium':
+            import pypdfium2  # Installed with pdfplumber
+            document = pypdfium2.PdfDocument(path)
+        
+        try:
+            for done, idx in enumerate(pages, 1):
+                content = None
+                if document is not None:
+                    with self._stage('pdfium_text'):
+                        content = self._extract_pdfium_page(document, idx, total_pages)
+                if content is None:
+                    page = pdf.pages[idx]
+                    try:
+                        content = self._extract_pdf_page(page, idx + 1, total_pages)
+                    finally:
+                        page.close()
+                content_parts.append(content)
+                self._emit_partial(content)
+                output_chars += len(content)
+                if on_page is not None:
+                    on_page(done)
                 
-                # Extract remaining text content
-                # This captures text that is NOT part of detected tables
-                text = page.extract_text()
-                if text:
-                    # Clean up the text
-                    cleaned_text = self._clean_pdf_text(text)
-                    if cleaned_text:
-                        page_content.append(f"\n{cleaned_text}\n")
+                if budget > 0 and output_chars >= budget and done < len(pages):
+                    content_parts.append(
+                        f"*Output limit of {budget:,} characters reached after page "
+                        f"{idx + 1}/{total_pages}; the remaining pages were skipped.*\n"
+                    )
+                    break
+        finally:
+            if document is not None:
+                document.close()
+        
+        return content_parts
+    
+    def _extract_pdfium_page(self, document, idx: int, total_pages: int) -> Optional[str]:
+        """
+        Extract one page through pdfium's text layer (C++, no layout parsing
+        in Python), if the page is plain text.
+        
+        A page is handled here only if it has characters and no ruling lines
+        that could form a table (_pdfium_may_have_table). Everything else
+        (tables, scans) returns None and goes through pdfplumber as usual.
+        
+        Args:
+            document: Open pypdfium2 PdfDocument
+            idx: 0-based page index
+            total_pages: Number of pages in the document
+            
+        Returns:
+            Markdown for the page, or None if pdfplumber must handle it
+        """
+        page = document[idx]
+        try:
+            if self._pdfium_may_have_table(page):
+                return None
+            text_page = page.get_textpage()
+            try:
+                if text_page.count_chars() == 0:
+                    return None  # Possibly a scan: pdfplumber triage decides
+                text = text_page.get_text_range()
+            finally:
+                text_page.close()
+        finally:
+            page.close()
+        
+        self.pdf_page_stats['text_only'] += 1
+        header = f"#### 📄 Page {idx + 1}/{total_pages}\n"
+        cleaned_text = self._clean_pdf_text(text.replace('\r\n', '\n').replace('\r', '\n'))
+        if cleaned_text:
+            return f"{header}\n\n{cleaned_text}\n"
+        return f"{header}\n*No extractable content*\n"
+    
+    @staticmethod
+    def _pdfium_may_have_table(page) -> bool:
+        """
+        pdfium counterpart of the ruling-line test in _pdf_page_triage.
+        
+        Path objects at most 3 points thick count as one horizontal or
+        vertical edge; any other path (rectangle, curve, a grid drawn as one
+        path) counts as two of each. Like pdfplumber's "lines" strategy, a
+        table needs at least two edges of each orientation.
+        """
+        import pypdfium2.raw as pdfium_c
+        
+        line_width = 3  # Bounds include the stroke width
+        horizontal = vertical = 0
+        for obj in page.get_objects(filter=(pdfium_c.FPDF_PAGEOBJ_PATH,)):
+            left, bottom, right, top = obj.get_bounds()
+            if top - bottom <= line_width:
+                horizontal += 1
+            elif right - left <= line_width:
+                vertical += 1
+            else:
+                horizontal += 2
+                vertical += 2
+            if horizontal >= 2 and vertical >= 2:
+                return True
+        return False
+    
+    def _extract_pdf_pages_parallel(self, file, selected: range, total_pages: int, workers: int) -> List[str]:
+        """
+        Extract PDF pages in worker processes.
+        
+        The page range is split into contiguous chunks (a few per worker for
+        load balancing). Every worker opens the PDF from disk itself, so the
+        file is spooled to a temporary file once if it is not on disk yet.
+        Results are collected in chunk order, keeping page order intact.
+        
+        Args:
+            file: Streamlit UploadedFile object
+            selected: 0-based indices of the pages to extract
+            total_pages: Number of pages in the document
+            workers: Number of worker processes
+            
+        Returns:
+            Markdown for each page, in page order
+        """
+        path, is_temp = self._spool_to_disk(file)
+        try:
+            pool = get_process_pool(workers)
+            options = asdict(self.options)
+            futures = [
+                pool.submit(extract_pdf_pages, path, pages.start, pages.stop, options)
+                for pages in self._pdf_chunks(selected, workers * 4)
+            ]
+            results = []
+            scanned_pages = {}
+            for future in futures:
+                pages, page_stats, scanned, stages = future.result()
+                self.pdf_page_stats.update(page_stats)
+                self._merge_stages(stages)
+                scanned_pages.update(scanned)
+                results.extend(pages)
+            self._fill_scanned_pages(path, results, scanned_pages, total_pages, selected.start + 1)
+            return results
+        finally:
+            if is_temp:
+                os.unlink(path)
+    
+    def _extract_pdf_page(self, page, page_num: int, total_pages: int) -> str:
+        """
+        Extract tables and text from one pdfplumber page.
+        
+        Args:
+            page: pdfplumber Page object
+            page_num: 1-based page number
+            total_pages: Number of pages in the document
+            
+        Returns:
+            Markdown for the page, starting with its "#### 📄 Page n/N" header.
+            Empty for a scanned page; its number and content hash are added
+            to self._scanned_pages for _fill_scanned_pages()
+        """
+        page_content = []
+        page_content.append(f"#### 📄 Page {page_num}/{total_pages}\n")
+        
+        with self._stage('pdf_triage'):
+            decision = self._pdf_page_triage(page)
+        if decision == 'no_text' and self.options.pdf_ocr_dpi > 0:
+            # Scanned page: OCR'd later together with the other scans
+            self.pdf_page_stats['ocr'] += 1
+            self._scanned_pages[page_num] = self._pdf_page_hash(page)
+            return ""
+        self.pdf_page_stats[decision] += 1
+        text_page = page
+        
+        if decision == 'tables':
+            # Extract tables from the page
+            # pdfplumber detects tables based on:
+            # - Explicit line boundaries
+            # - Cell spacing patterns
+            # - Text alignment
+            with self._stage('pdf_tables'):
+                tables = page.find_tables()
                 
-                if len(page_content) > 1:  # More than just page header
-                    content_parts.append("\n".join(page_content))
-                else:
-                    content_parts.append(f"#### 📄 Page {page_num}/{total_pages}\n\n*No extractable content*\n")
+                # Process each detected table
+                for table_idx, table in enumerate(tables, 1):
+                    rows = table.extract()
+                    if rows and len(rows) > 0:
+                        markdown_table = self._pdf_table_to_markdown(rows)
+                        page_content.append(f"**Table {table_idx}:**\n\n{markdown_table}\n")
+            
+            if tables:
+                # Text of table cells is already in the tables above
+                bboxes = [table.bbox for table in tables]
+                text_page = page.filter(lambda obj: not self._in_bboxes(obj, bboxes))
+        
+        # Extract remaining text content
+        # This captures text that is NOT part of detected tables. The filtered
+        # page shares the parsed objects of the page, so the layout is parsed once.
+        with self._stage('pdf_text'):
+            text = text_page.extract_text() if decision != 'no_text' else None
+        if text:
+            # Clean up the text
+            cleaned_text = self._clean_pdf_text(text)
+            if cleaned_text:
+                page_content.append(f"\n{cleaned_text}\n")
+        
+        if len(page_content) > 1:  # More than just page header
+            return "\n".join(page_content)
+        return f"#### 📄 Page {page_num}/{total_pages}\n\n*No extractable content*\n"
+    
+    @staticmethod
+    def _pdf_page_triage(page) -> str:
+        """
+        Decide cheaply which extraction steps a PDF page needs.
         
-        return "\n".join(content_parts)
+        pdfplumber's default table finder ("lines" strategy) builds cells
+        from ruling lines only: page.edges, i.e. lines, rectangle sides and
+        curves. A table needs at least two horizontal and two vertical edges,
+        so pages without them are never sent to the (expensive) table finder.
+        
+        Returns:
+            'no_text' (no characters), 'text_only' (no possible table) or
+            'tables' (run table detection)
+        """
+        if not page.chars:
+            return 'no_text'
+        if not (page.lines or page.rects or page.curves):
+            return 'text_only'
+        
+        edges = page.edges
+        horizontal = sum(1 for edge in edges if edge['orientation'] == 'h')
+        vertical = len(edges) - horizontal
+        return 'tables' if horizontal >= 2 and vertical >= 2 else 'text_only'
+    
+    @staticmethod
+    def _in_bboxes(obj: Dict, bboxes: List[Tuple]) -> bool:
+        """Whether the center of a pdfplumber char lies in one of the (x0, top, x1, bottom) boxes."""
+        if obj['object_type'] != 'char':
+            return False  # Only text matters for extract_text()
+        center_x = (obj['x0'] + obj['x1']) / 2
+        center_y = (obj['top'] + obj['bottom']) / 2
+        return any(x0 <= center_x < x1 and top <= center_y < bottom for x0, top, x1, bottom in bboxes)
+    
+    @staticmethod
+    def _pdf_page_hash(page) -> str:
+        """
+        SHA-256 of what a page looks like: its size, rotation, content streams
+        and the data of the images and forms it draws (nested forms included).
+        Used as cache key of the page's OCR text, so it does not need rendering.
+        """
+        from pdfminer.pdftypes import PDFStream, resolve1
+        
+        page_obj = page.page_obj
+        digest = hashlib.sha256(repr((page_obj.mediabox, page_obj.rotate)).encode())
+        
+        def stream_bytes(stream: 'PDFStream') -> bytes:
+            # Content streams are already decoded by parsing (rawdata is then None)
+            return stream.rawdata if stream.rawdata is not None else stream.get_data()
+        
+        for stream in page_obj.contents:
+            stream = resolve1(stream)
+            if isinstance(stream, PDFStream):
+                digest.update(stream_bytes(stream))
+        
+        seen = set()
+        pending = [page_obj.resources]
+        while pending:
+            xobjects = resolve1((resolve1(pending.pop()) or {}).get('XObject')) or {}
+            for name in sorted(xobjects, key=str):
+                ref = xobjects[name]
+                ref_id = getattr(ref, 'objid', None)
+                if ref_id is not None and ref_id in seen:
+                    continue
+                seen.add(ref_id)
+                stream = resolve1(ref)
+                if isinstance(stream, PDFStream):
+                    digest.update(str(name).encode())
+                    digest.update(stream_bytes(stream))
+                    if 'Resources' in stream.attrs:
+                        pending.append(stream.attrs['Resources'])
+        return digest.hexdigest()
+    
+    def _fill_scanned_pages(self, source, pages: List[str], scanned_pages: Dict[int, str],
+                            total_pages: int, first_page: int = 1) -> None:
+        """
+        OCR the scanned pages of a PDF and put their Markdown into `pages`.
+        
+        Text of each page is cached by page content hash (_pdf_page_hash), so
+        pages seen before are neither rendered nor OCR'd again. The others are
+        rendered with pdfium at pdf_ocr_dpi and OCR'd ocr_batch_images at a
+        time on the shared engine.
+        
+        Args:
+            source: The PDF (file object or path)
+            pages: Markdown of every extracted page, in page order; updated in place
+            scanned_pages: 1-based page number -> page content hash
+            total_pages: Number of pages in the document
+            first_page: Page number of pages[0]
+        """
+        if not scanned_pages:
+            return
+        
+        cache = get_result_cache('ocr_pages') if self.options.use_cache else None
+        ocr_options = {
+            key: value for key, value in self.options.output_options().items()
+            if key.startswith(('ocr_', 'pdf_ocr_'))
+        }
+        keys = {
+            page_num: make_key(page_hash, 'pdf-page', EXTRACTOR_VERSION, ocr_options)
+            for page_num, page_hash in scanned_pages.items()
+        }
+        
+        texts: Dict[int, str] = {}
+        for page_num, key in keys.items():
+            cached = cache.get(key) if cache is not None else None
+            if cached is not None:
+                texts[page_num] = cached
+        
+        missing = sorted(page_num for page_num in scanned_pages if page_num not in texts)
+        if missing:
+            import pypdfium2  # Installed with pdfplumber
+            
+            if hasattr(source, 'seek'):
+                source.seek(0)
+            document = pypdfium2.PdfDocument(source)
+            try:
+                batch_size = max(1, self.options.ocr_batch_images)
+                for start in range(0, len(missing), batch_size):
+                    batch = missing[start:start + batch_size]
+                    with self._stage('pdf_render'):
+                        image_arrays = [self._render_pdf_page(document, page_num) for page_num in batch]
+                    with self._stage('pdf_ocr'):
+                        batch_results = self._ocr_arrays(image_arrays)
+                    for page_num, results in zip(batch, batch_results):
+                        texts[page_num] = "\n".join(self._ocr_lines(results))
+                        if cache is not None:
+                            cache.put(keys[page_num], f"page {page_num}", texts[page_num])
+            finally:
+                document.close()
+        
+        for page_num, text in texts.items():
+            header = f"#### 📄 Page {page_num}/{total_pages}\n"
+            if text:
+                pages[page_num - first_page] = f"{header}\n*Text recognized by OCR (no text layer)*\n\n{text}\n"
+            else:
+                pages[page_num - first_page] = f"{header}\n*No extractable content*\n"
+    
+    def _render_pdf_page(self, document, page_num: int) -> 'np.ndarray':
+        """Render one page of a pypdfium2 document at pdf_ocr_dpi as a uint8 array."""
+        import numpy as np
+        
+        page = document[page_num - 1]
+        try:
+            bitmap = page.render(scale=self.options.pdf_ocr_dpi / 72, grayscale=self.options.ocr_grayscale)
+            image = bitmap.to_pil()
+            image = image.convert('L' if self.options.ocr_grayscale else 'RGB')
+            return np.asarray(image, dtype=np.uint8)
+        finally:
+            page.close()
+    
+    @staticmethod
+    def _file_path(file) -> Optional[str]:
+        """Path of a file that is on disk (SpooledUpload, open_local_file), else None; never the `name`."""
+        path = getattr(file, 'path', None)
+        if isinstance(path, str) and os.path.isfile(path):
+            return path
+        return None
+    
+    def _file_source(self, file):
+        """What to hand to a parsing library: the path if the file is on disk, else the file object."""
+        return self._file_path(file) or file
+    
+    def _spool_upload(self, file):
+        """
+        Spool a large in-memory upload to disk once (SpooledUpload), so
+        libraries read it from a path instead of the upload's buffer.
+        
+        Returns:
+            A SpooledUpload the caller must close, or `file` itself
+        """
+        threshold_mb = self.options.upload_spool_threshold_mb
+        if (threshold_mb is None or self._file_path(file) is not None
+                or self._file_size(file) < threshold_mb * 1024 * 1024):
+            return file
+        with self._stage('spool'):
+            return SpooledUpload(file)
+    
+    @classmethod
+    def _spool_to_disk(cls, file) -> Tuple[str, bool]:
+        """
+        Return a filesystem path for an uploaded file.
+        
+        Only a file already on disk (see _file_path) is used as is;
+        anything else is copied from its bytes, never looked up by its name.
+        
+        Returns:
+            (path, is_temp) - is_temp is True when a temporary copy was
+            written and must be deleted by the caller
+        """
+        path = cls._file_path(file)
+        if path is not None:
+            return path, False
+        
+        suffix = os.path.splitext(getattr(file, 'name', None) or '')[1]
+        file.seek(0)
+        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
+            shutil.copyfileobj(file, tmp)
+        file.seek(0)
+        return tmp.name, True
     
     def _pdf_table_to_markdown(self, table: List[List]) -> str:
         """
@@ -375,36 +1694,13 @@ class DocumentProcessor:
         if not table or len(table) == 0:
             return "*Empty table*"
         
-        # Clean table cells
-        cleaned_table = []
-        for row in table:
-            if row:
-                cleaned_row = [
-                    str(cell or "").strip().replace("|", "\\|").replace("\n", " ")
-                    for cell in row
-                ]
-                cleaned_table.append(cleaned_row)
-        
-        if not cleaned_table:
-            return "*Empty table*"
-        
-        # Determine max columns
-        max_cols = max(len(row) for row in cleaned_table)
-        
-        # Pad rows to have consistent columns
-        for row in cleaned_table:
-            while len(row) < max_cols:
-                row.append("")
-        
-        # Create Markdown table
-        headers = " | ".join(cleaned_table[0])
-        separator = " | ".join(["---"] * max_cols)
+        # Drop empty rows; first remaining row is the header
+        rows = [row for row in table if row]
         
-        table_md = f"| {headers} |\n| {separator} |\n"
-        for row in cleaned_table[1:]:
-            table_md += f"| {' | '.join(row)} |\n"
+        if not rows:
+            return "*Empty table*"
         
-        return table_md
+        return self._rows_to_markdown(rows)
     
     def _clean_pdf_text(self, text: str) -> str:
         """Clean extracted PDF text."""
@@ -438,22 +1734,91 @@ class DocumentProcessor:
         Returns:
             Text content as string
         """
-        # Try different encodings
-        encodings = ['utf-8', 'utf-8-sig', 'latin-1', 'cp1252']
-        content = None
+        return self._read_text(file)
+    
+    def _read_text(self, file) -> str:
+        """
+        Decode a text file (.txt, .md) chunk by chunk, with bounded memory.
+        
+        The encoding comes from a sample at the start of the file
+        (_detect_text_encoding). Bytes further into the file that are not
+        valid in that encoding are decoded as latin-1 one by one, so the
+        file is never read twice; a file that is valid UTF-8 only in its
+        sample therefore stays UTF-8 apart from the bad bytes. With
+        text_max_chars, reading stops at the limit and a note is added, so
+        huge files are never read completely. Without it, the whole decoded
+        text is returned as one string: ProcessedFile.content, the result
+        cache and the report writer all take a string, so text is not
+        streamed into the report.
         
-        for encoding in encodings:
-            try:
-                file.seek(0)
-                content = file.read().decode(encoding)
+        Args:
+            file: Streamlit UploadedFile object
+            
+        Returns:
+            Decoded text without leading/trailing whitespace
+        """
+        limit = self.options.text_max_chars
+        parts: List[str] = []
+        chars = 0
+        truncated = False
+        
+        for chunk in self._iter_decoded_text(file, self._detect_text_encoding(file)):
+            if limit and chars + len(chunk) > limit:
+                parts.append(chunk[:limit - chars])
+                truncated = True
                 break
-            except UnicodeDecodeError:
-                continue
+            parts.append(chunk)
+            chars += len(chunk)
+        
+        # Strip the ends chunk by chunk, so join() is the only full copy
+        while parts and not parts[-1].strip():
+            parts.pop()
+        start = next((idx for idx, part in enumerate(parts) if part.strip()), len(parts))
+        parts = parts[start:]
+        if parts:
+            parts[0] = parts[0].lstrip()
+            parts[-1] = parts[-1].rstrip()
+        if truncated:
+            parts.append(f"\n\n*Truncated after {limit:,} characters*")
+        return "".join(parts)
+    
+    @staticmethod
+    def _detect_text_encoding(file) -> str:
+        """
+        Guess the encoding of a text file from its first TEXT_SAMPLE_BYTES.
         
-        if content is None:
-            raise ValueError("Unable to decode text file with supported encodings")
+        Returns:
+            'utf-8-sig' / 'utf-16' for files with a byte order mark (the mark
+            is dropped when decoding), else 'utf-8' if the sample is valid
+            UTF-8, else 'latin-1'
+        """
+        file.seek(0)
+        sample = file.read(TEXT_SAMPLE_BYTES)
+        file.seek(0)
         
-        return content.strip()
+        if sample.startswith(codecs.BOM_UTF8):
+            return 'utf-8-sig'
+        if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+            return 'utf-16'
+        try:
+            # Not final: the sample may end inside a multi-byte character
+            codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+            return 'utf-8'
+        except UnicodeDecodeError:
+            return 'latin-1'
+    
+    @staticmethod
+    def _iter_decoded_text(file, encoding: str) -> Iterator[str]:
+        """Decode a binary file TEXT_CHUNK_BYTES at a time; invalid bytes become latin-1 characters."""
+        decoder = codecs.getincrementaldecoder(encoding)(errors='latin-1-fallback')
+        file.seek(0)
+        for block in iter(lambda: file.read(TEXT_CHUNK_BYTES), b""):
+            chunk = decoder.decode(block)
+            if chunk:
+                yield chunk
+        chunk = decoder.decode(b"", final=True)
+        if chunk:
+            yield chunk
     
     # ========================================================================
     # MARKDOWN FILE PROCESSING
@@ -464,7 +1829,8 @@ class DocumentProcessor:
         Process Markdown file (.md).
         
         EXTRACTION LOGIC:
-        1. Read the file content with encoding detection
+        1. Read the file content with encoding detection (shared with text
+           files, see _read_text)
         2. Preserve the Markdown content exactly as-is
         3. This allows MD files to be combined with other files
            or converted directly to HTML
@@ -473,79 +1839,286 @@ class DocumentProcessor:
             file: Streamlit UploadedFile object
             
         Returns:
-            Markdown content as string (preserved exactly)
+            Markdown content as string (preserved exactly)
+        """
+        # Return content as-is (it's already Markdown)
+        return self._read_text(file)
+    
+    # ========================================================================
+    # IMAGE PROCESSING (OCR)
+    # ========================================================================
+    
+    def _process_image(self, file) -> str:
+        """
+        Process image file (.png, .jpg, .jpeg) and extract text using OCR.
+        
+        EXTRACTION LOGIC using easyocr:
+        1. Load and preprocess the image (see _prepare_ocr_image): downscale,
+           grayscale, uint8 numpy array
+        2. Use easyocr to detect and extract text, in overlapping tiles for
+           very large images (see _ocr_tiles)
+        3. easyocr returns a list of (bbox, text, confidence) tuples
+        4. Combine all detected text preserving reading order
+        
+        Why easyocr?
+        - Pure Python, no external dependencies like Tesseract
+        - Deep learning based, better accuracy
+        - Supports 80+ languages including Vietnamese
+        - Handles various image qualities well
+        
+        Args:
+            file: Streamlit UploadedFile object
+            
+        Returns:
+            Markdown string with extracted text from image
+        """
+        (outcome,) = self._process_images_batched([file])
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    
+    def _process_images_batched(self, files: List,
+                                file_metrics: Optional[List[StageMetrics]] = None) -> List:
+        """
+        OCR several images with batched model calls.
+        
+        Every image is preprocessed and split into tiles, then the tiles of
+        all images go through the shared engine ocr_batch_images at a time
+        (OCREngine.readtext_batched) and the detections are mapped back to
+        their image.
+        
+        Args:
+            files: Image files (Streamlit UploadedFile objects)
+            file_metrics: Stage timings of each file. Preprocessing is timed
+                per file; the batched model call is split evenly between
+                the files that reached it
+            
+        Returns:
+            Per file, in order: its Markdown, or the Exception it failed with
+        """
+        file_metrics = file_metrics or [StageMetrics() for _ in files]
+        outcomes: List = [None] * len(files)
+        prepared = []  # (file position, original size, image array)
+        for position, file in enumerate(files):
+            try:
+                with file_metrics[position].stage('ocr_preprocess'):
+                    image_array, original_size = self._prepare_ocr_image(file)
+                prepared.append((position, original_size, image_array))
+            except Exception as e:
+                outcomes[position] = e
+        if not prepared:
+            return outcomes
+        
+        batch_metrics = StageMetrics()
+        try:
+            with batch_metrics.stage('ocr_readtext'):
+                all_results = self._ocr_arrays([image_array for _, _, image_array in prepared])
+        except Exception as e:
+            for position, _, _ in prepared:
+                outcomes[position] = e
+            return outcomes
+        finally:
+            for position, _, _ in prepared:
+                file_metrics[position].merge(batch_metrics.to_dict(), share=1 / len(prepared))
+        
+        for (position, (width, height), _), results in zip(prepared, all_results):
+            outcomes[position] = self._format_ocr_results(width, height, results)
+        return outcomes
+    
+    def _ocr_arrays(self, image_arrays: List['np.ndarray']) -> List[list]:
+        """
+        OCR preprocessed image arrays in batches on the shared engine.
+        
+        Large images are split into tiles (_ocr_tiles); the tiles of all
+        images go through OCREngine.readtext_batched together and are merged
+        back per image.
+        
+        Returns:
+            easyocr results (bbox, text, confidence) per image, in reading order
+        """
+        tiled = [self._ocr_tiles(image_array) for image_array in image_arrays]
+        
+        # Get the shared OCR engine (model loaded lazily, once per process)
+        engine = self._get_ocr_engine()
+        # detail=1 returns (bbox, text, confidence)
+        tile_results = iter(engine.readtext_batched(
+            [tile[0] for tiles in tiled for tile in tiles],
+            batch_images=self.options.ocr_batch_images,
+            batch_size=self.options.ocr_recognizer_batch_size,
+            workers=self.options.ocr_loader_workers,
+            detail=1,
+            paragraph=False
+        ))
+        return [self._merge_tiles(tiles, [next(tile_results) for _ in tiles]) for tiles in tiled]
+    
+    def _prepare_ocr_image(self, file) -> Tuple['np.ndarray', Tuple[int, int]]:
+        """
+        Load an image as the array handed to the OCR model.
+        
+        PREPROCESSING (ProcessingOptions.ocr_*):
+        - Downscale to ocr_target_dpi and to at most ocr_max_side pixels.
+          JPEGs are decoded directly at reduced scale (PIL draft mode), so a
+          48 MP photo is never fully decoded.
+        - Grayscale (mode L) uint8, or RGB when ocr_grayscale is off
+        
+        Args:
+            file: Streamlit UploadedFile object
+            
+        Returns:
+            (image array, original (width, height))
         """
-        # Try different encodings (same as text files)
-        encodings = ['utf-8', 'utf-8-sig', 'latin-1', 'cp1252']
-        content = None
+        import numpy as np
+        from PIL import Image
         
-        for encoding in encodings:
-            try:
-                file.seek(0)
-                content = file.read().decode(encoding)
-                break
-            except UnicodeDecodeError:
-                continue
+        file.seek(0)
+        image = Image.open(self._file_source(file))
+        original_size = image.size
+        mode = 'L' if self.options.ocr_grayscale else 'RGB'
+        
+        scale = self._ocr_scale(image)
+        target_size = tuple(max(1, round(side * scale)) for side in original_size)
+        if scale < 1:
+            image.draft(mode, target_size)  # No-op for formats other than JPEG
+        
+        # Convert to the working mode (e.g. RGBA, palette or RGB -> L)
+        if image.mode != mode:
+            image = image.convert(mode)
+        if image.size[0] > target_size[0]:
+            image = image.resize(target_size, Image.LANCZOS, reducing_gap=3.0)
+        
+        return np.asarray(image, dtype=np.uint8), original_size
+    
+    def _ocr_scale(self, image: 'PILImage') -> float:
+        """Downscale factor (<= 1) from the DPI target and the long-side cap."""
+        scale = 1.0
+        target_dpi = self.options.ocr_target_dpi
+        dpi = image.info.get('dpi')
+        if target_dpi > 0 and dpi and dpi[0] > target_dpi:
+            scale = target_dpi / float(dpi[0])
+        
+        max_side = self.options.ocr_max_side
+        long_side = max(image.size) * scale
+        if max_side > 0 and long_side > max_side:
+            scale *= max_side / long_side
+        return scale
+    
+    def _ocr_tiles(self, image_array: 'np.ndarray') -> List[Tuple['np.ndarray', int, int, Optional[Tuple]]]:
+        """
+        Split an image into the pieces handed to the OCR model.
         
-        if content is None:
-            raise ValueError("Unable to decode Markdown file with supported encodings")
+        Images larger than ocr_tile_size are split into tiles overlapping by
+        ocr_tile_overlap pixels (the detector would otherwise shrink them and
+        lose small text); others are a single piece.
         
-        # Return content as-is (it's already Markdown)
-        return content.strip()
-    
-    # ========================================================================
-    # IMAGE PROCESSING (OCR)
-    # ========================================================================
+        Returns:
+            (array, left, top, core) per piece. core is the
+            (left, top, right, bottom) area whose detections belong to this
+            tile, or None for an untiled image
+        """
+        import numpy as np
+        
+        height, width = image_array.shape[:2]
+        tile_size = self.options.ocr_tile_size
+        if tile_size <= 0 or max(width, height) <= tile_size:
+            return [(image_array, 0, 0, None)]
+        
+        overlap = min(self.options.ocr_tile_overlap, tile_size // 2)
+        tiles = []
+        for (top, bottom), (core_top, core_bottom) in self._tile_spans(height, tile_size, overlap):
+            for (left, right), (core_left, core_right) in self._tile_spans(width, tile_size, overlap):
+                tile = np.ascontiguousarray(image_array[top:bottom, left:right])
+                tiles.append((tile, left, top, (core_left, core_top, core_right, core_bottom)))
+        return tiles
     
-    def _process_image(self, file) -> str:
+    def _merge_tiles(self, tiles: List[Tuple], tile_results: List[list]) -> list:
         """
-        Process image file (.png, .jpg, .jpeg) and extract text using OCR.
+        Map per-tile OCR results back to image coordinates.
         
-        EXTRACTION LOGIC using easyocr:
-        1. Load the image using PIL (Pillow)
-        2. Convert to RGB format if necessary (for consistency)
-        3. Convert PIL Image to numpy array for easyocr
-        4. Use easyocr to detect and extract text
-        5. easyocr returns a list of (bbox, text, confidence) tuples
-        6. Combine all detected text preserving reading order
+        A detection is kept only by the tile whose core contains its center,
+        so text in overlaps is not duplicated.
         
-        Why easyocr?
-        - Pure Python, no external dependencies like Tesseract
-        - Deep learning based, better accuracy
-        - Supports 80+ languages including Vietnamese
-        - Handles various image qualities well
+        Returns:
+            easyocr results (bbox, text, confidence) in reading order
+        """
+        if len(tiles) == 1 and tiles[0][3] is None:
+            return tile_results[0]
+        
+        merged = []
+        for (_, left, top, (core_left, core_top, core_right, core_bottom)), results in zip(tiles, tile_results):
+            for bbox, text, confidence in results:
+                xs = [point[0] for point in bbox]
+                ys = [point[1] for point in bbox]
+                center_x = left + (min(xs) + max(xs)) / 2
+                center_y = top + (min(ys) + max(ys)) / 2
+                if core_left <= center_x < core_right and core_top <= center_y < core_bottom:
+                    merged.append(([[x + left, y + top] for x, y in bbox], text, confidence))
+        
+        return self._reading_order(merged)
+    
+    @staticmethod
+    def _tile_spans(length: int, tile_size: int, overlap: int) -> List[Tuple[Tuple[int, int], Tuple[float, float]]]:
+        """
+        Split one image axis into overlapping tiles of at most tile_size.
         
-        Args:
-            file: Streamlit UploadedFile object
-            
         Returns:
-            Markdown string with extracted text from image
+            ((start, end), (core_start, core_end)) per tile; cores are
+            contiguous and cover the whole axis
         """
-        content_parts = []
+        if length <= tile_size:
+            return [((0, length), (0, length))]
+        
+        count = -(-(length - overlap) // (tile_size - overlap))  # ceil
+        stride = (length - overlap) / count
+        spans = []
+        for idx in range(count):
+            start = round(idx * stride)
+            end = min(length, round(idx * stride + stride + overlap))
+            core_start = 0 if idx == 0 else idx * stride + overlap / 2
+            core_end = length if idx == count - 1 else (idx + 1) * stride + overlap / 2
+            spans.append(((start, end), (core_start, core_end)))
+        return spans
+    
+    @staticmethod
+    def _reading_order(results: list) -> list:
+        """Sort OCR results top to bottom into lines, then left to right within a line."""
+        if not results:
+            return results
         
-        # Load image
-        file.seek(0)
-        image = Image.open(file)
+        def top(result):
+            return min(point[1] for point in result[0])
         
-        # Convert to RGB if necessary (e.g., RGBA or grayscale)
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
+        def left(result):
+            return min(point[0] for point in result[0])
         
-        # Get image info for output
-        width, height = image.size
-        content_parts.append(f"**Image Size:** {width} × {height} pixels")
-        content_parts.append("")
+        heights = sorted(max(p[1] for p in r[0]) - top(r) for r in results)
+        line_gap = heights[len(heights) // 2] / 2  # Half the median text height
         
-        # Convert PIL Image to numpy array
-        image_array = np.array(image)
+        lines, current, line_top = [], [], None
+        for result in sorted(results, key=top):
+            if line_top is not None and top(result) - line_top > line_gap:
+                lines.append(current)
+                current = []
+            if not current:
+                line_top = top(result)
+            current.append(result)
+        lines.append(current)
         
-        # Get OCR reader (lazy initialization)
-        reader = self._get_ocr_reader()
+        return [result for line in lines for result in sorted(line, key=left)]
+    
+    def _format_ocr_results(self, width: int, height: int, results: list) -> str:
+        """
+        Render OCR results as Markdown.
         
-        # Perform OCR
-        # detail=1 returns (bbox, text, confidence)
-        # paragraph=True groups text into paragraphs
-        results = reader.readtext(image_array, detail=1, paragraph=False)
+        Args:
+            width: Original image width (pixels)
+            height: Original image height (pixels)
+            results: easyocr results (bbox, text, confidence) in reading order
+        """
+        content_parts = []
+        
+        # Get image info for output
+        content_parts.append(f"**Image Size:** {width} × {height} pixels")
+        content_parts.append("")
         
         if not results:
             content_parts.append("*No text detected in image*")
@@ -554,15 +2127,7 @@ class DocumentProcessor:
         content_parts.append("### 📝 Extracted Text")
         content_parts.append("")
         
-        # Process OCR results
-        # Results are sorted by position (top to bottom, left to right)
-        extracted_lines = []
-        for (bbox, text, confidence) in results:
-            if text.strip():
-                # Include confidence for transparency
-                # Only show if confidence is reasonable
-                if confidence >= 0.3:  # 30% minimum confidence
-                    extracted_lines.append(text.strip())
+        extracted_lines = self._ocr_lines(results)
         
         if extracted_lines:
             # Join lines with proper spacing
@@ -575,6 +2140,20 @@ class DocumentProcessor:
         
         return "\n".join(content_parts)
     
+    @staticmethod
+    def _ocr_lines(results: list) -> List[str]:
+        """Text lines of OCR results that pass the confidence threshold."""
+        # Process OCR results
+        # Results are sorted by position (top to bottom, left to right)
+        extracted_lines = []
+        for (bbox, text, confidence) in results:
+            if text.strip():
+                # Include confidence for transparency
+                # Only show if confidence is reasonable
+                if confidence >= 0.3:  # 30% minimum confidence
+                    extracted_lines.append(text.strip())
+        return extracted_lines
+    
     # ========================================================================
     # CONTENT AGGREGATION
     # ========================================================================
@@ -592,6 +2171,53 @@ class DocumentProcessor:
         Returns:
             Complete Markdown document string
         """
+        with self.report_metrics.stage('aggregate'):
+            return "".join(self._iter_report_sections())
+    
+    def write_report(self, output: BinaryIO, header: Optional[str] = None,
+                     sections: Optional[Iterable[Tuple[str, str, str]]] = None) -> List[Tuple[int, int]]:
+        """
+        Stream the aggregated Markdown report into a binary file, one section
+        at a time, without building the whole document in memory.
+        
+        Args:
+            output: Writable binary file (e.g. a temporary file)
+            header, sections: As in write_html_report (default: built from
+                processed_files)
+            
+        Returns:
+            (start, end) byte offsets of the header and of each file section,
+            relative to where writing started (see ReportFiles preview)
+        """
+        spans = []
+        position = 0
+        with trace_memory(self.options.trace_memory), self.report_metrics.stage('write_report'):
+            for section in self._iter_report_sections(header, sections):
+                data = section.encode('utf-8')
+                output.write(data)
+                spans.append((position, position + len(data)))
+                position += len(data)
+        return spans
+    
+    def _iter_report_sections(self, header: Optional[str] = None,
+                              sections: Optional[Iterable[Tuple[str, str, str]]] = None) -> Iterator[str]:
+        """
+        Yield the report as Markdown chunks: header + Table of Contents first,
+        then one chunk per file section. Joined, they form _aggregate_content().
+        """
+        yield self._report_header() if header is None else header
+        
+        # File sections
+        for markdown_text, _, _ in self._file_sections() if sections is None else sections:
+            yield "\n" + markdown_text
+    
+    def _file_sections(self) -> Iterator[Tuple[str, str, str]]:
+        """(Markdown, anchor, filename) of each processed file's report section."""
+        for pf in self.processed_files:
+            yield self._file_section(pf), self._create_anchor(pf.filename), pf.filename
+    
+    def _report_header(self) -> str:
+        """Title, summary and Table of Contents, built from file metadata only."""
         if not self.processed_files:
             return "# No files processed\n\nPlease upload files to process."
         
@@ -619,26 +2245,117 @@ class DocumentProcessor:
         content_parts.append("---")
         content_parts.append("")
         
-        # File sections
-        for pf in self.processed_files:
-            anchor = self._create_anchor(pf.filename)
-            content_parts.append(f"## 📄 {pf.filename} {{#{anchor}}}")
+        return "\n".join(content_parts)
+    
+    def _file_section(self, pf: ProcessedFile) -> str:
+        """Markdown section of one processed file, ending with a horizontal rule."""
+        anchor = self._create_anchor(pf.filename)
+        content_parts = [
+            f"## 📄 {pf.filename} {{#{anchor}}}",
+            "",
+            f"**File Type:** {pf.file_type}",
+            "",
+        ]
+        
+        if pf.success and pf.error_message:
+            content_parts.append(f"> ⚠️ **Partial result:** {pf.error_message}")
             content_parts.append("")
-            content_parts.append(f"**File Type:** {pf.file_type}")
+            content_parts.append(pf.content)
+        elif pf.success:
+            content_parts.append(pf.content)
+        else:
+            content_parts.append(f"> ⚠️ **Error:** {pf.error_message}")
             content_parts.append("")
+            content_parts.append("*This file could not be processed.*")
+        
+        content_parts.append("")
+        content_parts.append("---")
+        content_parts.append("")
+        
+        return "\n".join(content_parts)
+    
+    # ========================================================================
+    # HTML REPORT
+    # ========================================================================
+    
+    def write_html_report(self, output: BinaryIO, header: Optional[str] = None,
+                          sections: Optional[Iterable[Tuple[str, str, str]]] = None) -> None:
+        """
+        Write the report as a complete HTML document.
+        
+        Each file section is converted on its own, wrapped in
+        <section id="anchor"> (the Table of Contents target) and cached by
+        content hash, so re-processing one file only re-renders its section.
+        The header and Table of Contents are rebuilt from file metadata on
+        every call; they are small.
+        
+        Args:
+            output: Writable binary file
+            header: Markdown of the header and Table of Contents
+                (default: built from processed_files)
+            sections: (Markdown, anchor, filename) of each file section, e.g.
+                read back from a stored report (default: from processed_files)
+        """
+        if header is None:
+            header = self._report_header()
+        if sections is None:
+            sections = self._file_sections()
+        
+        with trace_memory(self.options.trace_memory), self.report_metrics.stage('write_html_report'):
+            html_head, html_tail = _html_shell()
+            output.write(html_head.encode('utf-8'))
+            output.write(markdown_to_html(header).encode('utf-8'))
             
-            if pf.success:
-                content_parts.append(pf.content)
-            else:
-                content_parts.append(f"> ⚠️ **Error:** {pf.error_message}")
-                content_parts.append("")
-                content_parts.append("*This file could not be processed.*")
+            for anchor, html_section in self._iter_sections_html(sections):
+                output.write(f'\n<section id="{anchor}">\n{html_section}\n</section>'.encode('utf-8'))
             
-            content_parts.append("")
-            content_parts.append("---")
-            content_parts.append("")
+            output.write(html_tail.encode('utf-8'))
+    
+    def _iter_sections_html(self, sections: Iterable[Tuple[str, str, str]]) -> Iterator[Tuple[str, str]]:
+        """
+        Yield (anchor, HTML) of each (Markdown, anchor, filename) section in order.
         
-        return "\n".join(content_parts)
+        Sections are handled in batches: cached ones are looked up, the rest
+        are converted on the process pool (workers > 1) or inline, then
+        stored. Only one batch of HTML is held in memory at a time.
+        """
+        cache = get_result_cache('html_sections') if self.options.use_cache else None
+        workers = resolve_workers(self.options.workers)
+        batch_size = HTML_SECTIONS_PER_BATCH * workers
+        sections = iter(sections)
+        
+        while True:
+            batch = list(islice(sections, batch_size))
+            if not batch:
+                break
+            # The section text contains the anchor, so it is the whole input
+            keys = [make_key(hash_text(markdown_text), 'html', HTML_RENDERER_VERSION, {})
+                    for markdown_text, _, _ in batch]
+            
+            rendered = [cache.get(key) if cache is not None else None for key in keys]
+            missing = [idx for idx, html_section in enumerate(rendered) if html_section is None]
+            
+            with self.report_metrics.stage('render_sections'):
+                if workers > 1 and len(missing) > 1:
+                    pool = get_process_pool(self.options.workers)
+                    futures = [
+                        pool.submit(render_html_sections, [batch[missing[idx]][:2] for idx in chunk])
+                        for chunk in split_range(len(missing), workers)
+                    ]
+                    fresh = [html_section for future in futures for html_section in future.result()]
+                else:
+                    fresh = [markdown_to_html(*batch[idx][:2]) for idx in missing]
+            
+            for idx, html_section in zip(missing, fresh):
+                rendered[idx] = html_section
+                if cache is not None:
+                    cache.put(keys[idx], batch[idx][2], html_section)
+            
+            yield from zip((anchor for _, anchor, _ in batch), rendered)
+    
+    def metrics_snapshot(self) -> Dict:
+        """Stage timings of the last run and of report generation (see metrics.build_snapshot)."""
+        return build_snapshot(self.processed_files, self.report_metrics.to_dict(), self.run_metrics)
     
     def _create_anchor(self, filename: str) -> str:
         """Create URL-safe anchor from filename."""
@@ -663,13 +2380,64 @@ def generate_html(markdown_content: str) -> str:
         Complete HTML document string
     """
     # Convert Markdown to HTML
-    html_body = markdown.markdown(
+    html_body = markdown_to_html(markdown_content)
+    
+    html_head, html_tail = _html_shell()
+    return html_head + html_body + html_tail
+
+
+def markdown_to_html(markdown_content: str, id_prefix: str = "") -> str:
+    """
+    Convert Markdown to an HTML fragment (no document wrapper).
+    
+    Args:
+        markdown_content: Markdown string
+        id_prefix: Prepended to generated heading ids, so fragments rendered
+            separately do not produce clashing ids when stitched together
+        
+    Returns:
+        HTML fragment string
+    """
+    import markdown
+    
+    extension_configs = {}
+    if id_prefix:
+        from markdown.extensions.toc import slugify
+        
+        def prefixed_slugify(value: str, separator: str) -> str:
+            return f"{id_prefix}{separator}{slugify(value, separator)}"
+        
+        extension_configs['toc'] = {'slugify': prefixed_slugify}
+    
+    return markdown.markdown(
         markdown_content,
-        extensions=['tables', 'fenced_code', 'toc']
+        extensions=['tables', 'fenced_code', 'toc'],
+        extension_configs=extension_configs
     )
-    
-    # GitHub-style CSS
-    css = """
+
+
+def _html_shell() -> Tuple[str, str]:
+    """Return the HTML document around the report body as (head, tail)."""
+    html_head = f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Unified Document Report</title>
+    {HTML_CSS}
+</head>
+<body>
+    <div class="container">
+        """
+    html_tail = """
+    </div>
+</body>
+</html>"""
+    return html_head, html_tail
+
+
+# GitHub-style CSS
+HTML_CSS = """
     <style>
         * {
             box-sizing: border-box;
@@ -825,24 +2593,296 @@ def generate_html(markdown_content: str) -> str:
         }
     </style>
     """
+
+
+def format_page_stats(page_stats: Dict[str, int]) -> str:
+    """One-line summary of PDF page triage decisions, e.g. for the UI or CLI."""
+    labels = {
+        'tables': "table detection", 'text_only': "text only",
+        'ocr': "OCR (no text layer)", 'no_text': "no text layer",
+    }
+    return ", ".join(f"{page_stats[key]} {label}" for key, label in labels.items() if page_stats.get(key))
+
+
+# ============================================================================
+# REPORT FILES
+# ============================================================================
+
+class ReportFiles:
+    """
+    Markdown and HTML report of one run, stored compressed on disk.
     
-    # Complete HTML document
-    html = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Unified Document Report</title>
-    {css}
-</head>
-<body>
-    <div class="container">
-        {html_body}
-    </div>
-</body>
-</html>"""
+    Large reports are never held as strings in the Streamlit session: they
+    are streamed to disk section by section and read back only when shown
+    or downloaded. The stage timings of the run, report writing included,
+    are kept in `metrics`.
+    
+    The preview never loads the whole report either: every section (the
+    header, then one per file) is indexed into pages of about
+    PREVIEW_PAGE_BYTES, split at PDF page and Excel sheet headers, and
+    read_preview() reads and renders one page at a time. Each page is
+    stored as its own gzip member, so a page is decompressed on its own
+    while the file as a whole is still a valid .md.gz.
+    
+    The HTML report is only built from the stored Markdown when it is
+    first read (e.g. downloaded), and stored compressed as well. Reports
+    of all sessions are registered in the process-wide report store (see
+    report_store.py), which deletes expired and least recently used ones;
+    `available` tells whether this one still exists. Otherwise the files are deleted by cleanup() or, at
+    the latest, when the object is garbage collected (the session ends).
+    """
+    
+    def __init__(self, processor: 'DocumentProcessor'):
+        store = get_report_store()  # Creates REPORT_STORE_DIR
+        self.directory = tempfile.mkdtemp(prefix="report_", dir=REPORT_STORE_DIR)
+        self.markdown_path = os.path.join(self.directory, "report.md.gz")
+        self.html_path = os.path.join(self.directory, "report.html.gz")
+        self._lock = threading.RLock()
+        self._finalizer = weakref.finalize(self, _delete_report, self.directory, self._lock)
+        self._options = processor.options
+        self._anchors = [(pf.filename, processor._create_anchor(pf.filename)) for pf in processor.processed_files]
+        
+        plain_path = os.path.join(self.directory, "report.md")
+        with open(plain_path, 'wb') as markdown_file:
+            spans = processor.write_report(markdown_file)
+        
+        titles = ["📋 Table of Contents"] + [
+            f"{'📄' if pf.success else '❌'} {pf.filename}" for pf in processor.processed_files
+        ]
+        self.preview_sections = [
+            {'title': title, 'pages': self._index_pages(plain_path, start, end)}
+            for title, (start, end) in zip(titles, spans)
+        ]
+        with processor.report_metrics.stage('compress_report'):
+            self._compress(plain_path)
+        os.remove(plain_path)
+        
+        self.metrics = processor.metrics_snapshot()
+        store.add(self.directory, self.disk_bytes(), self._finalizer)
+    
+    @property
+    def available(self) -> bool:
+        """False once the report was cleaned up or evicted from the report store."""
+        return self._finalizer.alive
+    
+    @property
+    def html_ready(self) -> bool:
+        """Whether the HTML report was already built (read_html() is then cheap)."""
+        return os.path.exists(self.html_path)
+    
+    def touch(self) -> bool:
+        """Mark the report as used (see report_store); False if it was evicted."""
+        return get_report_store().touch(self.directory) and self.available
+    
+    def disk_bytes(self) -> int:
+        """Size of the stored files."""
+        return sum(
+            os.path.getsize(path) for path in (self.markdown_path, self.html_path) if os.path.exists(path)
+        )
+    
+    def read_markdown(self) -> str:
+        with self._lock, gzip.open(self.markdown_path, 'rt', encoding='utf-8') as markdown_file:
+            return markdown_file.read()
+    
+    def read_html(self) -> str:
+        """HTML report, built from the stored Markdown on first use."""
+        with self._lock:
+            if not self.html_ready:
+                self._build_html()
+            with gzip.open(self.html_path, 'rt', encoding='utf-8') as html_file:
+                html = html_file.read()
+            size = self.disk_bytes()
+        # The HTML file counts towards the store's size limit from now on (unless evicted meanwhile)
+        get_report_store().resize(self.directory, size)
+        return html
+    
+    def read_preview(self, section: int, page: int,
+                     max_table_rows: int = PREVIEW_TABLE_ROWS) -> Tuple[str, int]:
+        """
+        Markdown of one preview page (see preview_sections), with tables cut
+        after max_table_rows rows (see truncate_preview).
+        
+        Returns:
+            (Markdown, number of table rows left out)
+        """
+        entry = self.preview_sections[section]['pages'][page]
+        # A page only exceeds the budget when a single line does
+        data = self._read_page(entry, 2 * PREVIEW_PAGE_BYTES)
+        text = entry['table_header'] + data.decode('utf-8', errors='ignore')
+        return truncate_preview(io.StringIO(text), max_table_rows)
+    
+    def cleanup(self) -> None:
+        """Delete the files now."""
+        self._finalizer()
+    
+    def _read_page(self, entry: Dict, max_bytes: int = 0) -> bytes:
+        """Decompress one preview page (at most max_bytes of it; 0 = all)."""
+        with self._lock, open(self.markdown_path, 'rb') as markdown_file:
+            markdown_file.seek(entry['offset'])
+            member = markdown_file.read(entry['length'])
+        return zlib.decompressobj(wbits=31).decompress(member, max_bytes)
+    
+    def _compress(self, plain_path: str) -> None:
+        """Write the plain Markdown report as one gzip member per preview page, recording where each went."""
+        with open(plain_path, 'rb') as plain_file, open(self.markdown_path, 'wb') as markdown_file:
+            for section in self.preview_sections:
+                for entry in section['pages']:
+                    # Pages are contiguous, so the plain file is read once, in order
+                    member = gzip.compress(plain_file.read(entry['end'] - entry['start']), compresslevel=6)
+                    entry['offset'] = markdown_file.tell()
+                    entry['length'] = len(member)
+                    markdown_file.write(member)
+    
+    def _build_html(self) -> None:
+        """Render the HTML report from the stored Markdown, one file section at a time."""
+        renderer = DocumentProcessor(self._options)
+        header = b"".join(self._read_page(entry) for entry in self.preview_sections[0]['pages'])
+        sections = (
+            # Stored sections start with the blank line that separates them (see _iter_report_sections)
+            (self._read_section(idx)[1:], anchor, filename)
+            for idx, (filename, anchor) in enumerate(self._anchors, 1)
+        )
+        try:
+            with gzip.open(self.html_path, 'wb', compresslevel=6) as html_file:
+                renderer.write_html_report(html_file, header.decode('utf-8'), sections)
+        except BaseException:
+            if os.path.exists(self.html_path):
+                os.remove(self.html_path)
+            raise
+        self.metrics['report'] = dict(sorted({**self.metrics['report'], **renderer.report_metrics.to_dict()}.items()))
+    
+    def _read_section(self, section: int) -> str:
+        return b"".join(self._read_page(entry) for entry in self.preview_sections[section]['pages']).decode('utf-8')
+    
+    def _index_pages(self, path: str, start: int, end: int) -> List[Dict]:
+        """
+        Split the section at [start, end) of the plain Markdown report at
+        `path` into preview pages, in one streaming pass over its lines.
+        
+        A page holds whole blocks (PDF pages, Excel sheets) up to
+        PREVIEW_PAGE_BYTES; larger blocks are cut at a line boundary. A page
+        that starts inside a table repeats the table's header rows, so it
+        still renders as a table.
+        
+        Returns:
+            Pages as {'start', 'end', 'label', 'table_header'} (plain byte
+            offsets; _compress() adds 'offset' and 'length'); the label
+            names the first and last block, e.g. "2/9 · 📄 Page 250/2000 –
+            📄 Page 498/2000"
+        """
+        pages: List[Dict] = []
+        # 'split': offset of the page's last block header (and its index in 'blocks'), if any
+        page = {'start': start, 'end': start, 'blocks': [], 'table_header': "", 'split': None}
+        block_label = ""
+        table_header: List[bytes] = []   # Header + separator row of the current table
+        in_table = False
+        position = start
+        
+        with open(path, 'rb') as markdown_file:
+            markdown_file.seek(start)
+            while position < end:
+                line = markdown_file.readline(end - position)
+                if not line:
+                    break
+                is_header = line.startswith(PREVIEW_BLOCK_HEADERS)
+                if is_header:
+                    block_label = line.decode('utf-8', errors='ignore').strip('#\n ')
+                
+                if (not is_header and page['split'] is not None
+                        and position - page['start'] + len(line) > PREVIEW_PAGE_BYTES):
+                    # Page full inside a block that started on it: move that block to a new page
+                    split, count = page['split']
+                    pages.append({**page, 'end': split, 'blocks': page['blocks'][:count]})
+                    page = {'start': split, 'end': split, 'blocks': page['blocks'][count:],
+                            'table_header': "", 'split': None}
+                page_size = position - page['start']
+                if page_size and (page_size + len(line) > PREVIEW_PAGE_BYTES):
+                    # Block larger than a page: continue on a new page, inside the table if there is one
+                    pages.append({**page, 'end': position})
+                    continued = in_table and line.startswith(b'|')
+                    page = {
+                        'start': position, 'end': position,
+                        'blocks': [] if is_header or not block_label else [f"{block_label} (cont.)"],
+                        'table_header': b"".join(table_header).decode('utf-8') if continued else "",
+                        'split': None,
+                    }
+                if is_header:
+                    if page['blocks']:   # Text before the first block stays with it
+                        page['split'] = (position, len(page['blocks']))
+                    page['blocks'].append(block_label)
+                
+                if line.startswith(b'|'):
+                    if not in_table:
+                        table_header = [line]
+                    elif len(table_header) == 1:
+                        table_header.append(line)
+                    in_table = True
+                else:
+                    in_table = False
+                position += len(line)
+        
+        pages.append({**page, 'end': position})
+        for number, entry in enumerate(pages, 1):
+            del entry['split']
+            blocks = entry.pop('blocks')
+            label = f"{number}/{len(pages)}"
+            if blocks:
+                label += f" · {blocks[0]}" + (f" – {blocks[-1]}" if len(blocks) > 1 else "")
+            entry['label'] = label
+        return pages
+
+
+def _delete_report(directory: str, lock: threading.RLock) -> None:
+    """Delete a report's files and forget it in the report store (ReportFiles finalizer)."""
+    with lock:
+        shutil.rmtree(directory, True)
+    get_report_store().remove(directory)
+
+
+def truncate_preview(lines: Iterable[str], max_table_rows: int = PREVIEW_TABLE_ROWS,
+                     max_chars: int = 2 * PREVIEW_PAGE_BYTES) -> Tuple[str, int]:
+    """
+    Bound the cost of previewing Markdown: the body of every table is cut
+    after `max_table_rows` rows (a note says how many were left out) and
+    output stops after `max_chars` characters.
+    
+    Args:
+        lines: Markdown lines with line endings (e.g. a file or io.StringIO)
+        
+    Returns:
+        (preview Markdown, number of table rows left out)
+    """
+    parts: List[str] = []
+    chars = 0
+    hidden = 0
+    table_rows: Optional[int] = None     # Body rows of the current table so far
+    skipped = 0                          # Rows left out of the current table
     
-    return html
+    for line in lines:
+        if line.startswith('|'):
+            # The header and separator rows do not count
+            table_rows = -2 if table_rows is None else table_rows + 1
+            if table_rows >= max_table_rows:
+                skipped += 1
+                continue
+        else:
+            table_rows = None
+            if skipped:
+                parts.append(f"\n*… {skipped:,} more row(s) not shown*\n")
+                hidden += skipped
+                skipped = 0
+        if chars + len(line) > max_chars:
+            parts.append(line[:max_chars - chars])
+            parts.append("\n\n*Preview truncated: download the report for the full content.*\n")
+            break
+        parts.append(line)
+        chars += len(line)
+    else:
+        if skipped:
+            parts.append(f"\n*… {skipped:,} more row(s) not shown*\n")
+            hidden += skipped
+    
+    return "".join(parts), hidden
 
 
 # ============================================================================
@@ -851,6 +2891,9 @@ def generate_html(markdown_content: str) -> str:
 
 def main():
     """Main Streamlit application."""
+    # Imported here so the processing code (CLI, workers) never loads Streamlit
+    import streamlit as st
+    from streamlit.runtime.media_file_manager import MediaFileManager
     
     # Page configuration
     st.set_page_config(
@@ -860,6 +2903,10 @@ def main():
         initial_sidebar_state="expanded"
     )
     
+    # Load the shared OCR model in the background at server start (once per process)
+    if OCR_WARMUP:
+        warm_up_on_start()
+    
     # Custom CSS for better UI
     st.markdown("""
     <style>
@@ -942,6 +2989,29 @@ def main():
         - ✅ Error handling
         """)
         
+        # Result cache (shared by all sessions of this server), one line per namespace
+        caches = all_result_caches()
+        if caches:
+            st.markdown("---")
+            st.markdown("**🗄️ Result Cache**")
+            for namespace, cache in caches.items():
+                stats = cache.stats()
+                st.caption(
+                    f"`{namespace}`: {stats['entries']} entries · {stats['bytes'] / 1024 / 1024:.1f} MB · "
+                    f"{stats['hits']} hits / {stats['misses']} misses since start"
+                )
+            if st.button("🧹 Purge cache", use_container_width=True):
+                for cache in caches.values():
+                    cache.purge()
+                st.rerun()
+
+        # Reports of all sessions (see report_store.py)
+        store_stats = get_report_store().stats()
+        st.caption(
+            f"🗃️ Stored reports: {store_stats['reports']} · {store_stats['bytes'] / 1024 / 1024:.1f} MB · "
+            f"{store_stats['evictions']} evicted"
+        )
+
         st.markdown("---")
         st.caption("Built with ❤️ using Streamlit")
     
@@ -953,7 +3023,7 @@ def main():
         
         uploaded_files = st.file_uploader(
             "Choose files to process",
-            type=['xlsx', 'xls', 'docx', 'pdf', 'txt', 'png', 'jpg', 'jpeg', 'md'],
+            type=SUPPORTED_EXTENSIONS,
             accept_multiple_files=True,
             help="Upload Excel, Word, PDF, Text, Image, or Markdown files"
         )
@@ -961,7 +3031,7 @@ def main():
         if uploaded_files:
             st.markdown("**Uploaded Files:**")
             for f in uploaded_files:
-                file_size = len(f.getvalue()) / 1024  # KB
+                file_size = f.size / 1024  # KB, from upload metadata (no copy of the content)
                 st.markdown(f"- 📎 `{f.name}` ({file_size:.1f} KB)")
     
     with col2:
@@ -973,6 +3043,56 @@ def main():
             <small>All text and tables will be extracted exactly as they appear.</small>
         </div>
         """, unsafe_allow_html=True)
+        
+        workers = st.number_input(
+            "Worker processes",
+            min_value=0,
+            max_value=os.cpu_count() or 1,
+            value=min(ProcessingOptions().workers, os.cpu_count() or 1),
+            help="Process files and PDF pages in parallel. 1 = single process, 0 = one per CPU"
+        )
+        
+        trace_memory_per_stage = st.checkbox(
+            "Measure peak memory per stage",
+            help="Adds peak allocated memory to the performance metrics (tracemalloc). "
+                 "Processing gets noticeably slower"
+        )
+        
+        with st.expander("📕 PDF options"):
+            pdf_first_page = st.number_input(
+                "First page", min_value=1, value=1,
+                help="Skip the pages before this one"
+            )
+            pdf_last_page = st.number_input(
+                "Last page", min_value=0, value=0,
+                help="0 = end of document. Set it to N to extract only the first N pages"
+            )
+            pdf_max_output_chars = st.number_input(
+                "Max output characters", min_value=0, value=0, step=100_000,
+                help="Stop extracting a PDF once its output reaches this size. 0 = no limit"
+            )
+            pdf_text_engine = st.selectbox(
+                "Text engine", PDF_TEXT_ENGINES,
+                help="pdfium reads pages without tables much faster; pdfplumber keeps "
+                     "the previous output exactly. Pages with tables always use pdfplumber"
+            )
+        
+        with st.expander("📃 Text options"):
+            text_max_chars = st.number_input(
+                "Max characters per text file", min_value=0, value=0, step=100_000,
+                help="Keep only the start of large .txt / .md files (e.g. logs). 0 = no limit"
+            )
+        
+        with st.expander("⏳ Per-file budgets"):
+            file_timeout_s = st.number_input(
+                "Time budget per file (seconds)", min_value=0, value=0, step=30,
+                help="Stop a file that takes longer and keep the PDF pages / Excel sheets "
+                     "finished so far. 0 = no limit"
+            )
+            file_max_memory_mb = st.number_input(
+                "Memory budget per file (MB)", min_value=0, value=0, step=256,
+                help="Stop a file whose worker process uses more memory. 0 = no limit"
+            )
     
     # Process button
     st.markdown("---")
@@ -984,83 +3104,194 @@ def main():
         disabled=not uploaded_files
     )
     
-    # Session state for storing results
-    if 'markdown_content' not in st.session_state:
-        st.session_state.markdown_content = None
-    if 'html_content' not in st.session_state:
-        st.session_state.html_content = None
+    # Session state for storing results (ReportFiles on disk, not strings)
+    if 'report_files' not in st.session_state:
+        st.session_state.report_files = None
     
     # Process files
     if process_button and uploaded_files:
         with st.spinner("Processing documents..."):
-            processor = DocumentProcessor()
+            if st.session_state.report_files is not None:
+                st.session_state.report_files.cleanup()
+                st.session_state.report_files = None
             
-            # Process with progress
+            processor = DocumentProcessor(ProcessingOptions(
+                workers=int(workers),
+                pdf_first_page=int(pdf_first_page),
+                pdf_last_page=int(pdf_last_page),
+                pdf_max_output_chars=int(pdf_max_output_chars),
+                pdf_text_engine=pdf_text_engine,
+                text_max_chars=int(text_max_chars),
+                file_timeout_s=float(file_timeout_s),
+                file_max_memory_mb=float(file_max_memory_mb),
+                trace_memory=trace_memory_per_stage
+            ))
+            
+            # Process with progress (callback runs in this script thread)
             progress_bar = st.progress(0)
             status_text = st.empty()
             
-            for idx, f in enumerate(uploaded_files):
-                status_text.text(f"Processing: {f.name}")
-                progress_bar.progress((idx + 1) / len(uploaded_files))
+            # Live preview: one placeholder per file in upload order, filled in
+            # as soon as that file finishes (replaced by the full report below)
+            live_preview = st.empty()
+            with live_preview.container():
+                section_placeholders = [st.empty() for _ in uploaded_files]
+            for placeholder, f in zip(section_placeholders, uploaded_files):
+                placeholder.caption(f"⏳ {f.name}")
+            
+            def on_progress(event: ProgressEvent):
+                progress_bar.progress(event.files_done / event.total_files)
+                if event.is_page_event:
+                    status_text.text(f"Processing: {event.filename} (page {event.page}/{event.total_pages})")
+                else:
+                    status_text.text(f"Finished: {event.filename} ({event.files_done}/{event.total_files} files)")
+                    section_md, _ = truncate_preview(io.StringIO(processor._file_section(event.result)))
+                    section_placeholders[event.file_index].markdown(section_md)
             
-            # Generate content
-            st.session_state.markdown_content = processor.process_files(uploaded_files)
-            st.session_state.html_content = generate_html(st.session_state.markdown_content)
+            # Generate content, streamed to temporary files
+            processor.extract_files(uploaded_files, on_progress)
+            status_text.text("Writing report...")
+            st.session_state.report_files = ReportFiles(processor)
             
             progress_bar.empty()
             status_text.empty()
+            live_preview.empty()
             
             # Show warnings if any
             if processor.warnings:
-                st.warning("⚠️ Some files could not be processed:")
+                st.warning("⚠️ Some files could not be processed completely:")
                 for warning in processor.warnings:
                     st.markdown(f"- {warning}")
             
             st.success(f"✅ Successfully processed {sum(1 for f in processor.processed_files if f.success)} of {len(uploaded_files)} files!")
+            st.caption(f"🗄️ Cache: {processor.cache_hits} hit(s), {processor.cache_misses} miss(es)")
+            if 'time_to_first_result_s' in processor.run_metrics:
+                st.caption(
+                    f"⏱️ First file shown after {processor.run_metrics['time_to_first_result_s']:.1f} s, "
+                    f"all files done after {processor.run_metrics['extract_files_s']:.1f} s"
+                )
+            if processor.pdf_page_stats:
+                st.caption(f"📕 PDF pages: {format_page_stats(processor.pdf_page_stats)}")
     
     # Display results
-    if st.session_state.markdown_content:
+    report_files = st.session_state.report_files
+    if report_files is not None and not report_files.touch():
+        # Evicted by the report store (see report_store.py)
+        st.info("⌛ The last report was removed to free server space after it was not used for a while. "
+                "Process the files again: unchanged files come from the result cache.")
+        report_files = st.session_state.report_files = None
+    if report_files is not None:
         st.markdown("---")
         st.subheader("📋 Generated Report")
         
+        # Paginated preview: one section page at a time, never the whole report
+        sections = report_files.preview_sections
+        st.session_state.setdefault('preview_table_rows', PREVIEW_TABLE_ROWS)
+        col_section, col_page, col_rows = st.columns([3, 2, 1])
+        with col_section:
+            section = st.selectbox(
+                "Section", range(len(sections)), index=min(1, len(sections) - 1),
+                format_func=lambda idx: sections[idx]['title']
+            )
+        pages = sections[section]['pages']
+        with col_page:
+            page = st.selectbox(
+                "Page", range(len(pages)), format_func=lambda idx: pages[idx]['label'],
+                disabled=len(pages) == 1, key=f"preview_page_{section}"
+            )
+        with col_rows:
+            st.number_input("Rows per table", min_value=1, step=PREVIEW_TABLE_ROWS, key='preview_table_rows')
+        
+        page_md, hidden_rows = report_files.read_preview(section, page, st.session_state.preview_table_rows)
+        if hidden_rows:
+            def show_more_rows():
+                st.session_state.preview_table_rows += PREVIEW_TABLE_ROWS
+            
+            st.button(f"➕ Show {PREVIEW_TABLE_ROWS} more rows per table ({hidden_rows:,} hidden)",
+                      on_click=show_more_rows)
+        
         # Tabs for different views
         tab1, tab2 = st.tabs(["📝 Markdown Preview", "🌐 HTML Preview"])
         
         with tab1:
-            st.markdown(st.session_state.markdown_content)
+            st.markdown(page_md)
         
         with tab2:
-            st.components.v1.html(st.session_state.html_content, height=800, scrolling=True)
+            head, tail = _html_shell()
+            st.components.v1.html(head + markdown_to_html(page_md) + tail, height=800, scrolling=True)
+        
+        # Stage timings per file (and of report writing) for finding slow files
+        with st.expander("⏱️ Performance metrics"):
+            st.dataframe(
+                snapshot_rows(report_files.metrics),
+                column_config={
+                    "file": "File",
+                    "stage": "Stage",
+                    "wall_s": st.column_config.NumberColumn("Wall (s)", format="%.3f"),
+                    "cpu_s": st.column_config.NumberColumn("CPU (s)", format="%.3f"),
+                    "peak_alloc_mb": st.column_config.NumberColumn("Peak alloc (MB)", format="%.1f"),
+                    "calls": "Calls",
+                },
+                hide_index=True,
+                use_container_width=True
+            )
+            metrics_col1, metrics_col2 = st.columns(2)
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            with metrics_col1:
+                st.download_button(
+                    label="📊 Download metrics (.json)",
+                    data=snapshot_to_json(report_files.metrics),
+                    file_name=f"metrics_{timestamp}.json",
+                    mime="application/json",
+                    use_container_width=True
+                )
+            with metrics_col2:
+                st.download_button(
+                    label="📈 Download metrics (Prometheus)",
+                    data=snapshot_to_prometheus(report_files.metrics),
+                    file_name=f"metrics_{timestamp}.prom",
+                    mime="text/plain",
+                    use_container_width=True
+                )
         
         # Download buttons
         st.markdown("---")
         st.subheader("📥 Download Report")
         
         col1, col2, col3 = st.columns([1, 1, 1])
+        # Newer Streamlit releases accept a callable and only call it when the
+        # button is clicked; otherwise the data is read on every rerun, and the
+        # HTML report is only built once asked for
+        deferred = hasattr(MediaFileManager, 'add_deferred')
         
         with col1:
             st.download_button(
                 label="📄 Download as Markdown (.md)",
-                data=st.session_state.markdown_content,
+                data=report_files.read_markdown if deferred else report_files.read_markdown(),
                 file_name=f"unified_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.md",
                 mime="text/markdown",
                 use_container_width=True
             )
         
         with col2:
-            st.download_button(
-                label="🌐 Download as HTML (.html)",
-                data=st.session_state.html_content,
-                file_name=f"unified_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html",
-                mime="text/html",
-                use_container_width=True
-            )
+            if deferred or report_files.html_ready:
+                st.download_button(
+                    label="🌐 Download as HTML (.html)",
+                    data=report_files.read_html if deferred else report_files.read_html(),
+                    file_name=f"unified_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html",
+                    mime="text/html",
+                    use_container_width=True
+                )
+            elif st.button("🌐 Build HTML report", use_container_width=True):
+                with st.spinner("Building HTML report..."):
+                    report_files.read_html()
+                st.rerun()
         
         with col3:
             # Clear button
             if st.button("🗑️ Clear Results", use_container_width=True):
-                st.session_state.markdown_content = None
-                st.session_state.html_content = None
+                report_files.cleanup()
+                st.session_state.report_files = None
                 st.rerun()
 
 
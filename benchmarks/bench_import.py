@@ -0,0 +1,100 @@
+"""
+⏱️ Import-time budget
+=====================
+Measures the cold import cost of the processing modules with
+``python -X importtime`` and fails (exit code 1) when:
+
+- the total import time exceeds the budget, or
+- a heavy dependency (pandas, pdfplumber, torch, Streamlit, ...) is imported
+  eagerly instead of by the extractor that needs it.
+
+tests/test_import_time.py runs the same checks under pytest. By hand:
+
+    python benchmarks/bench_import.py [--budget-ms 300] [--runs 5]
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must be importable without Streamlit or any extractor dependency
+MODULES = ['app', 'convert', 'workers', 'result_cache', 'ocr_engine', 'metrics', 'report_store']
+
+# Loaded only by the extractor (or UI) that needs them
+HEAVY_MODULES = [
+    'pandas', 'numpy', 'pdfplumber', 'pdfminer', 'docx', 'openpyxl', 'xlrd',
+    'PIL', 'markdown', 'easyocr', 'torch', 'streamlit',
+]
+
+# Maximum import time of all MODULES together in ms (best of several runs)
+BUDGET_MS = 300.0
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)")
+
+
+def measure(modules):
+    """
+    Import `modules` in a fresh interpreter.
+
+    Returns:
+        (total microseconds of the top-level imports, set of all imported module names)
+    """
+    code = "; ".join(f"import {module}" for module in modules)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True
+    )
+
+    imported = set()
+    total_us = 0
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        _, cumulative, indent, name = match.groups()
+        imported.add(name)
+        if name in modules and not indent:
+            total_us += int(cumulative)
+    return total_us, imported
+
+
+def eager_heavy(imported):
+    """HEAVY_MODULES (or their submodules) among the imported module names."""
+    return sorted(
+        heavy for heavy in HEAVY_MODULES
+        if any(name == heavy or name.startswith(heavy + '.') for name in imported)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time budget check")
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS,
+                        help="Maximum import time of all modules together (best of runs)")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to measure (best is kept)")
+    args = parser.parse_args()
+
+    timings = []
+    imported = set()
+    for _ in range(args.runs):
+        total_us, imported = measure(MODULES)
+        timings.append(total_us / 1000)
+    best_ms = min(timings)
+
+    eager = eager_heavy(imported)
+
+    print(f"Modules:      {', '.join(MODULES)}")
+    print(f"Import time:  best {best_ms:.1f} ms / median {sorted(timings)[len(timings) // 2]:.1f} ms "
+          f"(budget {args.budget_ms:.0f} ms)")
+    print(f"Eager heavy:  {', '.join(eager) if eager else 'none'}")
+
+    failed = best_ms > args.budget_ms or bool(eager)
+    print("FAIL" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
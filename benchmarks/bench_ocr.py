@@ -0,0 +1,92 @@
+"""
+🔍 OCR preprocessing benchmark
+==============================
+Times ``DocumentProcessor._process_image`` under several preprocessing
+settings (ProcessingOptions.ocr_*) on generated images with known text, and
+reports the speed / memory / accuracy trade-off:
+
+- seconds per image (the model is loaded and a small image recognized
+  before timing)
+- peak allocated memory of the image pipeline (tracemalloc; numpy and PIL
+  buffers, not the model's own tensors)
+- accuracy: character similarity between recognized and rendered text
+
+Needs the easyocr model (downloaded on first use, or ``python ocr_engine.py``).
+
+Usage:
+    python benchmarks/bench_ocr.py [--widths 1600 4000 8000] [--format jpg]
+"""
+
+import argparse
+import difflib
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from app import DocumentProcessor, ProcessingOptions  # noqa: E402
+from corpus import build_image  # noqa: E402
+from ocr_engine import get_ocr_engine  # noqa: E402
+
+# Name -> ProcessingOptions overrides; "full" is the pre-preprocessing behaviour
+CONFIGS = {
+    "full": {"ocr_max_side": 0, "ocr_target_dpi": 0, "ocr_grayscale": False, "ocr_tile_size": 0},
+    "gray": {"ocr_max_side": 0, "ocr_target_dpi": 0, "ocr_tile_size": 0},
+    "cap2560": {"ocr_max_side": 2560, "ocr_tile_size": 0},
+    "cap1600": {"ocr_max_side": 1600, "ocr_tile_size": 0},
+    "default": {},
+    "tiles": {"ocr_max_side": 0},
+}
+
+
+def accuracy(markdown: str, truth: list) -> float:
+    """Similarity (0-1) of recognized text to the rendered lines, ignoring case and spacing."""
+    lines = markdown.split("### 📝 Extracted Text", 1)[-1].splitlines()
+    recognized = " ".join(line for line in lines if line and not line.startswith("*"))
+    normalize = lambda text: " ".join(text.lower().split())  # noqa: E731
+    return difflib.SequenceMatcher(None, normalize(recognized), normalize(" ".join(truth))).ratio()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--widths", type=int, nargs="+", default=[1600, 4000, 8000],
+                        help="Image widths in pixels (4:3 aspect ratio)")
+    parser.add_argument("--format", choices=["jpg", "png"], default="jpg")
+    parser.add_argument("--configs", nargs="+", choices=list(CONFIGS), default=list(CONFIGS))
+    args = parser.parse_args()
+
+    get_ocr_engine().warm_up()
+
+    print(f"{'width':>6} | {'config':<8} | {'seconds':>8} | {'alloc MB':>8} | {'accuracy':>8}")
+    print(f"{'-' * 6} | {'-' * 8} | {'-' * 8} | {'-' * 8} | {'-' * 8}")
+    with tempfile.TemporaryDirectory() as directory:
+        # Untimed warm-up: the first recognition pays lazy imports and first-inference setup
+        warm_up = os.path.join(directory, f"warm_up.{args.format}")
+        build_image(warm_up, 400, seed=0)
+        with open(warm_up, "rb") as image_file:
+            DocumentProcessor()._process_image(image_file)
+
+        for width in args.widths:
+            path = os.path.join(directory, f"sample_{width}.{args.format}")
+            truth = build_image(path, width, seed=width)
+
+            for name in args.configs:
+                processor = DocumentProcessor(ProcessingOptions(**CONFIGS[name]))
+                with open(path, "rb") as image_file:
+                    tracemalloc.start()
+                    started = time.perf_counter()
+                    markdown = processor._process_image(image_file)
+                    elapsed = time.perf_counter() - started
+                    _, peak = tracemalloc.get_traced_memory()
+                    tracemalloc.stop()
+                print(f"{width:>6} | {name:<8} | {elapsed:>8.2f} | {peak / 1024 / 1024:>8.1f} | "
+                      f"{accuracy(markdown, truth):>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+📕 PDF text engine benchmark
+============================
+Extracts the same PDFs with both text layer engines
+(ProcessingOptions.pdf_text_engine) and reports:
+
+- seconds per run, in-process (workers=1, no result cache)
+- fidelity of pdfium against the pdfplumber output: share of pages with
+  identical Markdown, and the mean and lowest per-page character
+  similarity (whitespace-insensitive; pdfium spaces dot leaders and
+  kerned text differently and reads columns one after the other, where
+  pdfplumber merges them line by line)
+
+Pages with possible tables and scans go through pdfplumber in both runs, so
+differences come only from plain-text pages. The generated PDFs are one
+prose-only document and one with a table on every other page.
+
+Usage:
+    python benchmarks/bench_pdf_engines.py [--pages 50 200] [PDF ...]
+"""
+
+import argparse
+import difflib
+import os
+import re
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from app import PDF_TEXT_ENGINES, DocumentProcessor, ProcessingOptions  # noqa: E402
+from corpus import build_pdf  # noqa: E402
+
+PAGE_HEADER = re.compile(r"^#### 📄 Page \d+/\d+$", re.MULTILINE)
+
+
+def similarity(a: str, b: str) -> float:
+    """Character similarity (0-1) of two texts, ignoring whitespace."""
+    return difflib.SequenceMatcher(None, "".join(a.split()), "".join(b.split()), autojunk=False).ratio()
+
+
+def extract(path: str, engine: str):
+    """Return (seconds, Markdown split per page, page triage counts)."""
+    processor = DocumentProcessor(ProcessingOptions(workers=1, use_cache=False, pdf_text_engine=engine))
+    with open(path, "rb") as pdf_file:
+        started = time.perf_counter()
+        markdown = processor._process_pdf(pdf_file)
+        elapsed = time.perf_counter() - started
+    return elapsed, PAGE_HEADER.split(markdown)[1:], dict(processor.pdf_page_stats)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("pdfs", nargs="*", help="PDF files (default: generated corpus PDFs)")
+    parser.add_argument("--pages", type=int, nargs="+", default=[50, 200],
+                        help="Page counts of the generated PDFs")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = args.pdfs
+        if not paths:
+            for pages in args.pages:
+                for name, table_every in (("prose", 0), ("tables", 2)):
+                    paths.append(os.path.join(directory, f"{name}_{pages}.pdf"))
+                    build_pdf(paths[-1], pages, seed=pages, table_every=table_every)
+
+        # Untimed warm-up: the first run of each engine pays its lazy imports (pdfplumber, pypdfium2, pandas)
+        warm_up = os.path.join(directory, "warm_up.pdf")
+        build_pdf(warm_up, 2, seed=0, table_every=2)
+        for engine in PDF_TEXT_ENGINES:
+            extract(warm_up, engine)
+
+        print(f"{'pdf':<24} | {'engine':<10} | {'seconds':>8} | {'speedup':>7} | {'identical':>9} | "
+              f"{'mean sim':>8} | {'min sim':>7}")
+        print(f"{'-' * 24} | {'-' * 10} | {'-' * 8} | {'-' * 7} | {'-' * 9} | {'-' * 8} | {'-' * 7}")
+        for path in paths:
+            runs = {engine: extract(path, engine) for engine in PDF_TEXT_ENGINES}
+            baseline_s, baseline, stats = runs[PDF_TEXT_ENGINES[0]]
+            for engine, (elapsed, pages, _) in runs.items():
+                identical = sum(a == b for a, b in zip(pages, baseline))
+                scores = [similarity(a, b) for a, b in zip(pages, baseline)] or [1.0]
+                print(f"{os.path.basename(path)[:24]:<24} | {engine:<10} | {elapsed:>8.2f} | "
+                      f"{baseline_s / elapsed:>6.1f}x | {identical:>4}/{len(baseline):<4} | "
+                      f"{sum(scores) / len(scores):>8.3f} | {min(scores):>7.3f}")
+            print(f"{'':<24}   page triage: {stats}")
+
+
+if __name__ == "__main__":
+    main()
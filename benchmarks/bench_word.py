@@ -0,0 +1,73 @@
+"""
+⏱️ Word extraction benchmark
+============================
+Times ``DocumentProcessor._process_word`` on generated .docx files of growing
+size to check that body traversal scales linearly with paragraph count.
+
+Usage:
+    python benchmarks/bench_word.py [--max-paragraphs 20000] [--steps 4]
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docx import Document  # noqa: E402
+
+from app import DocumentProcessor  # noqa: E402
+
+
+def build_docx(n_paragraphs: int, table_every: int = 200) -> io.BytesIO:
+    """Build a .docx with headings, body paragraphs and a small table every `table_every` paragraphs."""
+    doc = Document()
+    for i in range(n_paragraphs):
+        if i % 50 == 0:
+            doc.add_heading(f"Section {i // 50 + 1}", level=2)
+        else:
+            doc.add_paragraph(f"Paragraph {i}: Lorem ipsum dolor sit amet, consectetur adipiscing elit.")
+        if table_every and i % table_every == table_every - 1:
+            table = doc.add_table(rows=3, cols=3)
+            for r, row in enumerate(table.rows):
+                for c, cell in enumerate(row.cells):
+                    cell.text = f"r{r}c{c}"
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--max-paragraphs", type=int, default=20000)
+    parser.add_argument("--steps", type=int, default=4, help="Number of sizes (halving from the max)")
+    args = parser.parse_args()
+
+    sizes = sorted(args.max_paragraphs >> i for i in range(args.steps))
+    processor = DocumentProcessor()
+    # Untimed warm-up: the first call pays lazy imports (pandas for tables)
+    processor._process_word(build_docx(sizes[0]))
+
+    print(f"{'paragraphs':>10} | {'seconds':>8} | {'µs/para':>8}")
+    print(f"{'-' * 10} | {'-' * 8} | {'-' * 8}")
+    previous = None
+    for n in sizes:
+        buffer = build_docx(n)
+        started = time.perf_counter()
+        processor._process_word(buffer)
+        elapsed = time.perf_counter() - started
+        per_para = elapsed / n * 1e6
+        print(f"{n:>10} | {elapsed:>8.3f} | {per_para:>8.1f}")
+        previous = (n, elapsed) if previous is None else previous
+
+    # Linear scaling keeps µs/paragraph roughly flat; O(N²) doubles it at every step
+    first_n, first_t = previous
+    ratio = (elapsed / n) / (first_t / first_n)
+    print(f"\nPer-paragraph cost ratio (largest / smallest): {ratio:.2f}x  (≈1 means linear)")
+
+
+if __name__ == "__main__":
+    main()
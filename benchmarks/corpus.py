@@ -0,0 +1,240 @@
+"""
+🏭 Synthetic benchmark corpus
+=============================
+Builds reproducible input documents for the benchmark harness (run.py) at
+several size classes. The same seed and size class always produce the same
+content, so timings from different runs can be compared.
+
+Generated per size class:
+- excel_tall.xlsx   Many rows, few columns
+- excel_wide.xlsx   Fewer rows, many columns
+- word.docx         Headings, paragraphs and a table every 50 paragraphs
+- report.pdf        Multi-page PDF with prose and ruled tables (written
+                    directly, no PDF library needed)
+- scan.png          Text rendered onto an image, for OCR
+
+Usage:
+    python benchmarks/corpus.py [--out benchmarks/.corpus] [--sizes small medium large]
+"""
+
+import argparse
+import os
+import random
+from typing import Dict, List
+
+DEFAULT_CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".corpus")
+
+SIZE_CLASSES: Dict[str, Dict[str, int]] = {
+    "small": {
+        "tall_rows": 1_000, "wide_rows": 100, "wide_cols": 60,
+        "paragraphs": 500, "pdf_pages": 5, "image_width": 800,
+    },
+    "medium": {
+        "tall_rows": 20_000, "wide_rows": 1_000, "wide_cols": 60,
+        "paragraphs": 5_000, "pdf_pages": 50, "image_width": 2_000,
+    },
+    "large": {
+        "tall_rows": 100_000, "wide_rows": 5_000, "wide_cols": 60,
+        "paragraphs": 20_000, "pdf_pages": 200, "image_width": 4_000,
+    },
+}
+
+WORDS = (
+    "contract invoice payment amount delivery schedule report quarter revenue "
+    "customer supplier warehouse product service total balance account period "
+    "hợp đồng hóa đơn thanh toán số tiền giao hàng báo cáo doanh thu khách hàng"
+).split()
+
+
+def sentence(rng: random.Random, words: int = 12) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+# ============================================================================
+# GENERATORS
+# ============================================================================
+
+def build_excel(path: str, rows: int, cols: int, seed: int) -> None:
+    """Write an .xlsx with a header row and mixed text/number/date cells."""
+    import datetime
+    import openpyxl
+
+    rng = random.Random(seed)
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet("Data")
+    sheet.append([f"Column {c + 1}" for c in range(cols)])
+    base_date = datetime.date(2024, 1, 1)
+    for r in range(rows):
+        row = []
+        for c in range(cols):
+            kind = c % 4
+            if kind == 0:
+                row.append(r + 1)
+            elif kind == 1:
+                row.append(rng.choice(WORDS))
+            elif kind == 2:
+                row.append(round(rng.uniform(0, 100_000), 2))
+            else:
+                row.append(base_date + datetime.timedelta(days=rng.randrange(365)))
+        sheet.append(row)
+    workbook.save(path)
+
+
+def build_docx(path: str, paragraphs: int, seed: int) -> None:
+    """Write a .docx with a heading every 20 paragraphs and a 4x5 table every 50."""
+    from docx import Document
+
+    rng = random.Random(seed)
+    document = Document()
+    for i in range(paragraphs):
+        if i % 20 == 0:
+            document.add_heading(f"Section {i // 20 + 1}", level=1 + (i // 20) % 3)
+        document.add_paragraph(sentence(rng, 20))
+        if i % 50 == 49:
+            table = document.add_table(rows=5, cols=4)
+            for row in table.rows:
+                for cell in row.cells:
+                    cell.text = rng.choice(WORDS)
+    document.save(path)
+
+
+def build_pdf(path: str, pages: int, seed: int, table_rows: int = 12, table_every: int = 2) -> None:
+    """
+    Write a PDF with prose on every page and a ruled 3-column table on every
+    `table_every`-th page (0 = prose only). The file is assembled by hand (Helvetica, uncompressed
+    content streams) so no PDF writer library is required.
+    """
+    rng = random.Random(seed)
+    objects: List[bytes] = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    def text(x: float, y: float, size: int, value: str) -> str:
+        value = value.encode("ascii", "replace").decode().replace("\\", "").replace("(", "").replace(")", "")
+        return f"BT /F1 {size} Tf {x} {y} Td ({value}) Tj ET"
+
+    font_id = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    pages_id = len(objects) + 2 * pages + 1  # Page tree is written after all pages
+    page_ids = []
+
+    for page in range(pages):
+        ops = [text(50, 780, 14, f"Quarterly report - page {page + 1}")]
+        y = 760
+        for _ in range(10):
+            y -= 14
+            ops.append(text(50, y, 10, sentence(rng, 12)))
+
+        if table_every and page % table_every == 0:
+            top, left, col_width, row_height = y - 30, 50, 160, 18
+            for r in range(table_rows + 1):
+                ops.append(f"{left} {top - r * row_height} m {left + 3 * col_width} {top - r * row_height} l S")
+            for c in range(4):
+                ops.append(f"{left + c * col_width} {top} m {left + c * col_width} {top - table_rows * row_height} l S")
+            for r in range(table_rows):
+                for c in range(3):
+                    value = f"Item {r}" if c == 0 else f"{rng.uniform(0, 10_000):.2f}"
+                    ops.append(text(left + c * col_width + 4, top - r * row_height - 13, 9, value))
+
+        stream = "\n".join(ops).encode("ascii")
+        content_id = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        page_ids.append(add(
+            f"<< /Type /Page /Parent {pages_id} 0 R /MediaBox [0 0 612 792] "
+            f"/Contents {content_id} 0 R /Resources << /Font << /F1 {font_id} 0 R >> >> >>".encode()
+        ))
+
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    assert add(f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>".encode()) == pages_id
+    catalog_id = add(f"<< /Type /Catalog /Pages {pages_id} 0 R >>".encode())
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    output += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    output += f"trailer\n<< /Size {len(objects) + 1} /Root {catalog_id} 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+
+    with open(path, "wb") as pdf:
+        pdf.write(output)
+
+
+def build_image(path: str, width: int, seed: int) -> List[str]:
+    """
+    Render lines of dark text on a light background (4:3 aspect ratio).
+
+    Returns:
+        The rendered lines (ground truth for OCR accuracy)
+    """
+    from PIL import Image, ImageDraw, ImageFont
+
+    rng = random.Random(seed)
+    height = width * 3 // 4
+    font_size = max(12, width // 50)
+    try:
+        font = ImageFont.load_default(size=font_size)
+    except TypeError:  # Pillow < 10.1 has no scalable default font
+        font = ImageFont.load_default()
+
+    image = Image.new("RGB", (width, height), (245, 243, 238))
+    draw = ImageDraw.Draw(image)
+    lines = []
+    y = font_size
+    while y < height - 2 * font_size:
+        lines.append(sentence(rng, 8))
+        draw.text((font_size, y), lines[-1], fill=(20, 20, 20), font=font)
+        y += int(font_size * 1.8)
+    image.save(path)
+    return lines
+
+
+# ============================================================================
+# CORPUS
+# ============================================================================
+
+def build_corpus(out_dir: str, size: str, seed: int = 42, force: bool = False) -> Dict[str, str]:
+    """
+    Build (or reuse) the corpus of one size class.
+
+    Returns:
+        Mapping of case name -> file path
+    """
+    params = SIZE_CLASSES[size]
+    directory = os.path.join(out_dir, size)
+    os.makedirs(directory, exist_ok=True)
+
+    cases = {
+        "excel_tall": ("excel_tall.xlsx", lambda p: build_excel(p, params["tall_rows"], 8, seed)),
+        "excel_wide": ("excel_wide.xlsx", lambda p: build_excel(p, params["wide_rows"], params["wide_cols"], seed)),
+        "word": ("word.docx", lambda p: build_docx(p, params["paragraphs"], seed)),
+        "pdf": ("report.pdf", lambda p: build_pdf(p, params["pdf_pages"], seed)),
+        "image": ("scan.png", lambda p: build_image(p, params["image_width"], seed)),
+    }
+
+    paths = {}
+    for name, (filename, build) in cases.items():
+        path = os.path.join(directory, filename)
+        if force or not os.path.exists(path):
+            build(path)
+        paths[name] = path
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the synthetic benchmark corpus")
+    parser.add_argument("--out", default=DEFAULT_CORPUS_DIR, help="Output directory")
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZE_CLASSES), default=["small", "medium"])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--force", action="store_true", help="Rebuild files that already exist")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        for name, path in build_corpus(args.out, size, args.seed, args.force).items():
+            print(f"{size:>6}  {name:<11} {os.path.getsize(path) / 1024:>10.1f} KB  {path}")
+
+
+if __name__ == "__main__":
+    main()
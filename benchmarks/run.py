@@ -0,0 +1,267 @@
+"""
+📈 Benchmark harness
+====================
+Runs every extractor and the end-to-end report on the synthetic corpus
+(corpus.py) and records, per case:
+
+- wall time (best of --repeat runs) and CPU time
+- throughput (input MB/s)
+- peak allocated memory (tracemalloc, measured in one extra run because
+  tracing slows allocation-heavy code down) and peak RSS
+
+Each run happens in a fresh worker process, so peak RSS of one case does not
+leak into the next. Library imports (and the OCR model, for cases with an
+image) are loaded before the clock starts and the result cache is disabled.
+A case in which any file fails is reported as ERROR instead of a timing, and
+the harness then exits with code 1.
+
+Results are written as JSON and can be compared with an earlier run:
+
+    python benchmarks/run.py --sizes small medium --output results/after.json \\
+        --compare results/before.json
+
+Cases: excel_tall, excel_wide, word, pdf, image (OCR; needs the easyocr model)
+and report (process_files + _aggregate_content + generate_html on all files,
+plus the streamed write_report / write_html_report to temporary files).
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+from corpus import DEFAULT_CORPUS_DIR, SIZE_CLASSES, build_corpus  # noqa: E402
+
+CASES = ["excel_tall", "excel_wide", "word", "pdf", "image", "report"]
+DEFAULT_RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+
+
+# ============================================================================
+# CASE RUNNERS (executed in a fresh worker process)
+# ============================================================================
+
+def _run_extractor(path: str) -> dict:
+    from app import DocumentProcessor, ProcessingOptions, open_local_file
+
+    processor = DocumentProcessor(ProcessingOptions(use_cache=False, workers=1))
+    with open_local_file(path) as file:
+        content = processor._extract(file, path.rsplit(".", 1)[-1].lower())
+    details = {"output_chars": len(content)}
+    if processor.pdf_page_stats:
+        details["pdf_pages"] = dict(processor.pdf_page_stats)
+    return details
+
+
+def _run_report(paths: list) -> dict:
+    import tempfile
+    from app import DocumentProcessor, ProcessingOptions, generate_html, open_local_file
+
+    processor = DocumentProcessor(ProcessingOptions(use_cache=False, workers=1))
+    handles = [open_local_file(path) for path in paths]
+    try:
+        started = time.perf_counter()
+        processor.process_files(handles)
+        extract_s = time.perf_counter() - started
+    finally:
+        for handle in handles:
+            handle.close()
+
+    started = time.perf_counter()
+    markdown_content = processor._aggregate_content()
+    aggregate_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    html_content = generate_html(markdown_content)
+    html_s = time.perf_counter() - started
+
+    with tempfile.TemporaryFile() as output:
+        started = time.perf_counter()
+        processor.write_report(output)
+        write_report_s = time.perf_counter() - started
+    with tempfile.TemporaryFile() as output:
+        started = time.perf_counter()
+        processor.write_html_report(output)
+        write_html_s = time.perf_counter() - started
+
+    return {
+        "output_chars": len(markdown_content),
+        "html_chars": len(html_content),
+        "stages_s": {
+            "process_files": extract_s, "aggregate": aggregate_s, "generate_html": html_s,
+            "write_report": write_report_s, "write_html_report": write_html_s,
+        },
+        "failed_files": [pf.filename for pf in processor.processed_files if not pf.success],
+    }
+
+
+def _warm_imports(paths: list) -> None:
+    """
+    Import every extractor dependency up front so timings exclude import cost,
+    and load the OCR model when a case includes an image.
+    """
+    import importlib
+    from app import OCR_EXTENSIONS
+
+    for module in ["app", "pandas", "openpyxl", "docx", "pdfplumber", "PIL.Image", "numpy", "markdown"]:
+        importlib.import_module(module)
+    if any(path.rsplit(".", 1)[-1].lower() in OCR_EXTENSIONS for path in paths):
+        from ocr_engine import get_ocr_engine
+        get_ocr_engine().warm_up()
+
+
+def run_case(case: str, paths: list, trace_memory: bool = False) -> dict:
+    """Run one case once in this (fresh) process, optionally tracing allocations."""
+    try:
+        _warm_imports(paths)
+    except Exception as e:
+        return {"error": f"Warm-up failed: {type(e).__name__}: {e}"}
+    if trace_memory:
+        tracemalloc.start()
+    cpu_started = time.process_time()
+    started = time.perf_counter()
+    try:
+        details = _run_report(paths) if case == "report" else _run_extractor(paths[0])
+        error = None
+    except Exception as e:
+        details, error = {}, f"{type(e).__name__}: {e}"
+    if details.get("failed_files"):
+        # A failed file makes the run faster, not slower: never report it as a valid timing
+        error = f"Failed files: {', '.join(details['failed_files'])}"
+    wall_s = time.perf_counter() - started
+    cpu_s = time.process_time() - cpu_started
+    peak_alloc = None
+    if trace_memory:
+        _, peak_alloc = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    max_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        max_rss_kb //= 1024  # Bytes on macOS
+
+    return {
+        "wall_s": wall_s,
+        "cpu_s": cpu_s,
+        "peak_alloc_mb": peak_alloc / 1024 / 1024 if peak_alloc is not None else None,
+        "max_rss_mb": max_rss_kb / 1024,
+        "error": error,
+        **details,
+    }
+
+
+def measure(case: str, paths: list, repeat: int) -> dict:
+    """
+    Run a case `repeat` times plus one traced run, each in a fresh process.
+    Keeps the best untraced wall time and the traced peak allocation.
+    """
+    context = multiprocessing.get_context("spawn")
+
+    def fresh_run(trace_memory: bool) -> dict:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            return pool.submit(run_case, case, paths, trace_memory).result()
+
+    runs = []
+    for _ in range(repeat):
+        runs.append(fresh_run(trace_memory=False))
+        if runs[-1]["error"]:
+            return {**runs[-1], "runs": len(runs)}
+
+    best = min(runs, key=lambda run: run["wall_s"])
+    best["peak_alloc_mb"] = fresh_run(trace_memory=True)["peak_alloc_mb"]
+    input_mb = sum(os.path.getsize(path) for path in paths) / 1024 / 1024
+    best.update({
+        "wall_s_median": statistics.median(run["wall_s"] for run in runs),
+        "runs": len(runs),
+        "input_mb": input_mb,
+        "mb_per_s": input_mb / best["wall_s"] if best["wall_s"] else None,
+    })
+    return best
+
+
+# ============================================================================
+# REPORTING
+# ============================================================================
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_table(results: list, baseline: dict) -> None:
+    print(f"\n{'size':<7} {'case':<11} {'wall s':>8} {'cpu s':>8} {'MB/s':>8} "
+          f"{'alloc MB':>9} {'RSS MB':>8} {'vs base':>8}")
+    for result in results:
+        if result.get("error"):
+            print(f"{result['size']:<7} {result['case']:<11} ERROR {result['error']}")
+            continue
+        base = baseline.get((result["size"], result["case"]))
+        ratio = f"{result['wall_s'] / base['wall_s']:.2f}x" if base and base.get("wall_s") else "-"
+        print(
+            f"{result['size']:<7} {result['case']:<11} {result['wall_s']:>8.3f} {result['cpu_s']:>8.3f} "
+            f"{result['mb_per_s'] or 0:>8.2f} {result['peak_alloc_mb']:>9.1f} {result['max_rss_mb']:>8.1f} {ratio:>8}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run extractor and end-to-end benchmarks")
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZE_CLASSES), default=["small"])
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=CASES)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case (best wall time is kept)")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS_DIR, help="Corpus directory (built if missing)")
+    parser.add_argument("--output", help="Results JSON path (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", help="Earlier results JSON to compare wall times against")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        corpus = build_corpus(args.corpus, size)
+        for case in args.cases:
+            paths = list(corpus.values()) if case == "report" else [corpus[case]]
+            print(f"Running {size}/{case} ...", file=sys.stderr)
+            results.append({"size": size, "case": case, **measure(case, paths, args.repeat)})
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as previous:
+            baseline = {(r["size"], r["case"]): r for r in json.load(previous)["results"]}
+    print_table(results, baseline)
+
+    output = args.output or os.path.join(DEFAULT_RESULTS_DIR, f"{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as result_file:
+        json.dump({
+            "meta": {
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "git_revision": git_revision(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "repeat": args.repeat,
+            },
+            "results": results,
+        }, result_file, indent=2)
+    print(f"\nResults written to {output}")
+    if any(result.get("error") for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
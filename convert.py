@@ -0,0 +1,295 @@
+"""
+🖥️ Batch Converter - Headless CLI for DocumentProcessor
+========================================================
+Converts files and directory trees to Markdown/HTML without Streamlit
+(Streamlit is never imported), for scheduled jobs over thousands of files.
+
+Usage:
+    python convert.py docs/ "scans/**/*.png" -o report.md
+    python convert.py docs/ -o out/ --per-file --format html --workers 4
+    python convert.py docs/ -o report.md --metrics metrics.prom
+
+Inputs can be files, directories (searched recursively for supported
+extensions) or glob patterns. Files are processed in batches, so only one
+batch of file handles and extracted content is in memory at a time. With
+--per-file, each file's output is written as soon as its batch finishes;
+otherwise each file's report section is spilled to a temporary file and
+the report is assembled from it at the end. With --metrics, the time
+spent per file and stage is written as JSON, or in the Prometheus text
+format for a .prom path (e.g. for a node_exporter textfile collector).
+
+Exit codes: 0 = all files converted, 1 = some files failed, 2 = no input
+files, or --per-file inputs that would write the same output path.
+"""
+
+import argparse
+import glob
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from dataclasses import replace
+from typing import BinaryIO, Dict, Iterator, List, Tuple
+
+from app import (
+    PDF_TEXT_ENGINES, SUPPORTED_EXTENSIONS, DocumentProcessor, ProcessedFile, ProcessingOptions,
+    ProgressEvent, format_page_stats, open_local_file
+)
+from metrics import StageMetrics, build_snapshot, snapshot_to_json, snapshot_to_prometheus
+
+
+# ============================================================================
+# INPUT DISCOVERY
+# ============================================================================
+
+def collect_inputs(patterns: List[str]) -> List[Tuple[str, str]]:
+    """
+    Expand paths, directories and globs into supported input files.
+
+    Returns:
+        Sorted, de-duplicated (path, relative name) pairs. The relative name
+        is used for per-file output paths and mirrors the input tree.
+    """
+    found = {}
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            candidates = glob.glob(os.path.join(pattern, '**', '*'), recursive=True)
+            root = pattern
+        elif glob.has_magic(pattern):
+            candidates = glob.glob(pattern, recursive=True)
+            root = pattern.split('*')[0].split('?')[0].split('[')[0]
+            root = root if root.endswith(os.sep) else os.path.dirname(root)
+        else:
+            candidates = [pattern]
+            root = os.path.dirname(pattern)
+
+        for path in candidates:
+            extension = path.rsplit('.', 1)[-1].lower()
+            if os.path.isfile(path) and extension in SUPPORTED_EXTENSIONS:
+                found.setdefault(path, os.path.relpath(path, root or '.'))
+
+    return sorted(found.items())
+
+
+def parse_page_range(value: str) -> Tuple[int, int]:
+    """Parse "A-B", "A-" or "B" into (first page, last page); last 0 = end of document."""
+    first, sep, last = value.partition('-')
+    try:
+        if not sep:
+            return 1, int(first)
+        return int(first or 1), int(last or 0)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid page range: {value!r}")
+
+
+# ============================================================================
+# OUTPUT
+# ============================================================================
+
+def write_report(path: str, processed_files: List[ProcessedFile], output_format: str,
+                 options: ProcessingOptions) -> Dict[str, Dict]:
+    """
+    Stream a report of the processed files into `path` section by section.
+    
+    Returns:
+        Stage timings of writing the report
+    """
+    report = DocumentProcessor(options)
+    report.processed_files = processed_files
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'wb') as output:
+        if output_format == 'html':
+            report.write_html_report(output)
+        else:
+            report.write_report(output)
+    return report.report_metrics.to_dict()
+
+
+def spill_sections(spool: BinaryIO, processed_files: List[ProcessedFile],
+                   options: ProcessingOptions) -> List[Tuple[int, int]]:
+    """
+    Append the report section of each processed file to `spool`.
+
+    Returns:
+        (offset, length) of each section in the spool
+    """
+    report = DocumentProcessor(options)
+    spans = []
+    for processed_file in processed_files:
+        data = report._file_section(processed_file).encode('utf-8')
+        spans.append((spool.tell(), len(data)))
+        spool.write(data)
+    return spans
+
+
+def write_spilled_report(path: str, processed_files: List[ProcessedFile], spool: BinaryIO,
+                         spans: List[Tuple[int, int]], output_format: str,
+                         options: ProcessingOptions) -> Dict[str, Dict]:
+    """
+    Write an aggregated report whose file sections were spilled with
+    spill_sections(); only one section is read back at a time.
+
+    Args:
+        processed_files: The files, content not needed (header and Table of Contents)
+
+    Returns:
+        Stage timings of writing the report
+    """
+    report = DocumentProcessor(options)
+    report.processed_files = processed_files
+
+    def sections() -> Iterator[Tuple[str, str, str]]:
+        for processed_file, (offset, length) in zip(processed_files, spans):
+            spool.seek(offset)
+            markdown_text = spool.read(length).decode('utf-8')
+            yield markdown_text, report._create_anchor(processed_file.filename), processed_file.filename
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'wb') as output:
+        if output_format == 'html':
+            report.write_html_report(output, report._report_header(), sections())
+        else:
+            report.write_report(output, report._report_header(), sections())
+    return report.report_metrics.to_dict()
+
+
+def write_metrics(path: str, metrics_snapshot: Dict) -> None:
+    """Write a metrics snapshot as Prometheus text (.prom) or JSON (anything else)."""
+    text = (snapshot_to_prometheus(metrics_snapshot) if path.lower().endswith('.prom')
+            else snapshot_to_json(metrics_snapshot))
+    with open(path, 'w', encoding='utf-8') as metrics_file:
+        metrics_file.write(text)
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Convert documents to a unified Markdown/HTML report without Streamlit."
+    )
+    parser.add_argument("inputs", nargs="+", help="Files, directories or glob patterns")
+    parser.add_argument("-o", "--output", required=True,
+                        help="Report file, or output directory with --per-file")
+    parser.add_argument("--format", choices=["md", "html"], default=None,
+                        help="Output format (default: from --output extension, else md)")
+    parser.add_argument("--per-file", action="store_true",
+                        help="Write one output per input file instead of one aggregated report")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Worker processes (default: 0 = one per CPU, 1 = sequential)")
+    parser.add_argument("--batch-size", type=int, default=64,
+                        help="Files opened and processed per batch (default: 64)")
+    parser.add_argument("--pages", type=parse_page_range, default=(1, 0), metavar="A-B",
+                        help="PDF pages to extract, e.g. 1-50 or 10- (default: all)")
+    parser.add_argument("--max-chars", type=int, default=0,
+                        help="Stop extracting a PDF once its output reaches this many characters (default: no limit)")
+    parser.add_argument("--pdf-engine", choices=PDF_TEXT_ENGINES, default=PDF_TEXT_ENGINES[0],
+                        help="Text layer engine for PDF pages without tables (default: pdfplumber)")
+    parser.add_argument("--max-text-chars", type=int, default=0,
+                        help="Keep at most this many characters of each .txt/.md file (default: no limit)")
+    parser.add_argument("--file-timeout", type=float, default=0, metavar="SECONDS",
+                        help="Stop a file after this many seconds, keeping the pages/sheets done (default: no limit)")
+    parser.add_argument("--file-max-memory", type=float, default=0, metavar="MB",
+                        help="Stop a file whose worker uses more memory than this (default: no limit)")
+    parser.add_argument("--no-cache", action="store_true", help="Do not use the result cache")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="Write per-file, per-stage timings to PATH (.prom = Prometheus text, else JSON)")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="Add peak allocated memory per stage to --metrics (slower)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Only print the summary")
+    args = parser.parse_args(argv)
+
+    output_format = args.format or ('html' if args.output.lower().endswith('.html') else 'md')
+    inputs = collect_inputs(args.inputs)
+    if not inputs:
+        print("No supported input files found.", file=sys.stderr)
+        return 2
+    if args.per_file:
+        targets: Dict[str, str] = {}
+        for path, relative_name in inputs:
+            target = os.path.normcase(os.path.normpath(relative_name))
+            if target in targets:
+                print(f"--per-file: {targets[target]} and {path} would both be written to "
+                      f"{os.path.join(args.output, relative_name)}.{output_format}; "
+                      f"pass their directories in one common parent instead", file=sys.stderr)
+                return 2
+            targets[target] = path
+
+    options = ProcessingOptions(
+        workers=args.workers, use_cache=not args.no_cache,
+        pdf_first_page=args.pages[0], pdf_last_page=args.pages[1], pdf_max_output_chars=args.max_chars,
+        pdf_text_engine=args.pdf_engine, text_max_chars=args.max_text_chars,
+        file_timeout_s=args.file_timeout, file_max_memory_mb=args.file_max_memory,
+        trace_memory=args.trace_memory
+    )
+    processor = DocumentProcessor(options)
+    batch_size = max(1, args.batch_size)
+    measured_files: List[ProcessedFile] = []   # Without content, for --metrics and the report header
+    spool = tempfile.TemporaryFile(prefix="sections_")   # Report sections (aggregated mode)
+    spans: List[Tuple[int, int]] = []
+    report_metrics = StageMetrics()
+    failed = cache_hits = 0
+    page_stats: Counter = Counter()
+    total_bytes = sum(os.path.getsize(path) for path, _ in inputs)
+    started = time.perf_counter()
+
+    def on_progress(event: ProgressEvent):
+        if not args.quiet and not event.is_page_event:
+            print(f"[{done + event.files_done}/{len(inputs)}] {event.filename}", file=sys.stderr)
+
+    for batch_start in range(0, len(inputs), batch_size):
+        batch = inputs[batch_start:batch_start + batch_size]
+        done = batch_start
+        handles = [open_local_file(path) for path, _ in batch]
+        try:
+            processor.extract_files(handles, on_progress)
+        finally:
+            for handle in handles:
+                handle.close()
+        cache_hits += processor.cache_hits
+        page_stats.update(processor.pdf_page_stats)
+
+        for (path, relative_name), processed_file in zip(batch, processor.processed_files):
+            if not processed_file.success:
+                failed += 1
+                print(f"  ✗ {path}: {processed_file.error_message}", file=sys.stderr)
+                continue
+            if processed_file.error_message:
+                print(f"  ! {path}: {processed_file.error_message}", file=sys.stderr)
+            if args.per_file:
+                target = os.path.join(args.output, f"{relative_name}.{output_format}")
+                report_metrics.merge(write_report(target, [processed_file], output_format, options))
+        measured_files.extend(replace(pf, content="") for pf in processor.processed_files)
+
+        if not args.per_file:
+            spans.extend(spill_sections(spool, processor.processed_files, options))
+
+    with spool:
+        if not args.per_file:
+            report_metrics.merge(write_spilled_report(
+                args.output, measured_files, spool, spans, output_format, options
+            ))
+    if args.metrics:
+        write_metrics(args.metrics, build_snapshot(measured_files, report_metrics.to_dict()))
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"Converted {len(inputs) - failed}/{len(inputs)} files "
+        f"({total_bytes / 1024 / 1024:.1f} MB) in {elapsed:.2f}s: "
+        f"{len(inputs) / elapsed:.1f} files/s, {total_bytes / 1024 / 1024 / elapsed:.2f} MB/s, "
+        f"{cache_hits} cache hits, {failed} failed",
+        file=sys.stderr
+    )
+    if page_stats:
+        print(f"PDF pages: {format_page_stats(page_stats)}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
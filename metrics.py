@@ -0,0 +1,292 @@
+"""
+⏱️ Metrics - Per-file, per-stage timing and memory instrumentation
+===================================================================
+When a batch is slow, the total time does not say which file or which step
+(PDF table detection, OCR, Excel parsing, report rendering, ...) is to
+blame. ``StageMetrics`` records, per named stage:
+
+- wall time (``time.perf_counter``)
+- CPU time of the process (``time.process_time``; includes every thread
+  and library thread pool, e.g. torch during OCR)
+- peak allocated memory above the stage's starting point (``tracemalloc``),
+  only while memory tracing is on: tracing slows allocation-heavy code
+  down noticeably, so it is opt-in (``trace_memory()``)
+- number of calls; repeated stages accumulate
+
+Stages nest: a stage opened inside another one is recorded as
+``"outer/inner"``, so the top-level stages of a file add up to its total.
+
+Snapshots (``build_snapshot()``) are plain dicts and can be exported as JSON
+(``snapshot_to_json()``) or in the Prometheus text exposition format
+(``snapshot_to_prometheus()``), e.g. for a node_exporter textfile collector.
+
+Like ``result_cache``, this module has no Streamlit or extractor imports,
+so worker processes and the CLI can use it too.
+"""
+
+import json
+import re
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+MB = 1024 * 1024
+
+# Prometheus help text of the whole-run timings (DocumentProcessor.run_metrics)
+RUN_METRICS_HELP = {
+    'time_to_first_result_s': "Time from the start of the run until the first file finished.",
+    'extract_files_s': "Time to extract every file of the run.",
+}
+
+
+# ============================================================================
+# RECORDING
+# ============================================================================
+
+class StageMetrics:
+    """
+    Accumulated timings of the stages of one unit of work (a file, a report).
+
+    A collector may be used from several threads; each thread keeps its own
+    stack of open stages.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, Dict[str, Optional[float]]] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Time the enclosed block as stage `name` (nested inside any stage
+        already open in this thread).
+        """
+        stack = self._stack()
+        frame = {'name': name, 'peak': 0, 'start': 0}
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            # The enclosing stage keeps its peak so far; ours starts here
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+            tracemalloc.reset_peak()
+            frame['start'] = current
+        stack.append(frame)
+        wall_started = time.perf_counter()
+        cpu_started = time.process_time()
+        try:
+            yield
+        finally:
+            wall_s = time.perf_counter() - wall_started
+            cpu_s = time.process_time() - cpu_started
+            path = "/".join(open_frame['name'] for open_frame in stack)
+            stack.pop()
+            peak_alloc_mb = None
+            if tracing and tracemalloc.is_tracing():
+                peak = max(frame['peak'], tracemalloc.get_traced_memory()[1])
+                if stack:
+                    stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+                peak_alloc_mb = max(0, peak - frame['start']) / MB
+            self.add(path, wall_s, cpu_s, peak_alloc_mb)
+
+    def add(self, name: str, wall_s: float, cpu_s: float,
+            peak_alloc_mb: Optional[float] = None, calls: int = 1) -> None:
+        """Add one measurement to stage `name` (times add up, peaks keep the maximum)."""
+        with self._lock:
+            entry = self.stages.setdefault(
+                name, {'wall_s': 0.0, 'cpu_s': 0.0, 'peak_alloc_mb': None, 'calls': 0}
+            )
+            entry['wall_s'] += wall_s
+            entry['cpu_s'] += cpu_s
+            entry['calls'] += calls
+            if peak_alloc_mb is not None:
+                entry['peak_alloc_mb'] = max(entry['peak_alloc_mb'] or 0.0, peak_alloc_mb)
+
+    def merge(self, stages: Dict[str, Dict], share: float = 1.0, prefix: str = "") -> None:
+        """
+        Add stages recorded elsewhere (e.g. returned by a worker process).
+
+        Args:
+            stages: Stage name -> entry, as in `self.stages`
+            share: Fraction of the times to add (a batch split across files)
+            prefix: Prepended to every stage name, e.g. "extract/"
+        """
+        for name, entry in stages.items():
+            self.add(
+                prefix + name, entry['wall_s'] * share, entry['cpu_s'] * share,
+                entry['peak_alloc_mb'], entry['calls']
+            )
+
+    def open_prefix(self) -> str:
+        """Stages open in this thread as a merge() prefix, e.g. "extract/" ("" if none)."""
+        return "".join(frame['name'] + "/" for frame in self._stack())
+
+    def to_dict(self) -> Dict[str, Dict[str, Optional[float]]]:
+        """Copy of the recorded stages (picklable, JSON serializable)."""
+        with self._lock:
+            return {name: dict(entry) for name, entry in self.stages.items()}
+
+    def _stack(self) -> List[Dict]:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+
+@contextmanager
+def trace_memory(enabled: bool = True) -> Iterator[None]:
+    """Turn tracemalloc on for the enclosed block unless it is already tracing."""
+    started = enabled and not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        yield
+    finally:
+        if started:
+            tracemalloc.stop()
+
+
+def total(stages: Dict[str, Dict]) -> Dict[str, Optional[float]]:
+    """Sum of the top-level stages (nested "a/b" stages are already part of "a")."""
+    top = [entry for name, entry in stages.items() if '/' not in name]
+    peaks = [entry['peak_alloc_mb'] for entry in top if entry['peak_alloc_mb'] is not None]
+    return {
+        'wall_s': sum(entry['wall_s'] for entry in top),
+        'cpu_s': sum(entry['cpu_s'] for entry in top),
+        'peak_alloc_mb': max(peaks) if peaks else None,
+        'calls': 1,
+    }
+
+
+# ============================================================================
+# EXPORT
+# ============================================================================
+
+def build_snapshot(processed_files: List, report_stages: Optional[Dict[str, Dict]] = None,
+                   run: Optional[Dict[str, float]] = None) -> Dict:
+    """
+    Collect the metrics of a run into a plain dict.
+
+    Args:
+        processed_files: Objects with filename, file_type, success and
+            metrics (stage name -> entry), e.g. ProcessedFile
+        report_stages: Stages of report generation (write_report, ...)
+        run: Whole-run timings in seconds, e.g. time_to_first_result_s
+
+    Returns:
+        {'generated', 'run', 'files': [{'filename', 'file_type', 'success',
+        'total', 'stages'}], 'report': stages}
+    """
+    return {
+        'generated': datetime.now().isoformat(timespec='seconds'),
+        'run': dict(run or {}),
+        'files': [
+            {
+                'filename': pf.filename,
+                'file_type': pf.file_type,
+                'success': pf.success,
+                'total': total(pf.metrics),
+                'stages': dict(sorted(pf.metrics.items())),  # "a" before "a/b"
+            }
+            for pf in processed_files
+        ],
+        'report': dict(sorted((report_stages or {}).items())),
+    }
+
+
+def snapshot_rows(metrics_snapshot: Dict) -> List[Dict]:
+    """Flatten a snapshot into one row per run timing, file stage and report stage (for tables)."""
+    result = [
+        {'file': '(run)', 'stage': name, 'wall_s': value, 'cpu_s': None, 'peak_alloc_mb': None, 'calls': None}
+        for name, value in metrics_snapshot.get('run', {}).items()
+    ]
+    for file_metrics in metrics_snapshot['files']:
+        stages = {'total': file_metrics['total'], **file_metrics['stages']}
+        for name, entry in stages.items():
+            result.append({'file': file_metrics['filename'], 'stage': name, **entry})
+    for name, entry in metrics_snapshot['report'].items():
+        result.append({'file': '(report)', 'stage': name, **entry})
+    return result
+
+
+def snapshot_to_json(metrics_snapshot: Dict) -> str:
+    """Snapshot as indented JSON."""
+    return json.dumps(metrics_snapshot, indent=2, ensure_ascii=False)
+
+
+def _label_value(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(**labels: str) -> str:
+    return "{" + ",".join(f'{key}="{_label_value(value)}"' for key, value in labels.items()) + "}"
+
+
+def snapshot_to_prometheus(metrics_snapshot: Dict, prefix: str = "docproc") -> str:
+    """
+    Snapshot in the Prometheus text exposition format.
+
+    Per-file series are labelled file / index / type / stage (stage
+    "total" is the whole file; index is the file's 1-based position in the
+    run, so two files of the same name, e.g. a/report.pdf and b/report.pdf
+    in the CLI, never produce duplicate series); report stages are labelled
+    stage only. Peak allocation is
+    only exported for stages measured with memory tracing on. Whole-run
+    timings become one gauge each, e.g. time_to_first_result_s ->
+    <prefix>_run_time_to_first_result_seconds.
+    """
+    prefix = re.sub(r'[^a-zA-Z0-9_:]', '_', prefix)
+    families = [
+        ('stage_wall_seconds', 'wall_s', 1, "Wall time of a processing stage."),
+        ('stage_cpu_seconds', 'cpu_s', 1, "Process CPU time during a processing stage."),
+        ('stage_peak_alloc_bytes', 'peak_alloc_mb', MB, "Peak memory allocated during a processing stage (tracemalloc)."),
+        ('stage_calls', 'calls', 1, "Number of times a processing stage ran."),
+    ]
+    lines = []
+
+    for scope, series in (('file', _file_series(metrics_snapshot)), ('report', _report_series(metrics_snapshot))):
+        for suffix, field, scale, help_text in families:
+            samples = [
+                (labels, entry[field] * scale) for labels, entry in series if entry[field] is not None
+            ]
+            if not samples:
+                continue
+            metric = f"{prefix}_{scope}_{suffix}"
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} gauge")
+            lines.extend(f"{metric}{labels} {value:.6g}" for labels, value in samples)
+
+    for name, value in metrics_snapshot.get('run', {}).items():
+        metric = f"{prefix}_run_{name[:-2] + '_seconds' if name.endswith('_s') else name}"
+        lines.append(f"# HELP {metric} {RUN_METRICS_HELP.get(name, name)}")
+        lines.append(f"# TYPE {metric} gauge")
+        lines.append(f"{metric} {value:.6g}")
+
+    if metrics_snapshot['files']:
+        metric = f"{prefix}_file_success"
+        lines.append(f"# HELP {metric} 1 if the file was converted, 0 if it failed.")
+        lines.append(f"# TYPE {metric} gauge")
+        for index, file_metrics in enumerate(metrics_snapshot['files'], 1):
+            labels = _labels(file=file_metrics['filename'], index=str(index), type=file_metrics['file_type'])
+            lines.append(f"{metric}{labels} {int(file_metrics['success'])}")
+
+    return "\n".join(lines) + "\n"
+
+
+def _file_series(metrics_snapshot: Dict) -> List:
+    series = []
+    for index, file_metrics in enumerate(metrics_snapshot['files'], 1):
+        stages = {'total': file_metrics['total'], **file_metrics['stages']}
+        for name, entry in stages.items():
+            labels = _labels(file=file_metrics['filename'], index=str(index), type=file_metrics['file_type'],
+                             stage=name)
+            series.append((labels, entry))
+    return series
+
+
+def _report_series(metrics_snapshot: Dict) -> List:
+    return [(_labels(stage=name), entry) for name, entry in metrics_snapshot['report'].items()]
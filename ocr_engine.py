@@ -0,0 +1,265 @@
+"""
+🔤 OCR Engine - Process-wide shared easyocr model
+==================================================
+Loading ``easyocr.Reader`` pulls the detector and recognizer weights into memory,
+which takes several seconds and hundreds of MB. Streamlit re-executes ``app.py``
+on every rerun, so any state stored there is rebuilt per run and per session.
+This module is imported (and therefore cached in ``sys.modules``) once per
+process, which makes it the right place to keep ONE reader shared by every
+session.
+
+Features:
+- Thread-safe: all access to the reader goes through a single lock, because
+  easyocr readers are not safe to call from several threads at once.
+- Warm-up: ``warm_up_on_start()`` loads the model in the background when the
+  server starts, so the first user does not pay the loading cost.
+- Idle eviction: with ``OCR_IDLE_TIMEOUT`` set (seconds), the model is dropped
+  after that long without use and reloaded transparently on the next call.
+
+Configuration (environment variables):
+- ``OCR_LANGUAGES``     Comma-separated language codes (default: ``vi,en``)
+- ``OCR_GPU``           ``1`` to run on GPU (default: ``0``)
+- ``OCR_IDLE_TIMEOUT``  Seconds of inactivity before eviction (default: ``0`` = never)
+- ``OCR_WARMUP``        ``1`` to load the model at server start (default: ``0``)
+"""
+
+import gc
+import os
+import threading
+import time
+from typing import List, Optional
+
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+OCR_LANGUAGES = [
+    lang.strip() for lang in os.environ.get("OCR_LANGUAGES", "vi,en").split(",") if lang.strip()
+]
+OCR_GPU = os.environ.get("OCR_GPU", "0") == "1"
+OCR_IDLE_TIMEOUT = float(os.environ.get("OCR_IDLE_TIMEOUT", "0"))
+OCR_WARMUP = os.environ.get("OCR_WARMUP", "0") == "1"
+
+
+# ============================================================================
+# OCR ENGINE
+# ============================================================================
+
+class OCREngine:
+    """
+    Thread-safe owner of a single lazily loaded ``easyocr.Reader``.
+
+    Use ``readtext()`` / ``readtext_batched()`` rather than holding on to
+    the reader: they serialize calls and keep the idle clock up to date, so
+    eviction never drops a model that is in use.
+    """
+
+    def __init__(self, languages: Optional[List[str]] = None, gpu: bool = False,
+                 idle_timeout: float = 0.0):
+        self.languages = list(languages or ['vi', 'en'])
+        self.gpu = gpu
+        self.idle_timeout = idle_timeout
+        self._reader = None
+        self._lock = threading.RLock()
+        self._last_used = 0.0
+        self._evict_timer: Optional[threading.Timer] = None
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether the model is currently in memory."""
+        return self._reader is not None
+
+    def get_reader(self):
+        """
+        Return the shared reader, loading it on first use.
+
+        Callers must not use the returned reader from several threads at
+        once; prefer ``readtext()`` which holds the engine lock.
+        """
+        with self._lock:
+            reader = self._load()
+            self._touch()
+            return reader
+
+    def readtext(self, image, **kwargs) -> list:
+        """Run ``easyocr.Reader.readtext`` on the shared model under the engine lock."""
+        with self._lock:
+            reader = self._load()
+            try:
+                return reader.readtext(image, **kwargs)
+            finally:
+                self._touch()
+
+    def readtext_batched(self, images: list, batch_images: int = 1, **kwargs) -> List[list]:
+        """
+        Run OCR on many images, ``batch_images`` at a time per detector pass
+        (``easyocr.Reader.readtext_batched``).
+
+        easyocr needs equal sizes within a batch, so images are sorted by area,
+        grouped so that padding adds at most half of the real pixels, and
+        padded (bottom/right, white) to the largest of their batch. Text
+        keeps its coordinates, and since the detector only shrinks images
+        larger than its canvas (2560 px), padding smaller images does not
+        change their scale. The lock is released between batches, so other
+        sessions are not blocked for the whole run.
+
+        Args:
+            images: uint8 numpy arrays (grayscale or RGB)
+            batch_images: Images per detector pass
+            **kwargs: Passed to ``readtext_batched`` (detail, batch_size, workers, ...)
+
+        Returns:
+            Results for each image, in input order
+        """
+        import numpy as np
+
+        results: List[Optional[list]] = [None] * len(images)
+        for batch in self._size_batches(images, max(1, batch_images)):
+            height = max(images[idx].shape[0] for idx in batch)
+            width = max(images[idx].shape[1] for idx in batch)
+            padded = []
+            for idx in batch:
+                image = images[idx]
+                padding = [(0, height - image.shape[0]), (0, width - image.shape[1])]
+                padding += [(0, 0)] * (image.ndim - 2)
+                if image.shape[:2] != (height, width):
+                    image = np.pad(image, padding, constant_values=255)
+                padded.append(image)
+
+            with self._lock:
+                reader = self._load()
+                try:
+                    batch_results = reader.readtext_batched(padded, **kwargs)
+                finally:
+                    self._touch()
+            for idx, result in zip(batch, batch_results):
+                results[idx] = result
+
+        return results
+
+    @staticmethod
+    def _size_batches(images: list, batch_images: int) -> List[List[int]]:
+        """Group image indices by size into batches of at most ``batch_images``."""
+        def area(idx: int) -> int:
+            return images[idx].shape[0] * images[idx].shape[1]
+
+        batches: List[List[int]] = []
+        current: List[int] = []
+        for idx in sorted(range(len(images)), key=area):
+            candidate = current + [idx]
+            padded_area = (len(candidate) * max(images[i].shape[0] for i in candidate)
+                           * max(images[i].shape[1] for i in candidate))
+            if current and (len(current) >= batch_images
+                            or padded_area > 1.5 * sum(area(i) for i in candidate)):
+                batches.append(current)
+                candidate = [idx]
+            current = candidate
+        if current:
+            batches.append(current)
+        return batches
+
+    def warm_up(self, background: bool = False) -> Optional[threading.Thread]:
+        """
+        Load the model ahead of the first OCR request.
+
+        Args:
+            background: Load in a daemon thread instead of blocking the caller
+
+        Returns:
+            The loader thread when ``background`` is True, otherwise None
+        """
+        if not background:
+            self.get_reader()
+            return None
+
+        thread = threading.Thread(target=self.get_reader, name="ocr-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def evict(self) -> None:
+        """Drop the model from memory. It is reloaded on the next request."""
+        with self._lock:
+            self._cancel_evict_timer()
+            if self._reader is not None:
+                self._reader = None
+                gc.collect()
+
+    def _load(self):
+        """Create the reader if needed. Caller must hold the lock."""
+        if self._reader is None:
+            import easyocr  # Heavy import (torch), only paid when OCR is used
+            self._reader = easyocr.Reader(self.languages, gpu=self.gpu)
+        return self._reader
+
+    def _touch(self) -> None:
+        """Record a use and (re)arm the idle eviction timer. Caller must hold the lock."""
+        self._last_used = time.monotonic()
+        if self.idle_timeout > 0:
+            self._cancel_evict_timer()
+            self._evict_timer = threading.Timer(self.idle_timeout, self._evict_if_idle)
+            self._evict_timer.daemon = True
+            self._evict_timer.start()
+
+    def _cancel_evict_timer(self) -> None:
+        if self._evict_timer is not None:
+            self._evict_timer.cancel()
+            self._evict_timer = None
+
+    def _evict_if_idle(self) -> None:
+        # Non-blocking: if OCR is running right now the model is clearly not idle
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            if time.monotonic() - self._last_used >= self.idle_timeout:
+                self._evict_timer = None
+                if self._reader is not None:
+                    self._reader = None
+                    gc.collect()
+        finally:
+            self._lock.release()
+
+
+# ============================================================================
+# PROCESS-WIDE INSTANCE
+# ============================================================================
+
+_engine: Optional[OCREngine] = None
+_engine_lock = threading.Lock()
+_warmup_started = False
+
+
+def get_ocr_engine() -> OCREngine:
+    """Return the process-wide OCR engine, creating it on first call."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = OCREngine(
+                    languages=OCR_LANGUAGES,
+                    gpu=OCR_GPU,
+                    idle_timeout=OCR_IDLE_TIMEOUT
+                )
+    return _engine
+
+
+def warm_up_on_start() -> None:
+    """
+    Server-start hook: load the model in the background once per process.
+
+    Safe to call on every Streamlit rerun - only the first call does anything,
+    so an idle-evicted model is not reloaded just because the page refreshed.
+    """
+    global _warmup_started
+    with _engine_lock:
+        if _warmup_started:
+            return
+        _warmup_started = True
+    get_ocr_engine().warm_up(background=True)
+
+
+if __name__ == "__main__":
+    # `python ocr_engine.py` pre-downloads and loads the models (e.g. at build time)
+    started = time.perf_counter()
+    get_ocr_engine().warm_up()
+    print(f"OCR model {OCR_LANGUAGES} loaded in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,144 @@
+"""
+🗃️ Report Store - Server-wide size limit and expiry for generated reports
+==========================================================================
+Every session keeps its last report (``ReportFiles`` in app.py) until the
+user clicks "Clear Results" or the session ends, so idle sessions of many
+users add up. This module tracks the reports of all sessions and deletes:
+
+- reports not used for ``REPORT_STORE_TTL_S`` seconds
+- the least recently used reports while all reports together take more
+  than ``REPORT_STORE_MAX_MB``
+
+A report used in the last ``ACTIVE_S`` seconds is never evicted for size,
+so a page someone is reading does not disappear; the limit can be exceeded
+while every report is in use.
+
+Entries are just a key, a size in bytes and a cleanup callback: this module
+knows nothing about report formats or Streamlit. Like ``result_cache``, it
+is imported once per process, so the registry is shared by every session.
+
+Configuration (environment variables):
+- ``REPORT_STORE_DIR``     Directory of report files (default: system temp directory)
+- ``REPORT_STORE_MAX_MB``  Size limit of all stored reports in MB (default: ``1024``)
+- ``REPORT_STORE_TTL_S``   Delete reports unused for this many seconds (default: ``3600``, ``0`` = never)
+"""
+
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+REPORT_STORE_DIR = os.environ.get("REPORT_STORE_DIR", tempfile.gettempdir())
+REPORT_STORE_MAX_MB = float(os.environ.get("REPORT_STORE_MAX_MB", "1024"))
+REPORT_STORE_TTL_S = float(os.environ.get("REPORT_STORE_TTL_S", "3600"))
+
+ACTIVE_S = 60  # Reports used this recently are not evicted for size
+
+
+# ============================================================================
+# STORE
+# ============================================================================
+
+class ReportStore:
+    """
+    Registry of stored reports with LRU and TTL eviction.
+
+    Cleanup callbacks run outside the lock and must remove the entry (or
+    tolerate it being gone) themselves; see remove(). All methods are
+    thread-safe.
+    """
+
+    def __init__(self, max_bytes: int, ttl_s: float):
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()  # Least recently used first
+        self._lock = threading.Lock()
+
+    def add(self, key: str, size_bytes: int, cleanup: Callable[[], None]) -> None:
+        """Register a report (or update its size), mark it used, then evict others if needed."""
+        with self._lock:
+            self._entries[key] = {'size': size_bytes, 'used': time.monotonic(), 'cleanup': cleanup}
+            self._entries.move_to_end(key)
+        self.evict()
+
+    def resize(self, key: str, size_bytes: int) -> bool:
+        """Update the size of a stored report, then evict others if needed; False if it is no longer stored."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry['size'] = size_bytes
+        self.evict()
+        return entry is not None
+
+    def touch(self, key: str) -> bool:
+        """Evict expired reports, then mark a report used; False if it is no longer stored."""
+        self.evict()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry['used'] = time.monotonic()
+                self._entries.move_to_end(key)
+        return entry is not None
+
+    def remove(self, key: str) -> None:
+        """Forget a report (its files are deleted by the caller)."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def evict(self) -> None:
+        """Delete expired reports, then least recently used idle ones until under the size limit."""
+        now = time.monotonic()
+        victims: List[Callable[[], None]] = []
+        with self._lock:
+            if self.ttl_s > 0:
+                for key in [key for key, entry in self._entries.items() if now - entry['used'] > self.ttl_s]:
+                    victims.append(self._entries.pop(key)['cleanup'])
+            total = sum(entry['size'] for entry in self._entries.values())
+            for key in list(self._entries):
+                if total <= self.max_bytes:
+                    break
+                entry = self._entries[key]
+                if now - entry['used'] < ACTIVE_S:
+                    break   # This and everything after it is in use
+                victims.append(self._entries.pop(key)['cleanup'])
+                total -= entry['size']
+            self.evictions += len(victims)
+
+        for cleanup in victims:
+            cleanup()
+
+    def stats(self) -> Dict[str, int]:
+        """Stored report count, their total size and the number of evictions so far."""
+        with self._lock:
+            return {
+                'reports': len(self._entries),
+                'bytes': sum(entry['size'] for entry in self._entries.values()),
+                'evictions': self.evictions,
+            }
+
+
+# ============================================================================
+# PROCESS-WIDE INSTANCE
+# ============================================================================
+
+_store: Optional[ReportStore] = None
+_store_lock = threading.Lock()
+
+
+def get_report_store() -> ReportStore:
+    """Return the process-wide report store."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                os.makedirs(REPORT_STORE_DIR, exist_ok=True)
+                _store = ReportStore(int(REPORT_STORE_MAX_MB * 1024 * 1024), REPORT_STORE_TTL_S)
+    return _store
@@ -0,0 +1,234 @@
+"""
+🗄️ Result Cache - Content-addressed on-disk cache of extraction results
+========================================================================
+Users often upload the same files again, and every Streamlit rerun starts
+from zero (OCR can take minutes). This module keeps extracted Markdown in a
+local SQLite database keyed by:
+
+    SHA-256(file bytes) + extractor version + output-relevant options
+
+so identical inputs return instantly and results survive restarts. OCR
+text of scanned PDF pages and rendered HTML of report sections are cached
+the same way, keyed by content hash, each in its own table (namespace)
+with its own size limit and counters, so a large report cannot push
+extraction results out and the hit rates stay separate:
+
+- ``results``        Extracted Markdown of whole files
+- ``ocr_pages``      OCR text of scanned PDF pages
+- ``html_sections``  HTML of report sections
+
+Features:
+- Size-based LRU eviction: least recently used entries are removed once the
+  stored (compressed) content exceeds the size limit
+- Manual purge: ``purge()`` empties the cache
+- Hit/miss counters for the whole process (``stats()``)
+
+Like ``ocr_engine``, this module is imported once per process, so the
+connections and counters are shared by every session.
+
+Configuration (environment variables):
+- ``RESULT_CACHE``         ``0`` to disable the cache (default: ``1``)
+- ``RESULT_CACHE_DIR``     Directory of the database (default: ``~/.cache/document-processor``)
+- ``RESULT_CACHE_MAX_MB``  Size limit of extraction results in MB (default: ``512``)
+- ``RESULT_CACHE_OCR_MAX_MB``   Size limit of OCR page text in MB (default: ``128``)
+- ``RESULT_CACHE_HTML_MAX_MB``  Size limit of section HTML in MB (default: ``256``)
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, Optional
+
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+RESULT_CACHE_ENABLED = os.environ.get("RESULT_CACHE", "1") == "1"
+RESULT_CACHE_DIR = os.environ.get(
+    "RESULT_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "document-processor")
+)
+RESULT_CACHE_MAX_MB = float(os.environ.get("RESULT_CACHE_MAX_MB", "512"))
+
+# Namespace (SQLite table) -> size limit in MB
+CACHE_NAMESPACES = {
+    "results": RESULT_CACHE_MAX_MB,
+    "ocr_pages": float(os.environ.get("RESULT_CACHE_OCR_MAX_MB", "128")),
+    "html_sections": float(os.environ.get("RESULT_CACHE_HTML_MAX_MB", "256")),
+}
+
+HASH_CHUNK_SIZE = 1024 * 1024  # Read uploads in 1 MB chunks while hashing
+
+
+# ============================================================================
+# CACHE KEYS
+# ============================================================================
+
+def hash_file(file) -> str:
+    """SHA-256 of a binary file object, read in chunks. The position is reset to 0."""
+    digest = hashlib.sha256()
+    file.seek(0)
+    for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def hash_text(text: str) -> str:
+    """SHA-256 of a string (UTF-8), e.g. a Markdown section rendered to HTML."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def make_key(content_hash: str, file_extension: str, version: str, options: Dict) -> str:
+    """Combine content hash, extractor version and options into one cache key."""
+    payload = json.dumps(
+        {"sha256": content_hash, "ext": file_extension, "version": version, "options": options},
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# ============================================================================
+# RESULT CACHE
+# ============================================================================
+
+class ResultCache:
+    """
+    SQLite-backed store of one namespace (see CACHE_NAMESPACES) with
+    size-based LRU eviction.
+
+    Content is zlib-compressed; the size limit applies to the compressed size.
+    All methods are thread-safe.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, namespace: str = "results"):
+        if namespace not in CACHE_NAMESPACES:
+            raise ValueError(f"Unknown cache namespace: {namespace}")
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(
+            os.path.join(directory, "results.sqlite3"),
+            check_same_thread=False,
+            isolation_level=None  # Autocommit; writes are wrapped explicitly
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS {namespace} (
+                key TEXT PRIMARY KEY,
+                filename TEXT NOT NULL,
+                content BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """.format(namespace=namespace)
+        )
+        # "results" keeps the index name it had before namespaces existed
+        index = "idx_last_access" if namespace == "results" else f"idx_{namespace}_last_access"
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {index} ON {namespace} (last_access)")
+
+    def get(self, key: str) -> Optional[str]:
+        """Return cached content for `key` (and mark it recently used), or None."""
+        with self._lock:
+            row = self._conn.execute(f"SELECT content FROM {self.namespace} WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(f"UPDATE {self.namespace} SET last_access = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+        return zlib.decompress(row[0]).decode("utf-8")
+
+    def put(self, key: str, filename: str, content: str) -> None:
+        """Store content for `key`, then evict least recently used entries if over the limit."""
+        blob = zlib.compress(content.encode("utf-8"), 1)
+        if len(blob) > self.max_bytes:
+            return  # Would evict everything else and still not fit
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    f"INSERT OR REPLACE INTO {self.namespace} VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, filename, blob, len(blob), now, now)
+                )
+                self._evict()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def purge(self) -> None:
+        """Remove every entry of this namespace and reclaim disk space."""
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.namespace}")
+            self._conn.execute("VACUUM")
+
+    def stats(self) -> Dict[str, int]:
+        """Entry count, stored bytes and process-wide hit/miss counters."""
+        with self._lock:
+            entries, size = self._conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.namespace}"
+            ).fetchone()
+            return {"entries": entries, "bytes": size, "hits": self.hits, "misses": self.misses}
+
+    def _evict(self) -> None:
+        """Delete least recently used entries until under the size limit. Caller holds the lock."""
+        (total,) = self._conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.namespace}").fetchone()
+        if total <= self.max_bytes:
+            return
+
+        rows = self._conn.execute(f"SELECT key, size FROM {self.namespace} ORDER BY last_access ASC")
+        stale = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        self._conn.executemany(f"DELETE FROM {self.namespace} WHERE key = ?", stale)
+
+
+# ============================================================================
+# PROCESS-WIDE INSTANCE
+# ============================================================================
+
+_caches: Dict[str, ResultCache] = {}
+_cache_lock = threading.Lock()
+
+
+def get_result_cache(namespace: str = "results") -> Optional[ResultCache]:
+    """Return the process-wide cache of a namespace, or None when disabled or unavailable."""
+    global RESULT_CACHE_ENABLED
+    if not RESULT_CACHE_ENABLED:
+        return None
+    cache = _caches.get(namespace)
+    if cache is None:
+        with _cache_lock:
+            cache = _caches.get(namespace)
+            if cache is None:
+                try:
+                    cache = _caches[namespace] = ResultCache(
+                        RESULT_CACHE_DIR, int(CACHE_NAMESPACES[namespace] * 1024 * 1024), namespace
+                    )
+                except (OSError, sqlite3.Error):
+                    # Read-only or full disk: run without a cache rather than failing uploads
+                    RESULT_CACHE_ENABLED = False
+                    return None
+    return cache
+
+
+def all_result_caches() -> Dict[str, ResultCache]:
+    """The cache of every namespace (empty when disabled or unavailable)."""
+    caches = {namespace: get_result_cache(namespace) for namespace in CACHE_NAMESPACES}
+    return {namespace: cache for namespace, cache in caches.items() if cache is not None}
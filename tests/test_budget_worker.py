@@ -0,0 +1,14 @@
+"""A BudgetWorker whose process dies while starting reports it instead of raising."""
+
+from workers import BudgetWorker
+
+
+def test_worker_dying_during_import_returns_outcome(tmp_path, monkeypatch):
+    # The spawned process imports `app` first; make that import kill it
+    (tmp_path / "app.py").write_text("import os\nos._exit(3)\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    worker = BudgetWorker()
+    outcome = worker.run(str(tmp_path / "app.py"), "txt", {}, timeout_s=30)
+    assert outcome.content is None
+    assert outcome.error == "Worker process died while starting (exit code 3)"
+    assert worker._process is None
@@ -0,0 +1,42 @@
+"""Parity of the streamed .xlsx path with the pandas path (ProcessingOptions.excel_streaming_threshold_mb)."""
+
+import io
+
+import openpyxl
+import pytest
+
+from app import DocumentProcessor, ProcessingOptions
+
+HEADER_CASES = [
+    ['a', 'a', 'a.1'],
+    [1.0, True],
+    ['x', None, 'x', 'Unnamed: 1'],
+    ['a', 'a', 'a', 'a.1', 'a.2'],
+    [2, '2', 2.0],
+    [None, 'Unnamed: 0'],
+]
+
+
+def workbook_bytes(header, rows=3):
+    workbook = openpyxl.Workbook()
+    worksheet = workbook.active
+    worksheet.append(header)
+    for row in range(rows):
+        worksheet.append([f"r{row}c{col}" for col in range(len(header))])
+    output = io.BytesIO()
+    workbook.save(output)
+    output.name = "book.xlsx"
+    return output
+
+
+def convert(data, streaming):
+    options = ProcessingOptions(workers=1, use_cache=False,
+                                excel_streaming_threshold_mb=0 if streaming else None)
+    data.seek(0)
+    return DocumentProcessor(options)._process_excel(data)
+
+
+@pytest.mark.parametrize("header", HEADER_CASES, ids=repr)
+def test_streamed_headers_match_pandas(header):
+    data = workbook_bytes(header)
+    assert convert(data, streaming=True) == convert(data, streaming=False)
@@ -0,0 +1,16 @@
+"""Import-time budget of the processing modules (see benchmarks/bench_import.py)."""
+
+from benchmarks.bench_import import BUDGET_MS, MODULES, eager_heavy, measure
+
+RUNS = 3
+
+
+def test_no_heavy_dependency_imported_eagerly():
+    _, imported = measure(MODULES)
+    assert eager_heavy(imported) == []
+
+
+def test_import_time_within_budget():
+    # Best of a few fresh interpreters, as the benchmark does, to ignore noisy runs
+    best_ms = min(measure(MODULES)[0] / 1000 for _ in range(RUNS))
+    assert best_ms <= BUDGET_MS, f"importing {', '.join(MODULES)} took {best_ms:.1f} ms"
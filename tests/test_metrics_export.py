@@ -0,0 +1,65 @@
+"""Prometheus text export of metrics snapshots (metrics.snapshot_to_prometheus)."""
+
+import re
+from types import SimpleNamespace
+
+from metrics import build_snapshot, snapshot_to_prometheus
+
+SAMPLE = re.compile(r'^(?P<name>[a-zA-Z_:][a-zA-Z0-9_:]*)(?P<labels>\{.*\})? (?P<value>\S+)$')
+
+
+def stage(wall_s: float, peak_alloc_mb=None) -> dict:
+    return {'wall_s': wall_s, 'cpu_s': wall_s / 2, 'peak_alloc_mb': peak_alloc_mb, 'calls': 1}
+
+
+def processed(filename: str, file_type: str = 'pdf', success: bool = True):
+    return SimpleNamespace(filename=filename, file_type=file_type, success=success,
+                           metrics={'pdf_open': stage(0.1), 'pdf_open/tables': stage(0.05)})
+
+
+def samples(text: str) -> list:
+    result = []
+    for line in text.splitlines():
+        if line.startswith('#'):
+            assert re.match(r'^# (HELP|TYPE) [a-zA-Z_:][a-zA-Z0-9_:]* \S', line), line
+            continue
+        match = SAMPLE.match(line)
+        assert match, line
+        float(match['value'])
+        result.append((match['name'], match['labels'] or ""))
+    return result
+
+
+def test_files_with_the_same_name_get_distinct_series():
+    snapshot = build_snapshot(
+        [processed('report.pdf'), processed('report.pdf', success=False), processed('notes.txt', 'txt')],
+        {'write_report': stage(0.2)}, {'time_to_first_result_s': 0.3},
+    )
+    series = samples(snapshot_to_prometheus(snapshot))
+    assert len(series) == len(set(series))
+    assert ('docproc_file_success', '{file="report.pdf",index="2",type="pdf"}') in series
+    assert ('docproc_file_stage_wall_seconds',
+            '{file="report.pdf",index="1",type="pdf",stage="pdf_open/tables"}') in series
+
+
+def test_every_family_has_help_and_type_before_its_samples():
+    text = snapshot_to_prometheus(build_snapshot(
+        [processed('a.pdf')], {'write_report': stage(0.2, peak_alloc_mb=1.5)}, {'extract_files_s': 1.0},
+    ))
+    declared = set()
+    for line in text.splitlines():
+        if line.startswith('# TYPE '):
+            name = line.split()[2]
+            assert name not in declared
+            declared.add(name)
+        elif not line.startswith('#'):
+            assert SAMPLE.match(line)['name'] in declared
+    assert 'docproc_report_stage_peak_alloc_bytes{stage="write_report"} 1.57286e+06' in text
+    assert 'docproc_run_extract_files_seconds 1' in text
+    # Peak allocation is only exported for stages measured with tracing on
+    assert 'docproc_file_stage_peak_alloc_bytes' not in text
+
+
+def test_label_values_are_escaped():
+    text = snapshot_to_prometheus(build_snapshot([processed('we "said"\\n.pdf')]))
+    assert 'file="we \\"said\\"\\\\n.pdf"' in text
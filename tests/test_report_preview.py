@@ -0,0 +1,116 @@
+"""Preview pagination of stored reports (ReportFiles) and truncate_preview."""
+
+import gzip
+import io
+import os
+import zlib
+
+import pytest
+
+import app
+from app import PREVIEW_BLOCK_HEADERS, DocumentProcessor, ProcessingOptions, ReportFiles, truncate_preview
+
+PAGE_BYTES = 400
+
+
+def table(rows: int) -> str:
+    return "| Name | Value |\n| --- | --- |\n" + "".join(f"| row {i} | {i * 7} |\n" for i in range(rows))
+
+
+def page_block(number: int, total: int) -> str:
+    return f"#### 📄 Page {number}/{total}\n\n" + f"Text of page {number}. " * 8 + "\n\n"
+
+
+def sheet_block(name: str, rows: int) -> str:
+    return f"### 📊 Sheet: {name}\n\n" + table(rows) + "\n"
+
+
+@pytest.fixture
+def report(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "PREVIEW_PAGE_BYTES", PAGE_BYTES)
+    monkeypatch.setattr(app, "REPORT_STORE_DIR", str(tmp_path))
+    text = (
+        "Intro before the first block.\n\n"
+        + "".join(page_block(n, 4) for n in range(1, 5))
+        + sheet_block("Small", 3)
+        + sheet_block("Large", 60)      # Larger than a page: continues mid-table
+        + page_block(1, 1)
+    )
+    upload = io.BytesIO(text.encode("utf-8"))
+    upload.name, upload.size = "doc.md", len(upload.getvalue())
+    processor = DocumentProcessor(ProcessingOptions(workers=1, use_cache=False))
+    processor.extract_files([upload])
+    expected = io.BytesIO()
+    processor.write_report(expected)
+
+    report = ReportFiles(processor)
+    yield report, expected.getvalue()
+    report.cleanup()
+
+
+def stored_pages(report: ReportFiles, section: int):
+    with open(report.markdown_path, "rb") as markdown_file:
+        data = markdown_file.read()
+    for entry in report.preview_sections[section]["pages"]:
+        member = data[entry["offset"]:entry["offset"] + entry["length"]]
+        yield entry, zlib.decompressobj(wbits=31).decompress(member).decode("utf-8")
+
+
+def test_pages_split_at_block_headers(report):
+    report, _ = report
+    pages = list(stored_pages(report, 1))
+    assert len(pages) > 4
+    for number, (entry, text) in enumerate(pages):
+        assert len(text.encode("utf-8")) <= PAGE_BYTES
+        if number == 0:
+            assert "Intro before the first block." in text
+        elif entry["table_header"]:
+            # Only the sheet larger than a page is cut inside a block
+            assert "Large (cont.)" in entry["label"] and text.startswith("| row ")
+        else:
+            assert text.encode("utf-8").startswith(PREVIEW_BLOCK_HEADERS), text[:40]
+
+
+def test_each_page_decompresses_on_its_own(report):
+    report, _ = report
+    for section in range(len(report.preview_sections)):
+        for entry, text in stored_pages(report, section):
+            assert len(text.encode("utf-8")) == entry["end"] - entry["start"]
+
+
+def test_pages_join_to_the_full_report(report):
+    report, expected = report
+    joined = "".join(text for section in range(len(report.preview_sections))
+                     for _, text in stored_pages(report, section))
+    assert joined.encode("utf-8") == expected
+    with gzip.open(report.markdown_path, "rb") as markdown_file:
+        assert markdown_file.read() == expected
+    entries = [entry for section in report.preview_sections for entry in section["pages"]]
+    assert [entry["offset"] for entry in entries[1:]] == [e["offset"] + e["length"] for e in entries[:-1]]
+    assert entries[-1]["offset"] + entries[-1]["length"] == os.path.getsize(report.markdown_path)
+
+
+def test_continued_page_repeats_the_table_header(report):
+    report, _ = report
+    pages = report.preview_sections[1]["pages"]
+    number = next(idx for idx, entry in enumerate(pages) if entry["table_header"])
+    markdown, hidden = report.read_preview(1, number, max_table_rows=2)
+    assert markdown.startswith("| Name | Value |\n| --- | --- |\n| row ")
+    assert hidden > 0 and f"… {hidden:,} more row(s) not shown" in markdown
+
+
+def test_truncate_preview_cuts_each_table():
+    text = "Before\n" + table(5) + "\nBetween\n" + table(1) + "\nAfter\n" + table(4)
+    markdown, hidden = truncate_preview(io.StringIO(text), max_table_rows=2)
+    assert hidden == 3 + 2
+    assert "| row 1 |" in markdown and "| row 2 |" not in markdown
+    assert markdown.count("more row(s) not shown") == 2
+    assert "Between" in markdown and "After" in markdown
+    assert markdown.count("| Name | Value |") == 3
+
+
+def test_truncate_preview_stops_at_max_chars():
+    markdown, hidden = truncate_preview(io.StringIO("x" * 50 + "\n" + "y" * 50 + "\n"), max_chars=60)
+    assert markdown.startswith("x" * 50 + "\n" + "y" * 9)
+    assert markdown.endswith("*Preview truncated: download the report for the full content.*\n")
+    assert hidden == 0
@@ -0,0 +1,48 @@
+"""Report store bookkeeping, and ReportFiles registering with it."""
+
+import io
+
+import app
+import report_store
+from app import DocumentProcessor, ProcessingOptions, ReportFiles
+from report_store import ReportStore
+
+
+def processed(text: bytes = b"# Notes\n\nSome text") -> DocumentProcessor:
+    processor = DocumentProcessor(ProcessingOptions(workers=1, use_cache=False))
+    file = io.BytesIO(text)
+    file.name, file.size = "notes.md", len(text)
+    processor.extract_files([file])
+    return processor
+
+
+def test_resize_does_not_re_add_a_removed_report():
+    store = ReportStore(max_bytes=1000, ttl_s=0)
+    store.add("a", 10, lambda: None)
+    assert store.resize("a", 20) and store.stats()['bytes'] == 20
+    store.remove("a")
+    assert not store.resize("a", 30)
+    assert store.stats() == {'reports': 0, 'bytes': 0, 'evictions': 0}
+
+
+def test_report_is_created_in_a_missing_store_directory(tmp_path, monkeypatch):
+    directory = str(tmp_path / "not" / "yet" / "there")
+    monkeypatch.setattr(report_store, "REPORT_STORE_DIR", directory)
+    monkeypatch.setattr(app, "REPORT_STORE_DIR", directory)
+    monkeypatch.setattr(report_store, "_store", None)
+    report = ReportFiles(processed())
+    try:
+        assert report.directory.startswith(directory) and report.available
+    finally:
+        report.cleanup()
+
+
+def test_html_of_an_evicted_report_is_not_counted(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "REPORT_STORE_DIR", str(tmp_path))
+    monkeypatch.setattr(report_store, "_store", None)
+    report = ReportFiles(processed())
+    store = report_store.get_report_store()
+    store.remove(report.directory)   # Evicted while the HTML is being read
+    assert "Some text" in report.read_html()
+    assert store.stats()['reports'] == 0
+    report.cleanup()
@@ -0,0 +1,87 @@
+"""ResultCache: hits and misses, LRU eviction, namespaces and the disabled fallback."""
+
+import itertools
+import os
+import zlib
+
+import pytest
+
+import result_cache
+from result_cache import ResultCache, get_result_cache
+
+
+@pytest.fixture(autouse=True)
+def ticking_clock(monkeypatch):
+    # Distinct access times, so LRU order does not depend on timer resolution
+    clock = itertools.count(1_000_000)
+    monkeypatch.setattr(result_cache.time, "time", lambda: float(next(clock)))
+
+
+def incompressible(n: int) -> str:
+    return os.urandom(n).hex()
+
+
+def test_hit_and_miss(tmp_path):
+    cache = ResultCache(str(tmp_path), 1024 * 1024)
+    assert cache.get("a") is None
+    cache.put("a", "a.md", "# Cached")
+    assert cache.get("a") == "# Cached"
+    stats = cache.stats()
+    assert (stats["entries"], stats["hits"], stats["misses"]) == (1, 1, 1) and stats["bytes"] > 0
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    contents = {key: incompressible(1000) for key in "abcd"}
+    entry_bytes = max(len(zlib.compress(text.encode(), 1)) for text in contents.values())
+    cache = ResultCache(str(tmp_path), int(2.5 * entry_bytes))    # Room for two entries
+    for key in "abc":
+        cache.put(key, f"{key}.md", contents[key])
+    assert cache.get("a") is None                                 # Evicted by "c"
+    assert cache.get("b") == contents["b"]                        # Now more recent than "c"
+    cache.put("d", "d.md", contents["d"])
+    assert cache.get("c") is None
+    assert cache.get("b") == contents["b"] and cache.get("d") == contents["d"]
+    assert cache.stats()["bytes"] <= cache.max_bytes
+
+
+def test_entry_larger_than_the_limit_is_not_stored(tmp_path):
+    cache = ResultCache(str(tmp_path), 500)
+    cache.put("small", "s.md", "x")
+    cache.put("big", "b.md", incompressible(1000))
+    assert cache.get("big") is None and cache.get("small") == "x"
+
+
+def test_namespaces_are_isolated(tmp_path):
+    results = ResultCache(str(tmp_path), 1024 * 1024)
+    html = ResultCache(str(tmp_path), 1024 * 1024, namespace="html_sections")
+    results.put("key", "a.md", "markdown")
+    assert html.get("key") is None
+    html.put("key", "a.md", "<p>html</p>")
+    assert results.get("key") == "markdown" and html.get("key") == "<p>html</p>"
+    html.purge()
+    assert html.stats()["entries"] == 0 and results.stats()["entries"] == 1
+
+
+def test_unknown_namespace_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        ResultCache(str(tmp_path), 1024, namespace="nope")
+
+
+def test_unusable_directory_disables_the_cache(tmp_path, monkeypatch):
+    blocker = tmp_path / "file"
+    blocker.write_text("not a directory")
+    monkeypatch.setattr(result_cache, "RESULT_CACHE_DIR", str(blocker / "cache"))
+    monkeypatch.setattr(result_cache, "RESULT_CACHE_ENABLED", True)
+    monkeypatch.setattr(result_cache, "_caches", {})
+    assert get_result_cache() is None
+    assert result_cache.RESULT_CACHE_ENABLED is False
+    assert result_cache.all_result_caches() == {}
+
+
+def test_process_wide_cache_per_namespace(tmp_path, monkeypatch):
+    monkeypatch.setattr(result_cache, "RESULT_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(result_cache, "RESULT_CACHE_ENABLED", True)
+    monkeypatch.setattr(result_cache, "_caches", {})
+    assert get_result_cache() is get_result_cache("results")
+    assert get_result_cache("ocr_pages") is not get_result_cache()
+    assert set(result_cache.all_result_caches()) == set(result_cache.CACHE_NAMESPACES)
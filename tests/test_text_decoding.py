@@ -0,0 +1,61 @@
+"""Chunked decoding of .txt / .md uploads (DocumentProcessor._read_text)."""
+
+import codecs
+import io
+
+import pytest
+
+import app
+from app import DocumentProcessor, ProcessingOptions
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    # Odd sizes so that chunks end inside multi-byte characters
+    monkeypatch.setattr(app, "TEXT_SAMPLE_BYTES", 16)
+    monkeypatch.setattr(app, "TEXT_CHUNK_BYTES", 7)
+
+
+def read_text(data: bytes, **options) -> str:
+    return DocumentProcessor(ProcessingOptions(**options))._read_text(io.BytesIO(data))
+
+
+@pytest.mark.parametrize("data, encoding", [
+    (codecs.BOM_UTF8 + "Xin chào".encode("utf-8"), "utf-8-sig"),
+    (codecs.BOM_UTF16_LE + "Xin chào".encode("utf-16-le"), "utf-16"),
+    (codecs.BOM_UTF16_BE + "Xin chào".encode("utf-16-be"), "utf-16"),
+    ("Xin chào".encode("utf-8"), "utf-8"),
+    ("Xin chào".encode("cp1258"), "latin-1"),
+])
+def test_detect_encoding(data, encoding):
+    file = io.BytesIO(data)
+    assert DocumentProcessor._detect_text_encoding(file) == encoding
+    assert file.tell() == 0
+
+
+@pytest.mark.parametrize("encoding", ["utf-8-sig", "utf-16"])
+def test_bom_is_dropped_and_chunks_join(encoding):
+    text = "Tiếng Việt có dấu, " * 5
+    assert read_text(text.encode(encoding)) == text.strip()
+
+
+def test_invalid_bytes_after_the_sample_fall_back_to_latin1():
+    valid = "đúng " * 10                 # Longer than the sample, valid UTF-8
+    data = valid.encode("utf-8") + b"\xff\xfe" + "vẫn UTF-8".encode("utf-8")
+    assert DocumentProcessor._detect_text_encoding(io.BytesIO(data)) == "utf-8"
+    assert read_text(data) == valid + "\xff\xfe" + "vẫn UTF-8"
+
+
+def test_decoded_chunks_keep_split_characters_whole():
+    text = "ệ" * 20                       # 3 bytes each, never aligned to 7-byte chunks
+    chunks = list(DocumentProcessor._iter_decoded_text(io.BytesIO(text.encode("utf-8")), "utf-8"))
+    assert len(chunks) > 1 and "".join(chunks) == text
+
+
+def test_truncates_at_the_limit():
+    text = "".join(str(i % 10) for i in range(100))
+    assert read_text(text.encode(), text_max_chars=25) == text[:25] + "\n\n*Truncated after 25 characters*"
+
+
+def test_text_of_exactly_the_limit_is_not_truncated():
+    assert read_text(b"a" * 21, text_max_chars=21) == "a" * 21
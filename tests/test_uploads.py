@@ -0,0 +1,41 @@
+"""Uploads are read from their own bytes, never from a server file of the same name."""
+
+import io
+import os
+
+from app import DocumentProcessor, ProcessingOptions, open_local_file
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def upload(data: bytes, name: str) -> io.BytesIO:
+    file = io.BytesIO(data)
+    file.name = name
+    file.size = len(data)
+    return file
+
+
+def test_upload_named_like_server_file_is_not_replaced(monkeypatch):
+    monkeypatch.chdir(REPO_ROOT)
+    processor = DocumentProcessor(ProcessingOptions(workers=1, use_cache=False, upload_spool_threshold_mb=0))
+    processor.extract_files([upload(b"my own notes", "README.md"), upload(b"x==1", "requirements.txt")])
+    assert [pf.content for pf in processor.processed_files] == ["my own notes", "x==1"]
+
+
+def test_only_explicit_paths_are_trusted(monkeypatch):
+    monkeypatch.chdir(REPO_ROOT)
+    assert DocumentProcessor._file_path(upload(b"", "README.md")) is None
+    path, is_temp = DocumentProcessor._spool_to_disk(upload(b"data", "README.md"))
+    try:
+        assert is_temp and path != "README.md"
+    finally:
+        os.unlink(path)
+    with open_local_file(os.path.join(REPO_ROOT, "README.md")) as file:
+        assert DocumentProcessor._file_path(file) == file.path
+
+
+def test_budget_mode_reads_the_upload_not_the_server_file(monkeypatch):
+    monkeypatch.chdir(REPO_ROOT)
+    processor = DocumentProcessor(ProcessingOptions(workers=1, use_cache=False, file_timeout_s=60))
+    processor.extract_files([upload(b"my own notes", "README.md")])
+    assert [pf.content for pf in processor.processed_files] == ["my own notes"]
@@ -0,0 +1,343 @@
+"""
+⚙️ Workers - Process pool for CPU-heavy extraction
+===================================================
+pdfplumber table detection is pure Python and CPU bound, so threads do not
+help. This module owns a process-wide ``ProcessPoolExecutor`` and the
+functions that run inside it.
+
+Why a separate module?
+- Streamlit re-executes ``app.py`` as ``__main__`` on every rerun, so the pool
+  must live in an imported module to survive reruns.
+- Functions sent to worker processes are pickled by reference and must be
+  importable by name in the child.
+
+Workers use the ``spawn`` start method: forking a Streamlit server (many
+threads, possibly torch loaded) is not safe.
+
+A task running on a ``ProcessPoolExecutor`` cannot be stopped, so files with
+a time or memory budget run on ``BudgetWorker`` processes instead: one file
+at a time, killed when the file goes over budget.
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+
+# ============================================================================
+# PROCESS POOL
+# ============================================================================
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def resolve_workers(workers: int) -> int:
+    """Turn a configured worker count into a real one (0 or less = one per CPU)."""
+    if workers <= 0:
+        return os.cpu_count() or 1
+    return workers
+
+
+def get_process_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Return the process-wide pool, (re)creating it if the size changed or a
+    worker crashed.
+
+    Args:
+        workers: Desired number of worker processes (0 = one per CPU)
+    """
+    global _pool, _pool_workers
+    workers = resolve_workers(workers)
+
+    with _pool_lock:
+        broken = _pool is not None and getattr(_pool, '_broken', False)
+        if _pool is None or broken or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown_pool() -> None:
+    """Stop the worker processes, budget workers included (they are restarted on next use)."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+            _pool_workers = 0
+    with _budget_lock:
+        while _idle_budget_workers:
+            _idle_budget_workers.pop().stop()
+
+
+def split_range(total: int, chunks: int) -> List[range]:
+    """Split range(total) into at most `chunks` contiguous, nearly equal ranges."""
+    chunks = max(1, min(chunks, total))
+    size, extra = divmod(total, chunks)
+    ranges = []
+    start = 0
+    for idx in range(chunks):
+        end = start + size + (1 if idx < extra else 0)
+        ranges.append(range(start, end))
+        start = end
+    return ranges
+
+
+# ============================================================================
+# KILLABLE WORKERS (per-file budgets)
+# ============================================================================
+
+# How often (s) the resident memory of a budget worker is checked
+BUDGET_POLL_S = 0.2
+
+_idle_budget_workers: List['BudgetWorker'] = []
+_budget_lock = threading.Lock()
+
+
+class BudgetOutcome(NamedTuple):
+    """Result of one file run by a BudgetWorker."""
+    content: Optional[str]              # Markdown of the file; None unless it finished
+    partial: str                        # Parts finished before the worker stopped (PDF pages, Excel sheets)
+    error: Optional[str]                # Extractor error, or why the file went over budget
+    budget_exceeded: bool
+    page_stats: Dict[str, int]
+    stages: Dict[str, Dict]             # Stage timings as in ProcessedFile.metrics (empty if killed)
+
+
+class BudgetWorker:
+    """
+    A worker process that extracts one file at a time and is killed when
+    the file runs longer than its time budget or its resident memory grows
+    beyond its memory budget.
+
+    The process streams finished parts (see DocumentProcessor._emit_partial)
+    back while it works, so a file stopped halfway still returns them. The
+    process is reused for the next file, and restarted after a kill.
+    Resident memory is sampled every BUDGET_POLL_S seconds, from /proc on
+    Linux or with psutil if installed; elsewhere only the time budget applies.
+    """
+
+    def __init__(self):
+        self._process = None
+        self._conn = None
+
+    def run(self, path: str, file_extension: str, options: dict,
+            timeout_s: float = 0, max_memory_mb: float = 0) -> BudgetOutcome:
+        """
+        Extract one file within the given budgets.
+
+        Args:
+            path: Path of the file on disk
+            file_extension: Lower-case extension without the dot
+            options: ProcessingOptions as a dict (dataclasses.asdict)
+            timeout_s: Wall time budget in seconds (0 = none)
+            max_memory_mb: Resident memory budget of the worker in MB (0 = none)
+        """
+        if self._process is None or not self._process.is_alive():
+            failed = self._start()
+            if failed is not None:
+                return failed
+        started = time.monotonic()
+        self._conn.send((path, file_extension, options))
+        parts: List[Tuple[str, str]] = []  # (separator, content)
+
+        while True:
+            elapsed = time.monotonic() - started
+            if timeout_s > 0 and elapsed >= timeout_s:
+                return self._kill(parts, f"Time budget of {timeout_s:g} s exceeded")
+            if max_memory_mb > 0:
+                rss_mb = process_rss_mb(self._process.pid)
+                if rss_mb is not None and rss_mb > max_memory_mb:
+                    return self._kill(parts, f"Memory budget of {max_memory_mb:g} MB exceeded ({rss_mb:.0f} MB in use)")
+
+            wait = BUDGET_POLL_S if max_memory_mb > 0 else None
+            if timeout_s > 0:
+                wait = min(wait or timeout_s, timeout_s - elapsed)
+            if not self._conn.poll(wait):
+                continue
+            try:
+                kind, *message = self._conn.recv()
+            except EOFError:
+                return self._kill(parts, f"Worker process died (exit code {self._process.exitcode})")
+
+            if kind == 'part':
+                parts.append(tuple(message))
+            elif kind == 'done':
+                content, page_stats, stages = message
+                return BudgetOutcome(content, "", None, False, page_stats, stages)
+            else:
+                error, page_stats, stages = message
+                return BudgetOutcome(None, _join_parts(parts), error, False, page_stats, stages)
+
+    def stop(self) -> None:
+        """Terminate the worker process (restarted on next use)."""
+        if self._process is not None:
+            self._process.kill()
+            self._process.join()
+            self._conn.close()
+            self._process = None
+            self._conn = None
+
+    def _start(self) -> Optional[BudgetOutcome]:
+        """Start the worker process; an outcome describing the failure if it dies while importing."""
+        context = multiprocessing.get_context("spawn")
+        self._conn, child_conn = context.Pipe()
+        self._process = context.Process(target=_budget_worker_main, args=(child_conn,), daemon=True)
+        self._process.start()
+        child_conn.close()
+        # Imports are done before the first budget starts
+        try:
+            self._conn.recv()
+        except EOFError:
+            self._process.join()
+            return self._kill([], f"Worker process died while starting (exit code {self._process.exitcode})")
+        return None
+
+    def _kill(self, parts: List[Tuple[str, str]], reason: str) -> BudgetOutcome:
+        self.stop()
+        return BudgetOutcome(None, _join_parts(parts), reason, True, {}, {})
+
+
+@contextmanager
+def budget_worker() -> Iterator[BudgetWorker]:
+    """Check out an idle BudgetWorker (a new one if none is idle) for one file."""
+    with _budget_lock:
+        worker = _idle_budget_workers.pop() if _idle_budget_workers else BudgetWorker()
+    try:
+        yield worker
+    finally:
+        with _budget_lock:
+            _idle_budget_workers.append(worker)
+
+
+def process_rss_mb(pid: int) -> Optional[float]:
+    """Resident memory of a process in MB (Linux /proc, else psutil if installed); None if unknown."""
+    try:
+        with open(f"/proc/{pid}/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process(pid).memory_info().rss / 1024 / 1024
+    except Exception:
+        return None
+
+
+def _join_parts(parts: List[Tuple[str, str]]) -> str:
+    pieces = []
+    for separator, content in parts:
+        if pieces:
+            pieces.append(separator)
+        pieces.append(content)
+    return "".join(pieces)
+
+
+def _budget_worker_main(conn) -> None:
+    """Loop of a BudgetWorker process: extract each file sent over `conn`, streaming finished parts back."""
+    from app import DocumentProcessor, ProcessingOptions, open_local_file
+    from metrics import StageMetrics, trace_memory
+
+    conn.send(('ready',))
+    while True:
+        try:
+            path, file_extension, options = conn.recv()
+        except EOFError:
+            return
+
+        processor = DocumentProcessor(ProcessingOptions(**{**options, 'workers': 1}))
+        processor._partial_callback = lambda content, separator: conn.send(('part', separator, content))
+        stages = StageMetrics()
+        try:
+            with open_local_file(path) as file:
+                with trace_memory(processor.options.trace_memory), processor._measuring(stages, 'extract'):
+                    content = processor._extract(file, file_extension)
+            conn.send(('done', content, dict(processor.pdf_page_stats), stages.to_dict()))
+        except Exception as e:
+            conn.send(('error', str(e), dict(processor.pdf_page_stats), stages.to_dict()))
+
+
+# ============================================================================
+# WORKER FUNCTIONS (run inside the pool)
+# ============================================================================
+
+def extract_pdf_pages(path: str, start: int, end: int,
+                      options: dict) -> Tuple[List[str], Dict[str, int], Dict[int, str], Dict[str, Dict]]:
+    """
+    Extract pages [start, end) of a PDF. Each worker opens the file itself
+    and closes every page once it is done, so memory stays bounded by one
+    page rather than the whole range.
+
+    Args:
+        path: Path of the PDF on disk
+        start: First page index (0-based, inclusive)
+        end: Last page index (0-based, exclusive)
+        options: ProcessingOptions as a dict (dataclasses.asdict)
+
+    Returns:
+        (Markdown for each page in page order, page triage counts,
+        scanned pages as page number -> content hash, stage timings as in
+        ProcessedFile.metrics). Scanned pages are empty here: the caller
+        OCRs them on its shared engine, so workers never load the OCR model.
+    """
+    import pdfplumber
+    from app import DocumentProcessor, ProcessingOptions
+    from metrics import StageMetrics, trace_memory
+
+    processor = DocumentProcessor(ProcessingOptions(**{**options, 'workers': 1}))
+    processor._scanned_pages = {}
+    stages = StageMetrics()
+    with trace_memory(processor.options.trace_memory), processor._measuring(stages, 'pdf_pages'):
+        with pdfplumber.open(path) as pdf:
+            pages = processor._extract_pdf_range(pdf, range(start, end), path=path)
+    return pages, dict(processor.pdf_page_stats), processor._scanned_pages, stages.to_dict()
+
+
+def extract_file(path: str, file_extension: str, options: dict) -> Tuple[str, Dict[str, Dict]]:
+    """
+    Run the extractor for one whole file (Excel, Word, ...) in a worker.
+
+    Args:
+        path: Path of the file on disk
+        file_extension: Lower-case extension without the dot
+        options: ProcessingOptions as a dict (dataclasses.asdict)
+
+    Returns:
+        (Markdown content of the file, stage timings as in ProcessedFile.metrics)
+    """
+    from app import DocumentProcessor, ProcessingOptions, open_local_file
+    from metrics import StageMetrics, trace_memory
+
+    # Already inside a worker: never fan out to the pool again
+    processor = DocumentProcessor(ProcessingOptions(**{**options, 'workers': 1}))
+    stages = StageMetrics()
+    with open_local_file(path) as file:
+        with trace_memory(processor.options.trace_memory), processor._measuring(stages, 'extract'):
+            content = processor._extract(file, file_extension)
+    return content, stages.to_dict()
+
+
+def render_html_sections(sections: List[Tuple[str, str]]) -> List[str]:
+    """
+    Convert report sections from Markdown to HTML in a worker.
+
+    Args:
+        sections: (markdown, heading id prefix) pairs
+
+    Returns:
+        HTML fragment for each section, in order
+    """
+    from app import markdown_to_html
+
+    return [markdown_to_html(markdown_text, id_prefix) for markdown_text, id_prefix in sections]